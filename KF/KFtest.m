@@ -1,6 +1,11 @@
 clear all; close all; clc;
 pkg load signal
 pkg load statistics
+% ncread for sensors.nc; the CSV exports are read without it
+try
+  pkg load netcdf
+catch
+end
 addpath(genpath(pwd))
 
 %% ------------------------
@@ -3,27 +3,25 @@ function [high_g_accel, high_g_bias, imu_gyro, imu_gyro_bias, imu_accel, imu_acc
   % Path to sensor data
   path_sensors = "C:\\Users\\Claudio Manuel\\Desktop\\NOVA-FCT\\ASTRO\\KF\\sensors_data";
 
-  % Filenames
-  high_g_file    = "exported_Accelerometer_0_data.csv";
-  imu_accel_file = "exported_Accelerometer_1_data.csv";
-  imu_gyro_file  = "exported_Gyroscope_2_data.csv";
-  gps_file_name  = "exported_GnssReceiver_data.csv";
-  baro_file_name = "exported_Barometer_data.csv";
-
-  high_accel_bias_file = "exported_acc_bias_0_data.csv";
-  imu_accel_bias_file = "exported_acc_bias_1_data.csv";
-  imu_gyro_bias_file = "exported_gyro_bias_data.csv";
+  % Channels of sensors.nc, see sensor_export.py
+  accel_columns = {"ax", "ay", "az"};
+  gyro_columns  = {"wx", "wy", "wz"};
 
   % 3-axis sensors
-  three_axis_files = {high_g_file, imu_accel_file, imu_gyro_file, high_accel_bias_file, imu_accel_bias_file, imu_gyro_bias_file};
-  three_axis_sensors = cell(1, length(three_axis_files));
+  three_axis_channels = {
+    "Accelerometer_0", accel_columns;
+    "Accelerometer_1", accel_columns;
+    "Gyroscope_2",     gyro_columns;
+    "acc_bias_0",      {"bax", "bay", "baz"};
+    "acc_bias_1",      {"bax", "bay", "baz"};
+    "gyro_bias",       {"bgx", "bgy", "bgz"}
+  };
+  three_axis_sensors = cell(1, rows(three_axis_channels));
 
   % Load 3-axis sensors
-  for i = 1:length(three_axis_files)
-
-     filepath = fullfile(path_sensors, three_axis_files{i});
+  for i = 1:rows(three_axis_channels)
 
-     three_axis_sensors{i} = csvread(filepath, 1, 0);  % Skip header
+     three_axis_sensors{i} = read_sensor_channel(path_sensors, three_axis_channels{i, 1}, three_axis_channels{i, 2});
 
   endfor
 
@@ -35,7 +33,7 @@ function [high_g_accel, high_g_bias, imu_gyro, imu_gyro_bias, imu_accel, imu_acc
   imu_gyro_bias   = three_axis_sensors{6};
 
   % Load GPS
-  gps_pos_wgs = csvread(fullfile(path_sensors, gps_file_name), 1, 0);
+  gps_pos_wgs = read_sensor_channel(path_sensors, "GnssReceiver", {"latitude", "longitude", "altitude"});
 
   lat = gps_pos_wgs(:,2);
   lat0 = lat(1);
@@ -57,7 +55,7 @@ function [high_g_accel, high_g_bias, imu_gyro, imu_gyro_bias, imu_accel, imu_acc
   gps = [x, y, -z, vx, vy, vz];
 
   % Load Barometer
-  baro_pressure = csvread(fullfile(path_sensors, baro_file_name), 1, 0);
+  baro_pressure = read_sensor_channel(path_sensors, "Barometer", {"pressure"});
 
   baro = std_atmosphere_model(baro_pressure(:,2));
 
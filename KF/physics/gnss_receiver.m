@@ -24,8 +24,7 @@ function [xEast, yNorth, zUp, vxEast, vyNorth, vzUp ] = gnss_receiver(path_senso
 
   %% ------------------------------------
   %% Please remove before implementation
-  filepath = fullfile(path_sensors, "exported_velocity_data.csv");
-  velocity = csvread(filepath, 1, 0);
+  velocity = read_sensor_channel(path_sensors, "velocity", {"Vx", "Vy", "Vz"});
 
   N = min([
     length(xEast),
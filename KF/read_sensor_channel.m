@@ -0,0 +1,46 @@
+function [channel] = read_sensor_channel(path_sensors, name, columns)
+
+  % Reads one channel of sensors.nc, written by sensor_export.py, as
+  % [t, column_1, column_2, ...], the layout of the old CSV exports.
+  % Without sensors.nc the channel is read from its CSV export,
+  % exported_<name>_data.csv, such as those shipped in sensors_data
+  filepath = fullfile(path_sensors, "sensors.nc");
+
+  if exist(filepath, "file")
+
+    channel = ncread(filepath, "/time");
+
+    for i = 1:length(columns)
+
+       channel = [channel, ncread(filepath, ["/" name "/" columns{i}])];
+
+    endfor
+
+  else
+
+    filepath = fullfile(path_sensors, ["exported_" name "_data.csv"]);
+
+    % Columns are picked by their header name
+    fid = fopen(filepath, "r");
+    if fid < 0
+      error("read_sensor_channel: neither sensors.nc nor %s found", filepath);
+    endif
+    header = strtrim(strsplit(fgetl(fid), ","));
+    fclose(fid);
+
+    data = csvread(filepath, 1, 0);  % Skip header
+    channel = data(:, 1);
+
+    for i = 1:length(columns)
+
+       index = find(strcmp(header, columns{i}), 1);
+       if isempty(index)
+         error("read_sensor_channel: no column %s in %s", columns{i}, filepath);
+       endif
+       channel = [channel, data(:, index)];
+
+    endfor
+
+  endif
+
+endfunction
@@ -0,0 +1,61 @@
+function [channel, columns] = read_sensor_log(filepath, name)
+
+  % Reads one channel of a binary sensor log, written by sensor_log.py, as
+  % [t, column_1, column_2, ...], the layout of measured_data.
+  % columns holds the name of every column, starting with "t".
+  %
+  % Layout: "RPYSLOG1", uint64 header length, JSON header, then one
+  % row-major little-endian float64 block per channel, each starting on a
+  % 64-byte boundary. Only the requested block is read.
+  alignment = 64;
+
+  fid = fopen(filepath, "r", "ieee-le");
+  if fid < 0
+    error("read_sensor_log: cannot open %s", filepath);
+  endif
+
+  magic = fread(fid, [1, 8], "*char");
+  if ~strcmp(magic, "RPYSLOG1")
+    fclose(fid);
+    error("read_sensor_log: %s is not a sensor log", filepath);
+  endif
+
+  header_length = double(fread(fid, 1, "*uint64"));
+  header = jsondecode(fread(fid, [1, header_length], "*char"));
+  data_start = ceil((8 + 8 + header_length) / alignment) * alignment;
+
+  % jsondecode returns a struct array when every channel has the same
+  % fields, a cell array otherwise
+  channels = header.channels;
+  if ~iscell(channels)
+    channels = num2cell(channels);
+  endif
+
+  entry = [];
+  for i = 1:numel(channels)
+
+     if strcmp(channels{i}.name, name)
+       entry = channels{i};
+       break;
+     endif
+
+  endfor
+
+  if isempty(entry)
+    fclose(fid);
+    error("read_sensor_log: no channel %s in %s", name, filepath);
+  endif
+
+  columns = cellstr(entry.columns);
+  n_columns = numel(columns);
+
+  % Blocks are row-major, so they are read transposed
+  fseek(fid, data_start + entry.offset, "bof");
+  channel = fread(fid, [n_columns, entry.rows], "float64")';
+  fclose(fid);
+
+  if isempty(channel)
+    channel = zeros(0, n_columns);
+  endif
+
+endfunction
@@ -0,0 +1,238 @@
+"""Regular-grid lookup table of the air brakes drag coefficient.
+
+``specifications/air_brakes_cd.csv`` lists scattered ``(deployment_level,
+mach, cd)`` rows. Read as a rocketpy ``Function`` every controller tick pays
+for a scattered-data interpolation over all of them. ``DragTable`` compiles
+the rows once onto their regular grid of deployment levels and Mach numbers
+and evaluates it bilinearly, either one point at a time from plain Python
+floats (``drag_coefficient``, the signature the air brakes controller calls)
+or on whole arrays at once (calling the table). The bilinear coefficients
+of every cell are precomputed, so a scalar lookup costs about as much as 15
+empty Python calls; ``python air_brakes_drag.py`` prints both timings.
+
+Grid nodes the rows leave out are filled by linear interpolation of the
+rows. Deployment levels or Mach numbers with nodes outside the convex hull
+of the rows are dropped, such as the lone deployment level 1.1 of the CSV,
+beyond what the clamped air brakes reach. Queries outside the grid hold the
+edge values, like the ``clamp=True`` air brakes.
+
+``load_drag_table`` caches the compiled grid as a ``.npz`` next to the CSV,
+rebuilt whenever the CSV changes.
+
+Usage
+-----
+    table = load_drag_table("specifications/air_brakes_cd.csv")
+    table.drag_coefficient(0.5, 0.3)            # scalar
+    table(levels, machs)                        # arrays, broadcast
+
+    python air_brakes_drag.py specifications/air_brakes_cd.csv
+"""
+import argparse
+import os
+import timeit
+
+import numpy as np
+from scipy.interpolate import griddata
+
+from hashing import file_hash
+from resampling import bracket, brackets, uniform_step
+
+# Bumped whenever the way tables are compiled changes, invalidating caches
+CACHE_VERSION = 1
+
+
+class DragTable:
+    """Bilinear drag coefficient table on a regular grid.
+
+    Attributes
+    ----------
+    DragTable.deployment_levels : numpy.ndarray
+        Increasing deployment levels of the grid rows.
+    DragTable.machs : numpy.ndarray
+        Increasing Mach numbers of the grid columns.
+    DragTable.cd : numpy.ndarray
+        ``(len(deployment_levels), len(machs))`` drag coefficients.
+    """
+
+    def __init__(self, deployment_levels, machs, cd):
+        self.deployment_levels = np.asarray(deployment_levels, dtype=float)
+        self.machs = np.asarray(machs, dtype=float)
+        self.cd = np.asarray(cd, dtype=float)
+        if self.cd.shape != (len(self.deployment_levels), len(self.machs)):
+            raise ValueError(
+                f"cd has shape {self.cd.shape}, expected "
+                f"{(len(self.deployment_levels), len(self.machs))}."
+            )
+        if min(self.cd.shape) < 2:
+            raise ValueError("The table needs at least two deployment levels and two Mach numbers.")
+        # Plain Python copies for the scalar path, where NumPy scalars are slow
+        self._levels = self.deployment_levels.tolist()
+        self._machs = self.machs.tolist()
+        # Bilinear coefficients of every cell: cd = c + u * (cu + v * cuv) + v * cv
+        cd = self.cd
+        c = cd[:-1, :-1]
+        cu = cd[1:, :-1] - c
+        cv = cd[:-1, 1:] - c
+        cuv = cd[1:, 1:] - cd[1:, :-1] - cv
+        self._patches = [
+            list(zip(*rows)) for rows in zip(c.tolist(), cu.tolist(), cv.tolist(), cuv.tolist())
+        ]
+        self._level_step = uniform_step(self.deployment_levels)
+        self._mach_step = uniform_step(self.machs)
+        self._cells = None
+        if self._level_step and self._mach_step:
+            self._cells = (
+                *self._level_step,
+                *self._mach_step,
+                len(self._levels) - 2,
+                len(self._machs) - 2,
+            )
+
+    @classmethod
+    def from_points(cls, points):
+        """Compiles scattered ``(deployment_level, mach, cd)`` rows onto their grid."""
+        points = np.asarray(points, dtype=float)
+        levels, level_index = np.unique(points[:, 0], return_inverse=True)
+        machs, mach_index = np.unique(points[:, 1], return_inverse=True)
+
+        cd = np.full((len(levels), len(machs)), np.nan)
+        cd[level_index, mach_index] = points[:, 2]
+        missing = np.isnan(cd)
+        if missing.any():
+            rows, columns = np.nonzero(missing)
+            nodes = np.column_stack([levels[rows], machs[columns]])
+            cd[missing] = griddata(points[:, :2], points[:, 2], nodes, method="linear")
+
+        # Trim the level or Mach number with the most nodes outside the hull
+        # until none are left
+        while np.isnan(cd).any():
+            outside = np.isnan(cd)
+            by_level, by_mach = outside.sum(axis=1), outside.sum(axis=0)
+            if by_level.max() >= by_mach.max():
+                keep = by_level < by_level.max()
+                levels, cd = levels[keep], cd[keep]
+            else:
+                keep = by_mach < by_mach.max()
+                machs, cd = machs[keep], cd[:, keep]
+        return cls(levels, machs, cd)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Compiles a ``deployment_level, mach, cd`` CSV with a header row."""
+        return cls.from_points(np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2))
+
+    def drag_coefficient(self, deployment_level, mach):
+        """Drag coefficient at one deployment level and Mach number (floats)."""
+        if self._cells is None:
+            i, u = bracket(self._levels, self._level_step, deployment_level)
+            j, v = bracket(self._machs, self._mach_step, mach)
+        else:
+            # Evenly spaced axes, the usual case, bracketed inline
+            level0, level_scale, mach0, mach_scale, last_i, last_j = self._cells
+            u = (deployment_level - level0) * level_scale
+            if u <= 0:
+                i, u = 0, 0.0
+            elif u >= last_i + 1:
+                i, u = last_i, 1.0
+            else:
+                i = int(u)
+                u -= i
+            v = (mach - mach0) * mach_scale
+            if v <= 0:
+                j, v = 0, 0.0
+            elif v >= last_j + 1:
+                j, v = last_j, 1.0
+            else:
+                j = int(v)
+                v -= j
+        c, cu, cv, cuv = self._patches[i][j]
+        return c + u * (cu + v * cuv) + v * cv
+
+    def __call__(self, deployment_level, mach):
+        """Drag coefficients of broadcast arrays of deployment levels and Mach numbers."""
+        deployment_level, mach = np.broadcast_arrays(
+            np.asarray(deployment_level, dtype=float), np.asarray(mach, dtype=float)
+        )
+        i, u = brackets(self.deployment_levels, self._level_step, deployment_level)
+        j, v = brackets(self.machs, self._mach_step, mach)
+        cd = self.cd
+        return (1 - u) * ((1 - v) * cd[i, j] + v * cd[i, j + 1]) + u * (
+            (1 - v) * cd[i + 1, j] + v * cd[i + 1, j + 1]
+        )
+
+    def save(self, path, source_hash=""):
+        """Writes the grid to a ``.npz`` file, tagged with the hash of its source."""
+        np.savez(
+            path,
+            deployment_levels=self.deployment_levels,
+            machs=self.machs,
+            cd=self.cd,
+            source_hash=np.array(source_hash),
+            version=CACHE_VERSION,
+        )
+        return path
+
+
+def cache_path(csv_path):
+    """Path of the compiled table of ``csv_path``."""
+    return os.path.splitext(csv_path)[0] + ".npz"
+
+
+def load_drag_table(csv_path, cache=None):
+    """The table of ``csv_path``, from its compiled cache when up to date.
+
+    Parameters
+    ----------
+    csv_path : str
+        ``deployment_level, mach, cd`` CSV.
+    cache : str, optional
+        Path of the compiled table, ``cache_path(csv_path)`` by default.
+
+    Returns
+    -------
+    DragTable
+    """
+    cache = cache or cache_path(csv_path)
+    source_hash = file_hash(csv_path)
+    if os.path.exists(cache):
+        with np.load(cache) as data:
+            current = (
+                "version" in data
+                and int(data["version"]) == CACHE_VERSION
+                and str(data["source_hash"]) == source_hash
+            )
+            if current:
+                return DragTable(data["deployment_levels"], data["machs"], data["cd"])
+
+    table = DragTable.from_csv(csv_path)
+    table.save(cache, source_hash)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", nargs="?", default="specifications/air_brakes_cd.csv")
+    parser.add_argument("--cache", help="Path of the compiled table.")
+    args = parser.parse_args(argv)
+
+    table = load_drag_table(args.csv, args.cache)
+    print(
+        f"{len(table.deployment_levels)} deployment levels x {len(table.machs)} Mach numbers, "
+        f"cached in {args.cache or cache_path(args.csv)}"
+    )
+
+    number = 100000
+    scalar = timeit.timeit("f(0.55, 0.43)", globals={"f": table.drag_coefficient}, number=number)
+    scalar /= number
+    # Cost of an empty Python call on this machine, to compare across machines
+    call = timeit.timeit("f(0.55, 0.43)", globals={"f": lambda a, b: None}, number=number)
+    call /= number
+    levels = np.random.default_rng(0).uniform(0, 1, number)
+    machs = np.random.default_rng(1).uniform(0, 1.1, number)
+    vectorised = timeit.timeit(lambda: table(levels, machs), number=10) / 10 / number
+    print(f"Scalar: {scalar * 1e9:.0f} ns per call ({scalar / call:.0f} empty Python calls)")
+    print(f"Vectorised: {vectorised * 1e9:.1f} ns per point")
+
+
+if __name__ == "__main__":
+    main()
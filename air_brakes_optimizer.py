@@ -0,0 +1,380 @@
+"""Closed-loop optimisation of the air brakes controller for a target apogee.
+
+The controller sketched in ``load_flight_from_json`` follows a hand-fitted
+cubic deployment schedule. This driver tunes a controller instead: every
+candidate is flown, air brakes in the loop, over a fixed dispersion set
+drawn from ``dispersion.json``, and Nelder-Mead minimises the RMS apogee
+error against the target over that set.
+
+Two controller families are available:
+
+- ``schedule``: open-loop deployment levels at fixed times after burnout,
+  linear in between and held after the last one. Starts from the hand-fitted
+  cubic.
+- ``pid``: feedback on the apogee predicted by ``apogee_predictor`` with the
+  discrete PID of ``ORBrakeSimulationListener`` (``Kp``, ``Ki``, ``Kd`` and
+  derivative filter ``tau``, integral clamped against wind-up). Its output is
+  the deployment level rather than a drag force.
+
+Simulations are kept to a minimum. Every flight stops at apogee. The
+dispersion set is the same for every candidate (common random numbers), so
+candidates are compared on the same flights rather than on noise.
+Candidates are memoized, and the runs of each one are flown in parallel.
+
+Usage
+-----
+    python air_brakes_optimizer.py --family pid --runs 16 --target 3000
+    python air_brakes_optimizer.py --family schedule --runs 8 --budget 60 -o schedule.json
+"""
+import argparse
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import minimize
+
+from apogee_predictor import ApogeePredictor
+from load_flight_from_json import load_flight_from_config
+from monte_carlo import campaign_runs
+from sampling import SAMPLING_METHODS
+from worker_pool import init_worker, worker_config
+
+def hand_fitted_level(time):
+    """Deployment of the cubic schedule sketched in ``load_flight_from_json``."""
+    if time < 3.8 or time > 19.6:
+        return 0.0
+    if time <= 11.4:
+        return 1.0
+    level = -0.002906 * time**3 + 0.1497 * time**2 - 2.563 * time + 14.96
+    return min(max(level, 0.0), 1.0)
+
+
+class DeploymentSchedule:
+    """Open-loop deployment levels at ``knots`` seconds after burnout.
+
+    Attributes
+    ----------
+    DeploymentSchedule.levels : tuple
+        Deployment level at each knot, linear in between, held after the
+        last knot and zero before burnout.
+    DeploymentSchedule.knots : tuple
+        Knot times after burnout (s).
+    """
+
+    name = "schedule"
+    default_knots = (0.0, 4.0, 8.0, 12.0, 16.0, 20.0)
+
+    def __init__(self, levels, knots=default_knots):
+        self.levels = tuple(float(v) for v in levels)
+        self.knots = tuple(float(k) for k in knots)
+
+    @classmethod
+    def initial(cls, burn_out_time, target=None, knots=default_knots):
+        """The hand-fitted cubic sampled at ``knots``."""
+        return cls([hand_fitted_level(burn_out_time + k) for k in knots], knots)
+
+    @classmethod
+    def from_parameters(cls, parameters, knots=default_knots, target=None):
+        return cls(parameters, knots)
+
+    @property
+    def parameters(self):
+        return np.array(self.levels)
+
+    @property
+    def bounds(self):
+        return [(0.0, 1.0)] * len(self.levels)
+
+    def to_dict(self):
+        return {"family": self.name, "knots": list(self.knots), "levels": list(self.levels)}
+
+    def __call__(self, env, rocket, drag_table):
+        burn_out_time = rocket.motor.burn_out_time
+        knots, levels = np.array(self.knots), np.array(self.levels)
+
+        def controller(time, sampling_rate, state, state_history, observed_variables, air_brakes):
+            if time < burn_out_time:
+                return None
+            air_brakes.deployment_level = float(np.interp(time - burn_out_time, knots, levels))
+            return None
+
+        return controller
+
+
+class ApogeeFeedback:
+    """PID on the predicted apogee, as ``ORBrakeSimulationListener.requiredDrag``.
+
+    Attributes
+    ----------
+    ApogeeFeedback.gains : tuple
+        ``(kp, ki, kd, tau)``: gains per metre of predicted apogee above
+        ``target`` and the derivative filter time constant (s).
+    ApogeeFeedback.target : float
+        Apogee setpoint above ground level (m).
+    """
+
+    name = "pid"
+
+    def __init__(self, gains, target):
+        self.gains = tuple(float(g) for g in gains)
+        self.target = float(target)
+
+    @classmethod
+    def initial(cls, burn_out_time, target, knots=None):
+        # Full deployment 100 m above target, no integral or derivative action
+        return cls((0.01, 0.0, 0.0, 0.5), target)
+
+    @classmethod
+    def from_parameters(cls, parameters, knots=None, target=None):
+        return cls(parameters, target)
+
+    @property
+    def parameters(self):
+        return np.array(self.gains)
+
+    @property
+    def bounds(self):
+        return [(0.0, 0.1), (0.0, 0.1), (0.0, 0.1), (0.05, 5.0)]
+
+    def to_dict(self):
+        kp, ki, kd, tau = self.gains
+        return {"family": self.name, "target": self.target, "kp": kp, "ki": ki, "kd": kd, "tau": tau}
+
+    def __call__(self, env, rocket, drag_table):
+        kp, ki, kd, tau = self.gains
+        target = self.target
+        burn_out_time = rocket.motor.burn_out_time
+        predictor = ApogeePredictor(env, rocket, drag_table)
+        memory = {"integral": 0.0, "derivative": 0.0, "error": None, "apogee": None}
+
+        def controller(time, sampling_rate, state, state_history, observed_variables, air_brakes):
+            if time < burn_out_time:
+                return None
+            altitude = state[2]
+            wind_x, wind_y = env.wind_velocity_x(altitude), env.wind_velocity_y(altitude)
+            apogee = predictor.predict(
+                altitude - env.elevation,
+                state[5],
+                ((state[3] - wind_x) ** 2 + (state[4] - wind_y) ** 2) ** 0.5,
+                air_brakes.deployment_level,
+            )
+
+            # Discrete PID of ORBrakeSimulationListener, T the sampling period
+            T = 1 / sampling_rate
+            error = apogee - target
+            if memory["error"] is not None:
+                memory["integral"] += 0.5 * ki * T * (error + memory["error"])
+                memory["derivative"] = (
+                    2 * kd * (apogee - memory["apogee"]) + (2 * tau - T) * memory["derivative"]
+                ) / (2 * tau + T)
+            memory["integral"] = min(max(memory["integral"], 0.0), 1.0)
+            memory["error"], memory["apogee"] = error, apogee
+
+            level = kp * error + memory["integral"] + memory["derivative"]
+            air_brakes.deployment_level = min(max(level, 0.0), 1.0)
+            return None
+
+        return controller
+
+
+FAMILIES = {family.name: family for family in (DeploymentSchedule, ApogeeFeedback)}
+
+
+def _run_controlled(controller, seed, overrides):
+    """Flies one dispersed run with ``controller`` and returns its AGL apogee."""
+    # Parachute trigger noise is drawn from the global numpy generator
+    np.random.seed(seed % 2**32)
+    overrides = {**overrides, "flight.terminate_on_apogee": True}
+    config, config_sensor = worker_config()
+    env, _, _, flight, _, _, _ = load_flight_from_config(
+        config, config_sensor, overrides=overrides, air_brakes_controller=controller
+    )
+    return float(flight.apogee - env.elevation)
+
+
+class ControllerObjective:
+    """Memoized RMS apogee error of controllers over one dispersion set.
+
+    Attributes
+    ----------
+    ControllerObjective.runs : list
+        ``(seed, overrides)`` of each dispersed run, flown by every candidate.
+    ControllerObjective.history : list
+        ``(controller, apogees, rms_error)`` of every candidate flown.
+    ControllerObjective.simulations : int
+        Number of flights simulated so far.
+    """
+
+    def __init__(self, executor, family, runs, target, knots=None):
+        self.executor = executor
+        self.family = family
+        self.runs = runs
+        self.target = target
+        self.knots = knots
+        self.history = []
+        self.simulations = 0
+        self._cache = {}
+
+    def controller(self, parameters):
+        return self.family.from_parameters(parameters, knots=self.knots, target=self.target)
+
+    def apogees(self, controller):
+        """AGL apogees of the dispersion set flown with ``controller``."""
+        key = tuple(np.round(controller.parameters, 9))
+        if key not in self._cache:
+            jobs = [(controller, seed, overrides) for seed, overrides in self.runs]
+            apogees = np.array(list(self.executor.map(_run_controlled, *zip(*jobs))))
+            self.simulations += len(jobs)
+            self._cache[key] = apogees
+            self.history.append((controller, apogees, self.rms_error(apogees)))
+            sys.stdout.write(
+                f"\r{len(self.history)} candidates, {self.simulations} flights, "
+                f"best RMS error {min(h[2] for h in self.history):.1f} m"
+            )
+            sys.stdout.flush()
+        return self._cache[key]
+
+    def rms_error(self, apogees):
+        return float(np.sqrt(np.mean((apogees - self.target) ** 2)))
+
+    def __call__(self, parameters):
+        return self.rms_error(self.apogees(self.controller(parameters)))
+
+
+def optimize_controller(config, config_sensor, dispersion, family="pid", target=3000, n_runs=16,
+                        seed=0, sampling="sobol", budget=80, tolerance=1.0, workers=None,
+                        initial=None):
+    """Tunes an air brakes controller to hit ``target`` over a dispersion set.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``; its ``Airbrakes`` section
+        configures the brakes.
+    config_sensor : dict
+        Parsed contents of ``sensors.json``.
+    dispersion : dict
+        Parsed contents of ``dispersion.json``.
+    family : str, optional
+        Key of ``FAMILIES``. Default is ``"pid"``.
+    target : float, optional
+        Target apogee above ground level (m). Default is 3000.
+    n_runs : int, optional
+        Size of the dispersion set every candidate flies.
+    seed : int, optional
+        Seed of the dispersion set, see ``monte_carlo.campaign_runs``.
+    sampling : str, optional
+        Sampling of the dispersion set, one of ``sampling.SAMPLING_METHODS``.
+    budget : int, optional
+        Maximum number of candidates flown.
+    tolerance : float, optional
+        Nelder-Mead stops once the RMS errors of its simplex are within this
+        many metres.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    initial : controller, optional
+        Starting controller, ``FAMILIES[family].initial`` by default.
+
+    Returns
+    -------
+    best : controller
+        The controller with the lowest RMS apogee error.
+    objective : ControllerObjective
+        Every candidate flown, with the apogees of each run.
+    """
+    family = FAMILIES[family]
+    jobs = campaign_runs(config, dispersion, n_runs, seed, sampling)
+    runs = [(run_seed, overrides) for _, run_seed, overrides, _ in jobs]
+
+    if initial is None:
+        # Burnout time of the nominal motor, used to place the schedule knots
+        _, motor, _, _, _, _, _ = load_flight_from_config(
+            config, config_sensor, overrides={"flight.terminate_on_apogee": True}
+        )
+        initial = family.initial(motor.burn_out_time, target)
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=init_worker,
+        initargs=(config, config_sensor),
+    ) as executor:
+        objective = ControllerObjective(
+            executor, family, runs, target, getattr(initial, "knots", None)
+        )
+        x0 = initial.parameters
+        objective(x0)
+        # Simplex edges a tenth of each bound wide, stepping inwards at the
+        # bounds; the default 5 % of x0 collapses on parameters starting at 0
+        low, high = np.array(initial.bounds).T
+        steps = np.where(x0 + 0.1 * (high - low) <= high, 0.1, -0.1) * (high - low)
+        simplex = np.vstack([x0, x0 + np.diag(steps)])
+        minimize(
+            objective,
+            x0,
+            method="Nelder-Mead",
+            bounds=initial.bounds,
+            options={
+                "maxfev": budget - 1,
+                "fatol": tolerance,
+                "xatol": 1e-4,
+                "initial_simplex": simplex,
+            },
+        )
+    print()
+
+    best = min(objective.history, key=lambda h: h[2])[0]
+    return best, objective
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--dispersion", default="dispersion.json")
+    parser.add_argument("--family", choices=sorted(FAMILIES), default="pid")
+    parser.add_argument("--target", type=float, default=3000)
+    parser.add_argument("--runs", type=int, default=16, help="Size of the dispersion set.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sampling", choices=SAMPLING_METHODS, default="sobol")
+    parser.add_argument("--budget", type=int, default=80, help="Maximum candidates flown.")
+    parser.add_argument("--tolerance", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the best controller.")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    with open(args.sensors, "r") as f:
+        config_sensor = json.load(f)
+    with open(args.dispersion, "r") as f:
+        dispersion = json.load(f)
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+    best, objective = optimize_controller(
+        config, config_sensor, dispersion, args.family, args.target, args.runs, args.seed,
+        args.sampling, args.budget, args.tolerance, args.workers,
+    )
+    initial, initial_apogees, initial_error = objective.history[0]
+    _, apogees, error = min(objective.history, key=lambda h: h[2])
+
+    print(f"Flights simulated: {objective.simulations} ({len(objective.history)} candidates)")
+    for label, controller, values, rms in (
+        ("Initial", initial, initial_apogees, initial_error),
+        ("Best", best, apogees, error),
+    ):
+        print(f"{label}: {controller.to_dict()}")
+        print(
+            f"  apogee {values.mean():.1f} m mean, {values.std():.1f} m std, "
+            f"{rms:.1f} m RMS error against {args.target:.0f} m"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({**best.to_dict(), "rms_error": error, "runs": args.runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Apogee prediction for the air brakes controller.
+
+The controller runs at the air brakes ``sampling_rate`` and needs the apogee
+the rocket would reach if the brakes held their current deployment, at a
+fixed cost per call. ``ApogeePredictor.predict`` gives a closed-form
+estimate from the coasting rocket's state. ``ApogeePredictor.build_table``
+integrates the coast numerically ahead of the flight over a grid of
+altitudes, vertical speeds and deployment levels into an ``ApogeeTable``,
+looked up trilinearly in flight.
+
+Both work on the coast after burnout: the burnout mass, the power-off drag
+curve of the rocket plus the air brakes drag table, and the launch site's
+density and speed of sound profiles. Altitudes are above ground level and
+speeds are airspeeds.
+
+Closed form
+-----------
+With drag factor ``k = rho * cd * area / (2 * mass)`` and vertical flight,
+``dvz/dt = -g - k * vz**2`` integrates to the height gained before ``vz``
+reaches zero::
+
+    gain = log(1 + k * vz**2 / g) / (2 * k)
+
+This is the terminal-velocity estimate of ``ORBrakeSimulationListener.
+predApogee`` (``vt**2 = g / k``), improved with:
+
+- the density at mid-climb rather than at sea level, by one fixed-point
+  iteration on ``gain``;
+- the drag coefficient at the current Mach number, brakes included;
+- the horizontal airspeed ``vh``, which adds drag through
+  ``|v| = sqrt(vz**2 + vh**2)``. It scales ``k`` by ``|v| / vz`` taken at
+  ``vz / sqrt(2)``, where half of the vertical kinetic energy is left.
+
+Usage
+-----
+    predictor = ApogeePredictor(env, rocket, load_drag_table(path + cd_curve))
+    predictor.predict(altitude_AGL, vz, horizontal_airspeed, deployment_level)
+
+    table = predictor.build_table(horizontal_speed=35)
+    table.predict(altitude_AGL, vz, deployment_level)
+
+``benchmark_apogee_predictor.py`` measures both against full flights.
+"""
+import math
+
+import numpy as np
+
+from resampling import bracket, brackets, uniform_step
+
+# Grid of ApogeePredictor.build_table unless given: AGL altitudes (m),
+# vertical speeds (m/s) and deployment levels
+TABLE_ALTITUDES = np.arange(0, 5001, 100.0)
+TABLE_VERTICAL_SPEEDS = np.arange(0, 401, 5.0)
+TABLE_DEPLOYMENT_LEVELS = np.linspace(0, 1, 6)
+
+
+class _Profile:
+    """Piecewise linear function sampled on a uniform grid, for scalar calls."""
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self._x = self.x.tolist()
+        self._y = self.y.tolist()
+        self._step = uniform_step(self.x)
+
+    def __call__(self, x):
+        i, w = bracket(self._x, self._step, x)
+        return self._y[i] + w * (self._y[i + 1] - self._y[i])
+
+    def array(self, x):
+        return np.interp(x, self.x, self.y)
+
+
+class ApogeePredictor:
+    """Apogee of a coasting rocket from its current state.
+
+    Attributes
+    ----------
+    ApogeePredictor.mass : float
+        Coasting (burnout) mass (kg).
+    ApogeePredictor.reference_area : float
+        Reference area of the rocket drag coefficient (m^2).
+    ApogeePredictor.brakes_area : float
+        Reference area of the air brakes drag coefficient (m^2).
+    ApogeePredictor.gravity : float
+        Gravity at the launch site (m/s^2).
+    ApogeePredictor.drag_table : DragTable or None
+        Air brakes drag coefficient table, None without air brakes.
+    """
+
+    def __init__(
+        self,
+        env,
+        rocket,
+        drag_table=None,
+        mass=None,
+        brakes_area=None,
+        ceiling=10000,
+        resolution=10,
+    ):
+        self.mass = float(rocket.total_mass(rocket.motor.burn_out_time) if mass is None else mass)
+        self.reference_area = float(rocket.area)
+        self.brakes_area = float(rocket.area if brakes_area is None else brakes_area)
+        self.gravity = float(env.gravity(env.elevation))
+        self.drag_table = drag_table
+
+        heights = np.arange(0, ceiling + resolution, resolution, dtype=float)
+        self._density = _Profile(heights, env.density.get_value(heights + env.elevation))
+        self._speed_of_sound = _Profile(
+            heights, env.speed_of_sound.get_value(heights + env.elevation)
+        )
+        machs = np.arange(0, 3.001, 0.01)
+        self._cd = _Profile(machs, rocket.power_off_drag.get_value(machs))
+
+    def _drag_area(self, deployment_level, mach):
+        """``cd * area`` of the rocket and brakes, divided by ``2 * mass``."""
+        drag = self.reference_area * self._cd(mach)
+        if self.drag_table is not None and deployment_level > 0:
+            drag += self.brakes_area * self.drag_table.drag_coefficient(deployment_level, mach)
+        return drag / (2 * self.mass)
+
+    def predict(self, altitude, vertical_speed, horizontal_speed=0.0, deployment_level=0.0):
+        """Closed-form apogee (m AGL) of one state, see the module docstring.
+
+        Parameters
+        ----------
+        altitude : float
+            Altitude above ground level (m).
+        vertical_speed : float
+            Vertical velocity (m/s); a descending rocket is at apogee.
+        horizontal_speed : float, optional
+            Horizontal airspeed (m/s).
+        deployment_level : float, optional
+            Air brakes deployment, held until apogee.
+        """
+        if vertical_speed <= 0:
+            return altitude
+        vz2 = vertical_speed * vertical_speed
+        speed = math.sqrt(vz2 + horizontal_speed * horizontal_speed)
+        k = self._drag_area(deployment_level, speed / self._speed_of_sound(altitude))
+        k *= math.sqrt(1 + 2 * horizontal_speed * horizontal_speed / vz2)
+
+        g = self.gravity
+        rho_k = k * self._density(altitude)
+        gain = math.log1p(rho_k * vz2 / g) / (2 * rho_k)
+        rho_k = k * self._density(altitude + gain / 2)
+        return altitude + math.log1p(rho_k * vz2 / g) / (2 * rho_k)
+
+    def coast(
+        self, altitude, vertical_speed, horizontal_speed=0.0, deployment_level=0.0, dt=0.02
+    ):
+        """Apogees (m AGL) of arrays of states by integrating the coast.
+
+        Integrates the two-dimensional point-mass coast with the density,
+        speed of sound and drag coefficient of every step (midpoint rule),
+        for broadcast arrays of states at once.
+        """
+        states = np.broadcast_arrays(altitude, vertical_speed, horizontal_speed, deployment_level)
+        shape = states[0].shape
+        z, vz, vh, level = (np.array(x, dtype=float).ravel() for x in states)
+        apogee = np.where(vz > 0, np.nan, z)
+        active = np.flatnonzero(vz > 0)
+        z, vz, vh, level = z[active], vz[active], vh[active], level[active]
+
+        def acceleration(z, vz, vh):
+            speed = np.sqrt(vz * vz + vh * vh)
+            mach = speed / self._speed_of_sound.array(z)
+            drag = self.reference_area * self._cd.array(mach)
+            if self.drag_table is not None:
+                drag = drag + self.brakes_area * self.drag_table(level, mach)
+            k = drag * self._density.array(z) / (2 * self.mass) * speed
+            return -self.gravity - k * vz, -k * vh
+
+        while len(active):
+            az, ah = acceleration(z, vz, vh)
+            az, ah = acceleration(z + vz * dt / 2, vz + az * dt / 2, vh + ah * dt / 2)
+            next_vz = vz + az * dt
+            # Apogee within this step: stop where vz reaches zero
+            done = next_vz <= 0
+            tau = vz[done] / -az[done]
+            apogee[active[done]] = z[done] + vz[done] * tau / 2
+
+            keep = ~done
+            z = z[keep] + (vz[keep] + next_vz[keep]) * dt / 2
+            vz, vh = next_vz[keep], vh[keep] + ah[keep] * dt
+            level, active = level[keep], active[keep]
+        return apogee.reshape(shape)
+
+    def build_table(
+        self,
+        altitudes=TABLE_ALTITUDES,
+        vertical_speeds=TABLE_VERTICAL_SPEEDS,
+        deployment_levels=TABLE_DEPLOYMENT_LEVELS,
+        horizontal_speed=0.0,
+        dt=0.02,
+    ):
+        """``ApogeeTable`` of ``coast`` apogees over a regular grid.
+
+        The horizontal airspeed is not an axis of the table; it is held at
+        ``horizontal_speed``, typically that of a nominal flight at burnout.
+        """
+        if self.drag_table is None:
+            deployment_levels = [0.0, 1.0]
+        grid = np.meshgrid(altitudes, vertical_speeds, deployment_levels, indexing="ij")
+        apogee = self.coast(grid[0], grid[1], horizontal_speed, grid[2], dt)
+        return ApogeeTable(altitudes, vertical_speeds, deployment_levels, apogee - grid[0])
+
+
+class ApogeeTable:
+    """Trilinear table of the height still to gain before apogee.
+
+    Attributes
+    ----------
+    ApogeeTable.altitudes, ApogeeTable.vertical_speeds, ApogeeTable.deployment_levels : numpy.ndarray
+        Increasing axes of the grid.
+    ApogeeTable.gain : numpy.ndarray
+        Apogee minus altitude (m) at every node, shape
+        ``(len(altitudes), len(vertical_speeds), len(deployment_levels))``.
+    """
+
+    def __init__(self, altitudes, vertical_speeds, deployment_levels, gain):
+        self.altitudes = np.asarray(altitudes, dtype=float)
+        self.vertical_speeds = np.asarray(vertical_speeds, dtype=float)
+        self.deployment_levels = np.asarray(deployment_levels, dtype=float)
+        self.gain = np.asarray(gain, dtype=float)
+        axes = (self.altitudes, self.vertical_speeds, self.deployment_levels)
+        self._axes = [axis.tolist() for axis in axes]
+        self._steps = [uniform_step(axis) for axis in axes]
+        self._gain = self.gain.tolist()
+
+    def predict(self, altitude, vertical_speed, deployment_level=0.0):
+        """Apogee (m AGL) of one state, from floats."""
+        if vertical_speed <= 0:
+            return altitude
+        (altitudes, speeds, levels), (s0, s1, s2) = self._axes, self._steps
+        i, u = bracket(altitudes, s0, altitude)
+        j, v = bracket(speeds, s1, vertical_speed)
+        k, w = bracket(levels, s2, deployment_level)
+        g = self._gain
+        a0, a1 = g[i][j], g[i][j + 1]
+        b0, b1 = g[i + 1][j], g[i + 1][j + 1]
+        lower = (1 - u) * ((1 - v) * a0[k] + v * a1[k]) + u * ((1 - v) * b0[k] + v * b1[k])
+        upper = (1 - u) * ((1 - v) * a0[k + 1] + v * a1[k + 1]) + u * (
+            (1 - v) * b0[k + 1] + v * b1[k + 1]
+        )
+        return altitude + (1 - w) * lower + w * upper
+
+    def __call__(self, altitude, vertical_speed, deployment_level=0.0):
+        """Apogees (m AGL) of broadcast arrays of states."""
+        altitude, vertical_speed, deployment_level = np.broadcast_arrays(
+            np.asarray(altitude, dtype=float),
+            np.asarray(vertical_speed, dtype=float),
+            np.asarray(deployment_level, dtype=float),
+        )
+        i, u = brackets(self.altitudes, self._steps[0], altitude)
+        j, v = brackets(self.vertical_speeds, self._steps[1], vertical_speed)
+        k, w = brackets(self.deployment_levels, self._steps[2], deployment_level)
+        gain = 0.0
+        for di, wi in ((0, 1 - u), (1, u)):
+            for dj, wj in ((0, 1 - v), (1, v)):
+                for dk, wk in ((0, 1 - w), (1, w)):
+                    gain = gain + wi * wj * wk * self.gain[i + di, j + dj, k + dk]
+        return np.where(vertical_speed > 0, altitude + gain, altitude)
@@ -0,0 +1,224 @@
+"""Root-finding search for the configuration value that hits a target apogee.
+
+Instead of brute forcing a fine grid of flights (``mass_apogee_data.csv``
+took 417 of them), Brent's method is applied to ``apogee(value) - target``
+for any scalar entry of ``rocket.json``. Every flight is memoized, so the
+tolerance bands of ``plot_mass_vs_apogee`` (±2% and ±4%) start from the
+tightest bracket already known and usually cost only a few extra flights.
+Flights are stopped at apogee since nothing after it matters here.
+
+Usage
+-----
+    python apogee_targeting.py --parameter rocket.mass --target 3000
+    python apogee_targeting.py --parameter flight.inclination --bracket 80 88
+"""
+import argparse
+import bisect
+import json
+import warnings
+
+from scipy.optimize import brentq
+
+from load_flight_from_json import apply_overrides, load_flight_from_config
+
+# Same thresholds plot_mass_vs_apogee draws
+BANDS = {"target": 1.0, "+2%": 1.02, "-2%": 0.98, "+4%": 1.04, "-4%": 0.96}
+
+# Half-width of the default bracket around a zero nominal (e.g. flight.heading),
+# in the units of the parameter
+MIN_HALF_WIDTH = 1.0
+
+
+class _Converged(Exception):
+    """Raised to stop brentq once a flight is already within tolerance."""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+
+
+class ApogeeFunction:
+    """Memoized ``value -> apogee`` map of one configuration entry.
+
+    Attributes
+    ----------
+    ApogeeFunction.parameter : str
+        Dotted path of the configuration entry, e.g. ``"rocket.mass"``.
+    ApogeeFunction.simulations : int
+        Number of flights simulated so far.
+    ApogeeFunction.values : list
+        Sorted parameter values simulated so far.
+    ApogeeFunction.apogees : list
+        Apogees above ground level (m) matching ``values``.
+    """
+
+    def __init__(self, config, config_sensor, parameter):
+        # Only the apogee is needed, so every flight stops there
+        self.config = apply_overrides(config)
+        self.config["flight"]["terminate_on_apogee"] = True
+        self.config_sensor = config_sensor
+        self.parameter = parameter
+        self.simulations = 0
+        self.values = []
+        self.apogees = []
+
+    def __call__(self, value):
+        value = float(value)
+        index = bisect.bisect_left(self.values, value)
+        if index < len(self.values) and self.values[index] == value:
+            return self.apogees[index]
+
+        env, _, _, flight, _, _, _ = load_flight_from_config(
+            self.config, self.config_sensor, overrides={self.parameter: value}
+        )
+        apogee = float(flight.apogee - env.elevation)
+        self.simulations += 1
+        self.values.insert(index, value)
+        self.apogees.insert(index, apogee)
+        return apogee
+
+    def known_bracket(self, target):
+        """Closest simulated pair of values whose apogees enclose ``target``."""
+        best = None
+        for (x0, a0), (x1, a1) in zip(
+            zip(self.values, self.apogees), zip(self.values[1:], self.apogees[1:])
+        ):
+            if (a0 - target) * (a1 - target) <= 0 and (best is None or x1 - x0 < best[1] - best[0]):
+                best = (x0, x1)
+        return best
+
+
+def _expand_bracket(function, target, low, high, max_expansions):
+    """Widens ``[low, high]`` geometrically until it encloses ``target``."""
+    low, high = min(low, high), max(low, high)
+    for _ in range(max_expansions):
+        f_low, f_high = function(low) - target, function(high) - target
+        if f_low * f_high <= 0:
+            return low, high
+        # A degenerate bracket would never widen
+        width = high - low or max(0.1 * abs(low), MIN_HALF_WIDTH)
+        # Move the end whose apogee is closer to the target outwards
+        if abs(f_low) < abs(f_high):
+            low -= width
+        else:
+            high += width
+    raise ValueError(
+        f"Could not bracket an apogee of {target:.1f} m with '{function.parameter}' "
+        f"in [{low}, {high}]."
+    )
+
+
+def solve_for_apogee(function, target, bracket, xtol=1e-4, apogee_tolerance=0.5,
+                     max_expansions=8):
+    """Parameter value whose flight reaches ``target`` apogee.
+
+    Parameters
+    ----------
+    function : ApogeeFunction
+        Memoized apogee of the parameter being solved for.
+    target : float
+        Target apogee above ground level (m).
+    bracket : tuple
+        Initial ``(low, high)`` guess, widened if it does not enclose target.
+    xtol : float, optional
+        Absolute tolerance on the parameter value.
+    apogee_tolerance : float, optional
+        Stop as soon as a flight is this close to target (m).
+    max_expansions : int, optional
+        Maximum number of bracket widenings.
+
+    Returns
+    -------
+    float
+        Parameter value that hits the target apogee.
+    """
+    known = function.known_bracket(target)
+    low, high = known if known else _expand_bracket(function, target, *bracket, max_expansions)
+
+    def residual(value):
+        difference = function(value) - target
+        if abs(difference) <= apogee_tolerance:
+            raise _Converged(value)
+        return difference
+
+    try:
+        return brentq(residual, low, high, xtol=xtol)
+    except _Converged as converged:
+        return converged.value
+
+
+def target_apogee_bands(config, config_sensor, parameter, target=3000, bracket=None,
+                        bands=None, xtol=1e-4, apogee_tolerance=0.5):
+    """Parameter values for the target apogee and each tolerance band.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``.
+    config_sensor : dict
+        Parsed contents of ``sensors.json``.
+    parameter : str
+        Dotted path of the scalar configuration entry to solve for.
+    target : float, optional
+        Target apogee above ground level (m). Default is 3000.
+    bracket : tuple, optional
+        Initial ``(low, high)`` search interval. Defaults to ±10% of the
+        value currently in ``config``, or ±``MIN_HALF_WIDTH`` when that
+        value is zero or within round-off of it.
+    bands : dict, optional
+        Maps labels to multiples of ``target``. Defaults to ``BANDS``.
+    xtol, apogee_tolerance : float, optional
+        See ``solve_for_apogee``.
+
+    Returns
+    -------
+    results : dict
+        Maps each band label to the parameter value that reaches it.
+    function : ApogeeFunction
+        Every flight simulated, with ``function.simulations`` the total count.
+    """
+    function = ApogeeFunction(config, config_sensor, parameter)
+    if bracket is None:
+        node = config
+        for key in parameter.split("."):
+            node = node[int(key) if isinstance(node, list) else key]
+        half_width = 0.1 * abs(node)
+        if half_width < 1e-9:
+            half_width = MIN_HALF_WIDTH
+        bracket = (node - half_width, node + half_width)
+
+    results = {}
+    for label, factor in (bands or BANDS).items():
+        results[label] = solve_for_apogee(
+            function, target * factor, bracket, xtol, apogee_tolerance
+        )
+    return results, function
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--parameter", default="rocket.mass")
+    parser.add_argument("--target", type=float, default=3000)
+    parser.add_argument("--bracket", type=float, nargs=2, default=None)
+    parser.add_argument("--xtol", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    with open(args.sensors, "r") as f:
+        config_sensor = json.load(f)
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+    results, function = target_apogee_bands(
+        config, config_sensor, args.parameter, args.target, args.bracket, xtol=args.xtol
+    )
+
+    for label, factor in BANDS.items():
+        print(f"{label:>6} ({args.target * factor:8.1f} m): {args.parameter} = {results[label]:.4f}")
+    print(f"Simulations: {function.simulations}")
+
+
+if __name__ == "__main__":
+    main()
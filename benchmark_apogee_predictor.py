@@ -0,0 +1,149 @@
+"""Latency and accuracy of the apogee predictors against full flights.
+
+Simulates the configured flight with the air brakes held at a few fixed
+deployment levels from burnout to apogee, samples each coast at the air
+brakes ``sampling_rate`` and compares the apogee every predictor gives from
+those states with the apogee of the ``Flight`` itself:
+
+- ``ORBrake``: terminal-velocity formula of ``ORBrakeSimulationListener.
+  predApogee`` (sea-level density, no brakes);
+- ``closed form``: ``ApogeePredictor.predict``;
+- ``table``: ``ApogeeTable.predict``, built before the flights;
+- ``coast``: ``ApogeePredictor.coast``, the numerical integration the table
+  is built from.
+
+Usage
+-----
+    python benchmark_apogee_predictor.py --levels 0,0.5,1
+"""
+import argparse
+import json
+import math
+import time
+import timeit
+import warnings
+
+import numpy as np
+from rocketpy import Flight
+
+from air_brakes_drag import load_drag_table
+from apogee_predictor import ApogeePredictor
+from load_flight_from_json import apply_overrides, load_flight_from_config
+
+
+def terminal_velocity_apogee(predictor, cd, altitude, vertical_speed):
+    """``ORBrakeSimulationListener.predApogee``: sea-level density, one drag coefficient."""
+    g = predictor.gravity
+    vt2 = 2 * predictor.mass * g / (cd * predictor.reference_area * 1.225)
+    return altitude + vt2 / (2 * g) * math.log((vertical_speed**2 + vt2) / vt2)
+
+
+def _held_deployment(held, burn_out_time):
+    """Controller keeping the brakes at ``held["level"]`` after burnout."""
+
+    def controller(time, sampling_rate, state, state_history, observed_variables, air_brakes):
+        air_brakes.deployment_level = held["level"] if time >= burn_out_time else 0
+
+    return controller
+
+
+def coast_states(flight, rate):
+    """AGL altitude, vertical speed and horizontal airspeed sampled at ``rate``
+    from burnout to apogee."""
+    env = flight.env
+    solution = np.asarray(flight.solution)
+    t = np.arange(flight.rocket.motor.burn_out_time, flight.apogee_time, 1 / rate)
+    x, y, z, vx, vy, vz = (np.interp(t, solution[:, 0], solution[:, i]) for i in range(1, 7))
+    horizontal = np.hypot(
+        vx - env.wind_velocity_x.get_value(z), vy - env.wind_velocity_y.get_value(z)
+    )
+    return t, z - env.elevation, vz, horizontal
+
+
+def latency(function, number=20000):
+    """Best time per call (s) of ``function()``."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument(
+        "--levels",
+        type=lambda text: [float(v) for v in text.split(",")],
+        default=[0.0, 0.5, 1.0],
+        help="Air brakes deployment levels held during the coast.",
+    )
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    with open(args.config) as f:
+        config = apply_overrides(json.load(f), {"flight.terminate_on_apogee": True})
+    with open(args.sensors) as f:
+        config_sensor = json.load(f)
+    brakes = config["rocket"]["Airbrakes"]
+    drag_table = load_drag_table(config["path"] + brakes["drag_coefficient_curve"])
+    rate = brakes["sampling_rate"]
+
+    env, motor, rocket, nominal, *_ = load_flight_from_config(config, config_sensor)
+    predictor = ApogeePredictor(env, rocket, drag_table)
+
+    # The table holds the horizontal airspeed of the nominal flight at burnout
+    _, _, _, horizontal = coast_states(nominal, rate)
+    start = time.perf_counter()
+    table = predictor.build_table(horizontal_speed=horizontal[0])
+    print(f"Table: {table.gain.shape} nodes built in {time.perf_counter() - start:.1f} s")
+
+    print(f"\nPer-call latency (controller at {rate} Hz):")
+    for name, function, number in (
+        ("ORBrake", lambda: terminal_velocity_apogee(predictor, 0.4, 2000.0, 150.0), 20000),
+        ("closed form", lambda: predictor.predict(2000.0, 150.0, 35.0, 0.5), 20000),
+        ("table", lambda: table.predict(2000.0, 150.0, 0.5), 20000),
+        ("coast", lambda: predictor.coast(2000.0, 150.0, 35.0, 0.5), 20),
+    ):
+        print(f"  {name:<12} {1e6 * latency(function, number):10.2f} us")
+
+    held = {"level": 0.0}
+    rocket.add_air_brakes(
+        drag_coefficient_curve=drag_table.drag_coefficient,
+        controller_function=_held_deployment(held, motor.burn_out_time),
+        sampling_rate=rate,
+        reference_area=brakes["reference_area"],
+        clamp=True,
+        name="Air Brakes",
+    )
+
+    print("\nApogee error against Flight, RMS / max (m):")
+    names = ["ORBrake", "closed form", "table", "coast"]
+    print(f"{'level':>6} {'apogee':>8} {'states':>7}  " + " ".join(f"{n:>15}" for n in names))
+    for level in args.levels:
+        held["level"] = level
+        flight = Flight(
+            rocket=rocket,
+            environment=env,
+            rail_length=config["flight"]["rail_length"],
+            inclination=config["flight"]["inclination"],
+            heading=config["flight"]["heading"],
+            terminate_on_apogee=True,
+        )
+        apogee = flight.apogee - env.elevation
+        _, z, vz, vh = coast_states(flight, rate)
+        mach = np.hypot(vz, vh) / env.speed_of_sound.get_value(z + env.elevation)
+        cd = rocket.power_off_drag.get_value(mach)
+
+        predictions = {
+            "ORBrake": [terminal_velocity_apogee(predictor, *state) for state in zip(cd, z, vz)],
+            "closed form": [predictor.predict(*state, level) for state in zip(z, vz, vh)],
+            "table": [table.predict(*state, level) for state in zip(z, vz)],
+            "coast": predictor.coast(z, vz, vh, level),
+        }
+        columns = []
+        for prediction in (predictions[name] for name in names):
+            error = np.asarray(prediction) - apogee
+            columns.append(f"{np.sqrt(np.mean(error**2)):7.1f} / {np.max(np.abs(error)):5.1f}")
+        print(f"{level:6.2f} {apogee:8.1f} {len(z):7d}  " + " ".join(f"{c:>15}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Before/after timing of the power series sampled by ``energy_data``.
+
+Compares evaluating ``flight.thrust_power`` and ``flight.drag_power`` once
+per solution time step, as ``_MyFlightPlots.energy_data`` used to, with a
+single array evaluation over the whole time vector, and times the complete
+energy figure with the Agg backend.
+
+Usage
+-----
+    python benchmark_energy_data.py --repeat 20
+"""
+import argparse
+import tempfile
+import timeit
+import warnings
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from load_flight_from_json import load_flight_from_json
+from my_flight_plots import _MyFlightPlots
+
+
+def per_sample(flight):
+    t = flight.time
+    return (
+        np.array([flight.thrust_power(ti) for ti in t]),
+        np.array([flight.drag_power(ti) for ti in t]),
+    )
+
+
+def vectorized(flight):
+    t = flight.time
+    return flight.thrust_power.get_value(t), flight.drag_power.get_value(t)
+
+
+def best_of(function, repeat):
+    """Fastest of ``repeat`` calls, in seconds."""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    plt.switch_backend("Agg")
+    _, motor, _, flight, _, _, _ = load_flight_from_json(args.config, args.sensors)
+
+    # Both versions must agree, this also builds the cached power Functions
+    for before, after in zip(per_sample(flight), vectorized(flight)):
+        np.testing.assert_allclose(after, before, rtol=1e-12, atol=1e-9)
+
+    loop = best_of(lambda: per_sample(flight), args.repeat)
+    array = best_of(lambda: vectorized(flight), args.repeat)
+    print(f"Samples: {len(flight.time)}")
+    print(f"Per-sample calls: {1e3 * loop:8.2f} ms")
+    print(f"Array evaluation: {1e3 * array:8.2f} ms  ({loop / array:.0f}x faster)")
+
+    # The figures are only timed, not kept
+    plots = _MyFlightPlots(flight, motor)
+    plots.headless = True
+    with tempfile.TemporaryDirectory() as output_dir:
+        plots.output_dir = output_dir
+        figure = best_of(plots.energy_data, max(1, args.repeat // 5))
+    print(f"Full energy_data figure: {1e3 * figure:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Memoized construction of the launch site Environment.
+
+Building an ``Environment`` with a Reanalysis atmosphere opens and
+interpolates the netCDF weather file, which is wasted work when thousands of
+sweep or dispersion flights share the same site, date and file. Environments
+are cached per process, keyed by the weather file contents and every site
+parameter that affects the atmosphere, with least-recently-used eviction.
+
+rocketpy Environments cannot be pickled, so pool workers share the cache by
+warming their own copy once in their initializer (see ``worker_pool.init_worker``)
+instead of receiving the object from the parent process.
+"""
+from collections import OrderedDict
+
+from rocketpy import Environment
+
+from hashing import file_hash
+from weather_subset import find_site_subset
+
+
+def environment_key(env_data):
+    """Cache key of the ``environment`` section of ``rocket.json``."""
+    model = env_data["atmospheric_model"]
+    file_location = model.get("file_location")
+    d = env_data["date"]
+    return (
+        model["type"],
+        file_hash(file_location) if file_location else None,
+        model.get("dictionary"),
+        env_data["latitude"],
+        env_data["longitude"],
+        env_data["elevation"],
+        (d["year"], d["month"], d["day"], d["hour"]),
+    )
+
+
+def build_environment(env_data):
+    """Builds a new Environment from the ``environment`` section of ``rocket.json``.
+
+    If a site subset of the weather file was extracted with
+    ``weather_subset.py`` it is read instead of the full regional file.
+    """
+    d = env_data["date"]
+    env = Environment(
+        date=(d["year"], d["month"], d["day"], d["hour"]),
+        latitude=env_data["latitude"],
+        longitude=env_data["longitude"],
+        elevation=env_data["elevation"],
+    )
+    env.set_elevation(env_data["elevation"])
+    env.set_atmospheric_model(
+        type=env_data["atmospheric_model"]["type"],
+        file=find_site_subset(env_data) or env_data["atmospheric_model"].get("file_location"),
+        dictionary=env_data["atmospheric_model"].get("dictionary"),
+    )
+    return env
+
+
+class EnvironmentCache:
+    """Least-recently-used cache of Environments.
+
+    Attributes
+    ----------
+    EnvironmentCache.maxsize : int
+        Maximum number of Environments kept alive.
+    EnvironmentCache.hits : int
+        Number of lookups served from the cache.
+    EnvironmentCache.misses : int
+        Number of lookups that had to build a new Environment.
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._environments = OrderedDict()
+
+    def __len__(self):
+        return len(self._environments)
+
+    def get(self, env_data):
+        """Returns the cached Environment for ``env_data``, building it if needed.
+
+        The returned object is shared by every caller with the same site, so
+        it must be treated as read-only.
+        """
+        key = environment_key(env_data)
+        if key in self._environments:
+            self.hits += 1
+            self._environments.move_to_end(key)
+            return self._environments[key]
+
+        self.misses += 1
+        env = build_environment(env_data)
+        self._environments[key] = env
+        if len(self._environments) > self.maxsize:
+            self._environments.popitem(last=False)
+        return env
+
+    def clear(self):
+        """Drops every cached Environment."""
+        self._environments.clear()
+
+
+# Cache used by load_flight_from_config, one per process
+default_cache = EnvironmentCache()
+
+
+def get_environment(env_data):
+    """Returns the Environment for ``env_data`` from the process-wide cache."""
+    return default_cache.get(env_data)
@@ -0,0 +1,136 @@
+"""IIR filter bank for sensor channels, offline or chunk by chunk.
+
+``FilterBank`` runs one IIR filter over any number of channels at once with
+``scipy.signal.lfilter``, so the gyro bias low-pass of ``main.py`` runs at
+array speed instead of one Python iteration per sample. The same object can
+be fed chunks of a live replay through ``update``; the filter state carries
+over between chunks and the output is identical to filtering the whole
+record in one go.
+
+Usage
+-----
+    bias_filter = FilterBank.first_order_lowpass(cutoff=0.1, dt=0.01, channels=3)
+    bias = bias_filter.apply(np.column_stack([bgx, bgy, bgz]))
+
+    # or, in a replay loop
+    for chunk in chunks:
+        bias = bias_filter.update(chunk)
+"""
+import numpy as np
+from scipy.signal import butter, lfilter, lfilter_zi
+
+
+class FilterBank:
+    """The same IIR filter ``b / a`` applied to every column of a signal.
+
+    Signals are arrays of shape ``(samples, channels)``. Filters start in
+    steady state at the first sample, i.e. the first output equals the first
+    input, which is the initial condition the first-order bias filter of
+    ``main.py`` used.
+
+    Attributes
+    ----------
+    FilterBank.b, FilterBank.a : numpy.ndarray
+        Numerator and denominator coefficients, normalized so ``a[0] == 1``.
+    FilterBank.channels : int
+        Number of channels filtered together.
+    FilterBank.state : numpy.ndarray or None
+        Delay line of shape ``(order, channels)`` between ``update`` calls,
+        None until the first chunk.
+    """
+
+    def __init__(self, b, a, channels=1):
+        b = np.atleast_1d(np.asarray(b, dtype=float))
+        a = np.atleast_1d(np.asarray(a, dtype=float))
+        if a[0] == 0:
+            raise ValueError("The leading denominator coefficient must be non-zero.")
+        self.b = b / a[0]
+        self.a = a / a[0]
+        self.channels = channels
+        self.state = None
+
+    @classmethod
+    def first_order_lowpass(cls, cutoff, dt, channels=1):
+        """Discrete RC low-pass ``y[k] = alpha x[k] + (1 - alpha) y[k-1]``.
+
+        Parameters
+        ----------
+        cutoff : float
+            Cutoff frequency (Hz).
+        dt : float
+            Sampling period (s).
+        channels : int, optional
+            Number of channels filtered together.
+        """
+        tau = 1 / (2 * np.pi * cutoff)
+        alpha = dt / (tau + dt)
+        return cls([alpha], [1, alpha - 1], channels)
+
+    @classmethod
+    def butterworth(cls, order, cutoff, dt, btype="lowpass", channels=1):
+        """Butterworth filter, see ``scipy.signal.butter``.
+
+        ``cutoff`` is in Hz, a pair of frequencies for band filters.
+        """
+        b, a = butter(order, cutoff, btype=btype, fs=1 / dt)
+        return cls(b, a, channels)
+
+    def _as_channels(self, signal):
+        signal = np.asarray(signal, dtype=float)
+        if signal.ndim == 1 and self.channels == 1:
+            signal = signal[:, None]
+        if signal.ndim != 2 or signal.shape[1] != self.channels:
+            raise ValueError(
+                f"Expected a signal of shape (samples, {self.channels}), got {signal.shape}."
+            )
+        return signal
+
+    def _steady_state(self, first_sample):
+        """Delay line of a filter that has seen ``first_sample`` forever."""
+        return np.outer(lfilter_zi(self.b, self.a), first_sample)
+
+    def apply(self, signal):
+        """Filters a whole record at once, leaving the streaming state alone.
+
+        Parameters
+        ----------
+        signal : array_like
+            Shape ``(samples, channels)``, or ``(samples,)`` for a single
+            channel bank.
+
+        Returns
+        -------
+        numpy.ndarray
+            Filtered signal, same shape as ``signal``.
+        """
+        shape = np.shape(signal)
+        signal = self._as_channels(signal)
+        if len(signal) == 0:
+            return signal.reshape(shape)
+        output, _ = lfilter(self.b, self.a, signal, axis=0, zi=self._steady_state(signal[0]))
+        return output.reshape(shape)
+
+    def update(self, chunk):
+        """Filters the next chunk of a stream, carrying the state over.
+
+        The first chunk initializes the filter in steady state at its first
+        sample, like ``apply``. Chunks may have any length, including one
+        sample.
+
+        Returns
+        -------
+        numpy.ndarray
+            Filtered chunk, same shape as ``chunk``.
+        """
+        shape = np.shape(chunk)
+        chunk = self._as_channels(chunk)
+        if len(chunk) == 0:
+            return chunk.reshape(shape)
+        if self.state is None:
+            self.state = self._steady_state(chunk[0])
+        output, self.state = lfilter(self.b, self.a, chunk, axis=0, zi=self.state)
+        return output.reshape(shape)
+
+    def reset(self):
+        """Forgets the streaming state, the next chunk starts a new stream."""
+        self.state = None
@@ -0,0 +1,23 @@
+"""Content hashes of input files, used to invalidate derived caches.
+
+Kept free of heavy imports so that pure-NumPy modules (``air_brakes_drag``)
+can key their caches on a file without loading the weather stack.
+"""
+import hashlib
+import os
+
+# (path, size, mtime) -> sha1 of the file, so files are only hashed once
+_file_hashes = {}
+
+
+def file_hash(file_path):
+    """SHA-1 of the file contents, memoized on its size and modification time."""
+    stat = os.stat(file_path)
+    stamp = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if stamp not in _file_hashes:
+        digest = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _file_hashes[stamp] = digest.hexdigest()
+    return _file_hashes[stamp]
@@ -1,9 +1,12 @@
+import copy
 import json
 import datetime
 import warnings
 import numpy as np
-from rocketpy import Environment, SolidMotor, Rocket, Flight
+from rocketpy import SolidMotor, Rocket, Flight
 from rocketpy import Accelerometer, Barometer, GnssReceiver, Gyroscope
+from air_brakes_drag import load_drag_table
+from environment_cache import build_environment, get_environment
 
 def load_flight_from_json(config_path, sensor_path: str):
 
@@ -13,28 +16,51 @@ def load_flight_from_json(config_path, sensor_path: str):
 
     with open(sensor_path, "r") as f:
         config_sensor  =  json.load(f)
-    
-    path  =  config["path"]
 
-    # --- Environment ---
-    env_data  =  config["environment"]
+    return load_flight_from_config(config, config_sensor)
 
-    env  =  Environment(
-        date=(2023, 10, 14, 14),
-        latitude = env_data["latitude"],
-        longitude = env_data["longitude"],
-        elevation = env_data["elevation"],
-    )
 
-    # Parse date
-    d = env_data["date"]
-    env.set_date((d["year"], d["month"], d["day"], d["hour"]))
-    env.set_elevation(env_data["elevation"])
-    env.set_atmospheric_model(type = env_data["atmospheric_model"]["type"],
-                                file = env_data["atmospheric_model"]["file_location"],
-                                dictionary = env_data["atmospheric_model"]["dictionary"])
-    
-    # --- Motor ---
+def apply_overrides(config: dict, overrides: dict = None) -> dict:
+    """Returns a copy of ``config`` with dotted-path overrides applied.
+
+    The result never shares mutable state with ``config``, so any number of
+    variants can be built from one parsed base configuration.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed configuration, e.g. the contents of ``rocket.json``.
+    overrides : dict, optional
+        Maps dotted paths to new values, e.g.
+        ``{"rocket.mass": 19.2, "flight.inclination": 85}``. Integer keys
+        index into lists, as in ``"rocket.inertia.2"``.
+
+    Returns
+    -------
+    dict
+        The overridden copy of ``config``.
+    """
+    config = copy.deepcopy(config)
+
+    for dotted_path, value in (overrides or {}).items():
+        keys = dotted_path.split(".")
+        node = config
+        try:
+            for key in keys[:-1]:
+                node = node[int(key) if isinstance(node, list) else key]
+            last = int(keys[-1]) if isinstance(node, list) else keys[-1]
+            node[last]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise KeyError(f"Unknown configuration entry '{dotted_path}'.") from None
+        node[last] = value
+
+    return config
+
+
+def build_motor(config: dict) -> SolidMotor:
+    """Builds the ``SolidMotor`` of the ``motor`` section of a parsed ``rocket.json``."""
+    path  =  config["path"]
+
     motor_data  =  config["motor"]
     motor  =  SolidMotor(
         thrust_source = path + motor_data["thrust_source"],
@@ -55,7 +81,17 @@ def load_flight_from_json(config_path, sensor_path: str):
         coordinate_system_orientation = motor_data["coordinate_system_orientation"],
     )
 
-    # --- Rocket ---
+    return motor
+
+
+def build_rocket(config: dict, motor: SolidMotor) -> Rocket:
+    """Builds the ``Rocket`` of a parsed ``rocket.json`` with ``motor`` added.
+
+    Only the airframe: rail buttons, nose cone, fins and tail. Sensors, air
+    brakes and parachutes are left to ``load_flight_from_config``, and no
+    Environment is needed, so aerodynamic studies (``static_stability``)
+    can build rockets on their own.
+    """
     rocket_data  =  config["rocket"]
 
     rocket  =  Rocket(
@@ -105,6 +141,68 @@ def load_flight_from_json(config_path, sensor_path: str):
         position = tail["position"],
     )
 
+    return rocket
+
+
+def load_flight_from_config(config: dict, config_sensor: dict, overrides: dict = None,
+                            sensor_overrides: dict = None, cache_environment: bool = True,
+                            air_brakes_controller=None, simulate: bool = True):
+    """Builds the simulation objects from already parsed configurations.
+
+    Same as ``load_flight_from_json`` but without touching the disk for the
+    configuration itself, so batch drivers can parse ``rocket.json`` and
+    ``sensors.json`` once and build as many flights as they need. The
+    dictionaries passed in are never modified.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``.
+    config_sensor : dict
+        Parsed contents of ``sensors.json``.
+    overrides : dict, optional
+        Dotted-path overrides applied to ``config``, see ``apply_overrides``.
+    sensor_overrides : dict, optional
+        Dotted-path overrides applied to ``config_sensor``, e.g.
+        ``{"GPS.position_accuracy": 5}``.
+    cache_environment : bool, optional
+        If True (default) the Environment comes from the process-wide cache
+        in ``environment_cache`` and is shared with every other flight at the
+        same site and date. Set to False to get a private Environment.
+    air_brakes_controller : callable, optional
+        Adds the air brakes of the ``Airbrakes`` section when given. It is
+        called as ``air_brakes_controller(env, rocket, drag_table)``, with
+        the compiled ``air_brakes_drag.DragTable``, and returns the rocketpy
+        controller function of the brakes.
+    simulate : bool, optional
+        If False the flight is not simulated and ``flight`` is None, for
+        drivers that only need the rocketpy objects (e.g. ``point_mass``).
+
+    Returns
+    -------
+    tuple
+        ``(env, motor, rocket, flight, [accel, imu_acc, imu_gyro], baro, gps)``
+    """
+    if overrides:
+        config = apply_overrides(config, overrides)
+    if sensor_overrides:
+        config_sensor = apply_overrides(config_sensor, sensor_overrides)
+
+    path  =  config["path"]
+
+    # --- Environment ---
+    env_data  =  config["environment"]
+
+    if cache_environment:
+        env  =  get_environment(env_data)
+    else:
+        env  =  build_environment(env_data)
+
+    # --- Motor and rocket ---
+    rocket_data  =  config["rocket"]
+    motor  =  build_motor(config)
+    rocket  =  build_rocket(config, motor)
+
     accel = Accelerometer(
     sampling_rate=config_sensor["Acc-high-g"]["sampling_rate"],
     consider_gravity=False,
@@ -179,6 +277,12 @@ def load_flight_from_json(config_path, sensor_path: str):
         ) ** 0.5
         mach_number = free_stream_speed / env.speed_of_sound(altitude_ASL)
 
+        # Apogee if the brakes held their current deployment (apogee_predictor.py)
+        predicted_apogee = apogee_predictor.predict(
+            altitude_AGL, vz, ((wind_x - vx) ** 2 + (wind_y - vy) ** 2) ** 0.5,
+            air_brakes.deployment_level,
+        )
+
         # Get previous state from state_history
         previous_state = state_history[-1]
         previous_vz = previous_state[5]
@@ -244,6 +348,7 @@ def load_flight_from_json(config_path, sensor_path: str):
             time,
             air_brakes.deployment_level,
             air_brakes.drag_coefficient(air_brakes.deployment_level, mach_number),
+            predicted_apogee,
         )
     
     # --- Air Brakes ---
@@ -255,15 +360,22 @@ def load_flight_from_json(config_path, sensor_path: str):
         warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
 
         cd_curve = air_brakes_data["drag_coefficient_curve"]
+
+        # Regular-grid table compiled once from the CSV (see air_brakes_drag.py),
+        # instead of a scattered-data Function interpolated every tick
+        from apogee_predictor import ApogeePredictor
+
+        drag_table = load_drag_table(path + cd_curve)
+        apogee_predictor = ApogeePredictor(env, rocket, drag_table)
         
         air_brakes = rocket.add_air_brakes(
         drag_coefficient_curve=
-        path + cd_curve,
+        drag_table.drag_coefficient,
                 controller_function=controller_function,
                 sampling_rate=air_brakes_data["sampling_rate"],
                 reference_area=air_brakes_data["reference_area"],
                 clamp=True,
-                initial_observed_variables=[0, 0, 0],
+                initial_observed_variables=[0, 0, 0, 0],
                 override_rocket_drag=False,
                 name="Air Brakes",
             )
@@ -275,14 +387,32 @@ def load_flight_from_json(config_path, sensor_path: str):
         air_brakes = None
     '''
 
+    if air_brakes_controller is not None:
+        air_brakes_data = rocket_data["Airbrakes"]
+        drag_table = load_drag_table(path + air_brakes_data["drag_coefficient_curve"])
+        rocket.add_air_brakes(
+            drag_coefficient_curve = drag_table.drag_coefficient,
+            controller_function = air_brakes_controller(env, rocket, drag_table),
+            sampling_rate = air_brakes_data["sampling_rate"],
+            reference_area = air_brakes_data["reference_area"],
+            clamp = air_brakes_data["clamp"],
+            initial_observed_variables = air_brakes_data["initial_observed_variables"],
+            override_rocket_drag = air_brakes_data["override_rocket_drag"],
+            name = air_brakes_data["name"],
+        )
+
+    # Apogee-only flights stop integrating at apogee, so parachutes are never used
+    apogee_only  =  config["flight"].get("terminate_on_apogee", False)
+    parachutes  =  {} if apogee_only else rocket_data["parachutes"]
+
     # Parachutes
-    for chute_name, chute_data in rocket_data["parachutes"].items():
+    for chute_name, chute_data in parachutes.items():
         
         rocket.add_parachute(
         
             chute_data["name"],
         
-            cd_s =  int(chute_data["drag_coefficient"]) * int(chute_data["area"]),
+            cd_s =  chute_data["drag_coefficient"] * chute_data["area"],
         
             trigger = chute_data["trigger"],
         
@@ -294,6 +424,9 @@ def load_flight_from_json(config_path, sensor_path: str):
         )
 
     # --- Flight ---
+    if not simulate:
+        return env, motor, rocket, None, [accel, imu_acc, imu_gyro], baro, gps
+
     flight_data  =  config["flight"]
     flight  =  Flight(
         rocket = rocket,
@@ -305,6 +438,8 @@ def load_flight_from_json(config_path, sensor_path: str):
         inclination = flight_data["inclination"],
     
         heading = flight_data["heading"],
+
+        terminate_on_apogee = apogee_only,
     )
 
     return env, motor, rocket, flight, [accel, imu_acc, imu_gyro], baro, gps
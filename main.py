@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from rocketpy import Environment, SolidMotor, Rocket, Flight
 from my_flight_plots import _MyFlightPlots
+from sensor_export import EXPORT_FILE, publish, sensor_dataset, write_sensor_dataset
+from sensor_log import sensor_records, write_sensor_log
 from load_flight_from_json import load_flight_from_json
 from datetime import datetime
 from scipy.signal import savgol_filter
@@ -20,8 +22,12 @@ def main():
     SHOW_ROCKET_INFO = False 
     SHOW_FLIGHT_INFO = True
     SHOW_SENSORS = False
+    HEADLESS_FLIGHT_INFO = False  # Save the flight plots without showing them
 
-    # Load everything from JSON
+    # Load everything from JSON, with parachute noise seeded so headless
+    # rendering workers can load the very same flight again
+    seed = int(np.random.SeedSequence().entropy % 2**32)
+    np.random.seed(seed)
     env, motor, rocket, flight, three_axis_sensors, baro, gps = load_flight_from_json(config_path, config_sensor)
     
     """
@@ -40,7 +46,7 @@ def main():
     env_analysis.all_info()
     )"""
 
-    flight_info = _MyFlightPlots(flight, motor)
+    flight_info = _MyFlightPlots(flight, motor, source=(config_path, config_sensor, seed))
 
     with open(r"./Simulation/Pro98M1450.txt", 'w+', encoding='utf-8') as file:
         
@@ -51,7 +57,7 @@ def main():
         #    print(f"{k}, {v}\n")
 
     if SHOW_FLIGHT_INFO:
-        flight_info.all()
+        flight_info.all(headless=HEADLESS_FLIGHT_INFO)
         
     if SHOW_ROCKET_INFO:
         rocket.all_info()
@@ -60,8 +66,10 @@ def main():
         env.plots.atmospheric_model()
     
     if SHOW_SENSORS:
-        
-        i = 0
+
+        # Every exported channel, resampled once to a shared time base
+        t_dataset, channels = sensor_dataset(flight, three_axis_sensors, baro, gps, dt)
+
         for sensor in three_axis_sensors:
 
             t, mx, my, mz = zip(*sensor.measured_data)
@@ -86,56 +94,20 @@ def main():
 
             if f"{type(sensor).__name__}" == "Gyroscope":
 
-                t = flight.w1[:,0]
-                t_resampled = np.arange(t[0], t[-1], dt)
-
-                w1 = np.interp(t_resampled, flight.w1[:,0], flight.w1[:,1])
-                w2 = np.interp(t_resampled, flight.w2[:,0], flight.w2[:,1])
-                w3 = np.interp(t_resampled, flight.w3[:,0], flight.w3[:,1])
-
-                bgx = w1-mx 
-                bgy = w2-my
-                bgz = w3-mz
-
-                # ---- Low-pass filter parameters ----
-                fc = 0.1          # cutoff frequency (Hz)  (adjust)
-                tau = 1 / (2*np.pi*fc)
-                alpha = dt / (tau + dt)
-
-                # Initialize filtered bias
-                bgx_lpf = np.zeros_like(bgx)
-                bgy_lpf = np.zeros_like(bgy)
-                bgz_lpf = np.zeros_like(bgz)
-
-                # Initial condition
-                bgx_lpf[0] = bgx[0]
-                bgy_lpf[0] = bgy[0]
-                bgz_lpf[0] = bgz[0]
-
-                # Apply LPF
-                for k in range(1, len(bgx)):
-                    bgx_lpf[k] = alpha*bgx[k] + (1-alpha)*bgx_lpf[k-1]
-                    bgy_lpf[k] = alpha*bgy[k] + (1-alpha)*bgy_lpf[k-1]
-                    bgz_lpf[k] = alpha*bgz[k] + (1-alpha)*bgz_lpf[k-1]
-
-                df = pd.DataFrame({
-                "t": t_resampled,
-                "bgx": bgx_lpf,
-                "bgy": bgy_lpf,
-                "bgz": bgz_lpf
-                })
+                # Gyro bias, low-passed at 0.1 Hz by sensor_dataset
+                bias = channels["gyro_bias"]["columns"]
               
                 _, ax = plt.subplots(nrows=1, ncols=3)
                 
-                ax[0].plot(t_resampled, bgx_lpf, label="lat")
+                ax[0].plot(t_dataset, bias["bgx"], label="lat")
                 ax[0].set_xlabel("Time (s)")
                 ax[0].set_ylabel("Measurement x")
 
-                ax[1].plot(t_resampled, bgy_lpf, label="lon")
+                ax[1].plot(t_dataset, bias["bgy"], label="lon")
                 ax[1].set_xlabel("Time (s)")
                 ax[1].set_ylabel("Measurement y")
                 
-                ax[2].plot(t_resampled, bgz_lpf, label="altitude")
+                ax[2].plot(t_dataset, bias["bgz"], label="altitude")
                 ax[2].set_xlabel("Time (s)")        
                 ax[2].set_ylabel("Measurement z")
 
@@ -143,36 +115,6 @@ def main():
                 plt.legend()
                 plt.show()
 
-                df.to_csv("sensors_data/exported_gyro_bias_data.csv", index=False)
-                df.to_csv(f"{path_sensors_to_KF}/exported_gyro_bias_data.csv", index=False)
-
-            elif f"{type(sensor).__name__}" == "Accelerometer":
-                
-                t = flight.ax[:,0]
-                t_resampled = np.arange(t[0], t[-1], dt)
-
-                ax = np.interp(t_resampled, flight.ax[:,0], flight.ax[:,1])
-                ay = np.interp(t_resampled, flight.ay[:,0], flight.ay[:,1])
-                az = np.interp(t_resampled, flight.az[:,0], flight.az[:,1])
-
-                bax = ax-mx 
-                bay = ay-my
-                baz = az-mz
-
-                df = pd.DataFrame({
-                "t": t_resampled,
-                "bax": bax,
-                "bay": bay,
-                "baz": baz
-                })
-
-                df.to_csv(f"sensors_data/exported_acc_bias_{i}_data.csv", index=False)
-                df.to_csv(f"{path_sensors_to_KF}/exported_acc_bias_{i}_data.csv", index=False)
-
-            sensor.export_measured_data(f"sensors_data/exported_{type(sensor).__name__}_{i}_data.csv")
-            sensor.export_measured_data(f"{path_sensors_to_KF}/exported_{type(sensor).__name__}_{i}_data.csv")
-            i+=1
-
         time_barometer, pressure_barometer = zip(*baro.measured_data)
 
         plt.plot(time_barometer, pressure_barometer)
@@ -181,9 +123,6 @@ def main():
         plt.title(type(baro).__name__)
         plt.show()
 
-        baro.export_measured_data(f"sensors_data/exported_{type(baro).__name__}_data.csv")
-        baro.export_measured_data(f"{path_sensors_to_KF}/exported_{type(baro).__name__}_data.csv")
-        
         time_gps, lat, lon, h  = zip(*gps.measured_data)
 
         _, ax = plt.subplots(nrows=1, ncols=3)
@@ -204,163 +143,36 @@ def main():
         plt.legend()
         plt.show()
 
-        gps.export_measured_data(f"sensors_data/exported_{type(gps).__name__}_data.csv")
-        gps.export_measured_data(f"{path_sensors_to_KF}/exported_{type(gps).__name__}_data.csv")
-
-        time_velocity = flight.vx[:,0]
-        t_resampled = np.arange(time_velocity[0], time_velocity[-1], dt)
-        
-        vx = np.interp(t_resampled, flight.vx[:,0], flight.vx[:,1])
-        vy = np.interp(t_resampled, flight.vy[:,0], flight.vy[:,1])
-        vz = np.interp(t_resampled, flight.vz[:,0], flight.vz[:,1])
-
-        df = pd.DataFrame({
-            "t": t_resampled,
-            "Vx": vx,
-            "Vy": vy,
-            "Vz": vz
-        })
+        velocity = channels["velocity"]["columns"]
 
         _, ax = plt.subplots(nrows=1, ncols=3)
             
-        ax[0].plot(t_resampled, vx, label="lat")
+        ax[0].plot(t_dataset, velocity["Vx"], label="lat")
         ax[0].set_xlabel("Time (s)")
         ax[0].set_ylabel("Measurement x")
 
-        ax[1].plot(t_resampled, vy, label="lon")
+        ax[1].plot(t_dataset, velocity["Vy"], label="lon")
         ax[1].set_xlabel("Time (s)")
         ax[1].set_ylabel("Measurement y")
             
-        ax[2].plot(t_resampled, vz, label="altitude")
+        ax[2].plot(t_dataset, velocity["Vz"], label="altitude")
         ax[2].set_xlabel("Time (s)")        
         ax[2].set_ylabel("Measurement z")
 
         plt.legend()
         plt.show()
 
-        df.to_csv("sensors_data/exported_velocity_data.csv", index=False)
-        df.to_csv(f"{path_sensors_to_KF}/exported_velocity_data.csv", index=False)
-
-main()
-
-'''
-for m in np.arange(18.33, 20.5, 0.01):
-
-
-def run_simulation(m):
-    """
-    Updates rocket mass in config file, runs simulation,
-    and returns apogee.
-    """
-    # Load config
-    with open(config_path, "r") as f:
-        config = json.load(f)
-
-    # Update mass
-    config["rocket"]["mass"] = m
-
-    # Save config
-    with open(config_path, "w") as f:
-        json.dump(config, f)
-
-    # Run simulation
-    env, motor, rocket, flight = load_flight_from_json(config_path)
-    return env, motor, rocket, flight
-
-import pandas as pd
-import matplotlib.pyplot as plt
-
-def plot_mass_vs_apogee(csv_file, target=3000):
-    """
-    Reads mass and apogee data from a CSV and plots apogee vs mass,
-    including target lines and highlighting the closest apogee to target.
-
-    Parameters:
-        csv_file (str): Path to the CSV file with 'mass' and 'apogee' columns.
-        target (float): Target apogee value in meters.
-    """
-    # Read CSV
-    data = pd.read_csv(csv_file)
-    
-    # Ensure expected columns exist
-    if 'mass' not in data.columns or 'apogee' not in data.columns:
-        raise ValueError("CSV must contain 'mass' and 'apogee' columns.")
-    
-    masses = data['mass'].tolist()
-    apogees = data['apogee'].tolist()
-    
-    # Plot results
-    plt.figure(figsize=(10, 6))
-    plt.plot(masses, apogees, 'b-', label="Apogee vs Mass", linewidth=2)
-    plt.xlabel("Mass (kg)", fontsize=12)
-    plt.ylabel("Max Z (m) - Altitude", fontsize=12)
-    plt.title("Rocket Mass Sensitivity Analysis", fontsize=14)
-
-    # Target lines
-    plt.axhline(y=target, color='k', linestyle='--', linewidth=1.5,
-                label=f"Opt Apogee: {target} m")
-    plt.axhline(y=target * 1.04, color='blue', linestyle=':', linewidth=1.2, alpha=0.9, label="±4%")
-    plt.axhline(y=target * 0.96, color='blue', linestyle=':', linewidth=1.2, alpha=0.9)
-    plt.axhline(y=target * 1.02, color='red', linestyle=':', linewidth=1.2, alpha=0.9, label="±2%")
-    plt.axhline(y=target * 0.98, color='red', linestyle=':', linewidth=1.2, alpha=0.9)
-
-    # Find closest to target
-    deviations = [abs(a - target) for a in apogees]
-    closest_idx = deviations.index(min(deviations))
-    plt.plot(masses[closest_idx], apogees[closest_idx], 'ro', markersize=4,
-             label=f'Best: {masses[closest_idx]:.2f} kg')
-
-plt.grid(True, alpha=0.3)
-plt.legend(loc='best')
-plt.tight_layout()
-plt.show()
-
-
-def main():
-    SHOW_ENVIRONMENT = False
-    SHOW_ROCKET_INFO = False
-    SHOW_FLIGHT_INFO = True
-
-    masses = []
-    apogees = []
-
-    spinner = ['-', '/', '|', '/']  # Spinner characters
-    mass_values = np.arange(18.33, 22.5, 0.01)
-    total = len(mass_values)
-
-    for i, m in enumerate(mass_values):
-        # Run simulation
-        env, motor, rocket, flight = run_simulation(m)
-        flight_info = _MyFlightPlots(flight, motor)
-
-        # Extract apogee
-        apogee = flight_info.motor_tradeoff_json["Max Z (m) - Altitude"]
-        masses.append(m)
-        apogees.append(apogee)
-
-        # Spinner and percentage
-        spin_char = spinner[i % len(spinner)]
-        percent_complete = (i + 1) / total * 100
-
-        # Print info in the same place using \r and ANSI escape to move up 2 lines
-        sys.stdout.write("\033[F\033[F") if i > 0 else None  # move cursor up 2 lines after first loop
-        print(f"{spin_char} {percent_complete:.2f}% complete")
-        print(f"Current mass: {m:.2f} kg, Current apogee: {apogee:.2f} m")
-        sys.stdout.flush()
-
-    # Save to CSV
-    df = pd.DataFrame({
-        "Mass (kg)": masses,
-        "Apogee (m)": apogees
-    })
-    df.to_csv("mass_apogee_data.csv", index=False)
-    print("Saved mass and apogee data to 'mass_apogee_data.csv'.")
-
-    plot_mass_vs_apogee("mass_apogee_data.csv", 3000)
+        # One file for the KF, written once and hard-linked into its folder
+        dataset_path = write_sensor_dataset(f"sensors_data/{EXPORT_FILE}", t_dataset, channels)
+        publish(dataset_path, path_sensors_to_KF)
 
+        # Raw sensor records as a memory-mapped log for filter development
+        write_sensor_log("sensors_data/sensors.slog", sensor_records(three_axis_sensors, baro, gps))
 
 if __name__ == "__main__":
     main()
-'''
+
+# Mass sweeps run in parallel without rewriting rocket.json, see sweep.py:
+#   python sweep.py --grid rocket.mass=18.33:22.5:0.01 -o mass_apogee_data.csv
 # Usage
-# plot_mass_vs_apogee('mass_apogee_data.csv')
\ No newline at end of file
+# plot_mass_vs_apogee('mass_apogee_data.csv')
@@ -0,0 +1,594 @@
+"""Process-parallel Monte Carlo dispersion of rocket.json parameters.
+
+Each run perturbs the entries declared in ``dispersion.json`` around their
+nominal ``rocket.json`` values, simulates the flight in a worker process and
+appends a one-row summary to the output file as soon as it finishes. Every
+run draws from its own seed derived from ``(seed, run)``, so results do not
+depend on how runs are scheduled across workers and any single run can be
+reproduced on its own.
+
+Samples can be drawn independently, from a Latin hypercube or from a
+scrambled Sobol' sequence (see ``sampling``). Design variants can be compared
+with common random numbers: every variant flies run ``i`` with the same
+quantiles of every dispersed entry and the same parachute noise, so the
+variants' differences have far less scatter than independent campaigns.
+
+In sequential mode (``--precision``) the campaign keeps streaming estimates
+of the summary columns and stops the pool as soon as every requested
+confidence interval is narrower than its target, once at least ``--min-runs``
+flights are in, with ``-n`` as the budget.
+
+Usage
+-----
+    python monte_carlo.py -n 1000 -o dispersion_results.parquet --seed 42
+    python monte_carlo.py -n 256 --sampling sobol --compare rocket.mass=18.5,19.5
+    python monte_carlo.py -n 5000 --precision "Apogee (m):mean=5" --precision "Impact Y (m):p95=50"
+"""
+import argparse
+import bisect
+import csv
+import json
+import itertools
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+from scipy import stats
+
+from load_flight_from_json import apply_overrides, load_flight_from_config
+from sampling import SAMPLING_METHODS, sobol_size, unit_samples
+from worker_pool import init_worker, worker_config
+
+SUMMARY_COLUMNS = [
+    "Apogee (m)",
+    "Apogee Time (s)",
+    "Max Mach Number",
+    "Out of Rail Velocity (m/s)",
+    "Impact X (m)",
+    "Impact Y (m)",
+    "Impact Velocity (m/s)",
+    "Flight Time (s)",
+]
+
+def _nominal_value(config, path):
+    node = config
+    for key in path.split("."):
+        node = node[int(key) if isinstance(node, list) else key]
+    return node
+
+
+def dispersion_distributions(dispersion, config):
+    """Frozen ``scipy.stats`` distribution of every dispersed entry.
+
+    Parameters
+    ----------
+    dispersion : dict
+        Parsed contents of ``dispersion.json``.
+    config : dict
+        Parsed contents of ``rocket.json``, used for the nominal values.
+
+    Returns
+    -------
+    dict
+        Maps dotted paths to frozen distributions.
+    """
+    distributions = {}
+    for path, entry in dispersion.items():
+        if not isinstance(entry, dict):
+            continue
+        nominal = _nominal_value(config, path)
+        kind = entry["distribution"]
+        if kind == "normal":
+            distributions[path] = stats.norm(entry.get("mean", nominal), entry["std"])
+        elif kind == "uniform":
+            low = entry.get("low", nominal - entry.get("half_width", 0))
+            high = entry.get("high", nominal + entry.get("half_width", 0))
+            distributions[path] = stats.uniform(low, high - low)
+        elif kind == "triangular":
+            low, high = entry["low"], entry["high"]
+            mode = entry.get("mode", nominal)
+            distributions[path] = stats.triang((mode - low) / (high - low), low, high - low)
+        else:
+            raise ValueError(f"Unknown distribution '{kind}' for '{path}'.")
+    return distributions
+
+
+def run_seed(seed, run):
+    """Seed of run number ``run`` of a campaign started with ``seed``."""
+    return int(np.random.SeedSequence(seed, spawn_key=(run,)).generate_state(1)[0])
+
+
+def overrides_from_unit(distributions, unit_point):
+    """Maps a point of the unit hypercube to one value of every dispersed entry.
+
+    Column ``j`` of ``unit_point`` is the quantile of the ``j``-th entry of
+    ``distributions``.
+    """
+    # Keep away from 0 and 1, where unbounded distributions have infinite quantiles
+    unit_point = np.clip(unit_point, 1e-12, 1 - 1e-12)
+    return {
+        path: float(d.ppf(u)) for (path, d), u in zip(distributions.items(), unit_point)
+    }
+
+
+def flight_summary(flight):
+    """One-row summary of a finished Flight, keyed by ``SUMMARY_COLUMNS``.
+
+    Flights stopped at apogee have no impact, so those columns are NaN.
+    """
+    apogee_only = flight.terminate_on_apogee
+    return {
+        "Apogee (m)": flight.apogee - flight.env.elevation,
+        "Apogee Time (s)": flight.apogee_time,
+        "Max Mach Number": flight.max_mach_number,
+        "Out of Rail Velocity (m/s)": flight.out_of_rail_velocity,
+        "Impact X (m)": np.nan if apogee_only else flight.x_impact,
+        "Impact Y (m)": np.nan if apogee_only else flight.y_impact,
+        "Impact Velocity (m/s)": np.nan if apogee_only else flight.impact_velocity,
+        "Flight Time (s)": flight.t_final,
+    }
+
+
+def run_dispersed(run, seed, overrides, design=None):
+    """Simulates one dispersed flight in a worker and returns its summary row.
+
+    ``run``, ``seed``, ``overrides`` and ``design`` are one job of
+    ``campaign_runs``. The worker must have been set up by
+    ``worker_pool.init_worker``.
+    """
+    # Parachute trigger noise is drawn from the global numpy generator
+    np.random.seed(seed % 2**32)
+    config, config_sensor = worker_config()
+    _, _, _, flight, _, _, _ = load_flight_from_config(config, config_sensor, overrides=overrides)
+    row = {"run": run, "seed": seed, **overrides, **flight_summary(flight)}
+    if design is not None:
+        row["design"] = design
+    return row
+
+
+class SummaryWriter:
+    """Incremental writer of run summaries.
+
+    ``.parquet`` files are written with pyarrow in row groups of
+    ``flush_every`` rows, anything else is written as CSV one row at a
+    time. Both keep memory use flat however many runs a campaign has.
+    """
+
+    def __init__(self, path, columns, flush_every=100):
+        self.path = path
+        self.columns = columns
+        self.flush_every = flush_every
+        self._rows = []
+        self._parquet = path.endswith(".parquet")
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            types = {"run": pa.int64(), "seed": pa.int64(), "design": pa.string()}
+            self._schema = pa.schema([(c, types.get(c, pa.float64())) for c in columns])
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=columns)
+            self._writer.writeheader()
+
+    def write(self, row):
+        if self._parquet:
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_every:
+                self.flush()
+        else:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def flush(self):
+        if self._parquet and self._rows:
+            import pyarrow as pa
+
+            columns = {c: [row[c] for row in self._rows] for c in self.columns}
+            self._writer.write_table(pa.table(columns, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self.flush()
+        if self._parquet:
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def paired_differences(values, column="Apogee (m)"):
+    """Mean difference of every design to the first one, with its standard error.
+
+    Parameters
+    ----------
+    values : dict
+        Maps design names to ``{run: row}`` dictionaries, as collected by
+        ``run_monte_carlo`` when designs are compared.
+    column : str, optional
+        Summary column to compare.
+
+    Returns
+    -------
+    dict
+        Maps every design but the first to ``(mean, standard_error)`` of the
+        run-by-run differences ``design - first``.
+    """
+    names = list(values)
+    reference = values[names[0]]
+    differences = {}
+    for name in names[1:]:
+        runs = sorted(set(reference) & set(values[name]))
+        delta = np.array([values[name][r][column] - reference[r][column] for r in runs])
+        standard_error = delta.std(ddof=1) / np.sqrt(len(delta)) if len(delta) > 1 else np.nan
+        differences[name] = (float(delta.mean()), float(standard_error))
+    return differences
+
+
+def campaign_runs(config, dispersion, n_runs, seed=0, sampling="random", designs=None):
+    """Every ``(run, seed, overrides, design)`` job of a campaign.
+
+    With ``designs``, each design's overrides are applied to ``config`` before
+    building the distributions, so dispersions are centred on the design's own
+    nominal values, and every design reuses the same unit sample and seed for
+    run ``i`` (common random numbers).
+    """
+    distributions = dispersion_distributions(dispersion, config)
+    seeds = [run_seed(seed, run) for run in range(n_runs)]
+    samples = unit_samples(sampling, n_runs, len(distributions), seed, run_seeds=seeds)
+
+    jobs = []
+    for name, design in (designs or {None: {}}).items():
+        design_distributions = dispersion_distributions(dispersion, apply_overrides(config, design))
+        for run in range(n_runs):
+            overrides = {**design, **overrides_from_unit(design_distributions, samples[run])}
+            jobs.append((run, seeds[run], overrides, name))
+    return jobs
+
+
+def run_monte_carlo(config, config_sensor, dispersion, n_runs, output_path, seed=0,
+                    workers=None, sampling="random", designs=None):
+    """Runs a Monte Carlo dispersion campaign across a process pool.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``.
+    config_sensor : dict
+        Parsed contents of ``sensors.json``.
+    dispersion : dict
+        Parsed contents of ``dispersion.json``.
+    n_runs : int
+        Number of flights to simulate per design.
+    output_path : str
+        Summary file, Parquet if it ends in ``.parquet`` and CSV otherwise.
+        Rows are written in completion order.
+    seed : int, optional
+        Campaign seed. Run ``i`` always uses ``run_seed(seed, i)``.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    sampling : str, optional
+        One of ``sampling.SAMPLING_METHODS``. Default is ``"random"``.
+    designs : dict, optional
+        Maps design names to dotted-path overrides of ``config``. Every
+        design flies the same ``n_runs`` dispersed runs with common random
+        numbers and the output gets a ``design`` column.
+
+    Returns
+    -------
+    dict
+        Maps design names (None without ``designs``) to ``{run: row}``.
+    """
+    distributions = dispersion_distributions(dispersion, config)
+    columns = ["run", "seed", *distributions, *SUMMARY_COLUMNS]
+    if designs:
+        extra = [path for design in designs.values() for path in design if path not in columns]
+        columns = ["design", *columns[:2], *dict.fromkeys(extra), *columns[2:]]
+    jobs = campaign_runs(config, dispersion, n_runs, seed, sampling, designs)
+    results = {name: {} for name in (designs or {None: {}})}
+
+    with SummaryWriter(output_path, columns) as writer, ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=init_worker,
+        initargs=(config, config_sensor),
+    ) as executor:
+        futures = [executor.submit(run_dispersed, *job) for job in jobs]
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = future.result()
+            writer.write(row)
+            results[row.get("design")][row["run"]] = {c: row[c] for c in SUMMARY_COLUMNS}
+            sys.stdout.write(f"\r{done}/{len(jobs)} ({done / len(jobs) * 100:.2f}%)")
+            sys.stdout.flush()
+    print()
+
+    return results
+
+
+class StreamingStatistics:
+    """Running estimates of one summary column as runs complete.
+
+    Mean and variance are updated with Welford's algorithm. Values are also
+    kept sorted so quantiles and their distribution-free confidence intervals
+    (from binomial order statistics) are exact at any point of the campaign.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._sorted = []
+
+    def add(self, value):
+        if not np.isfinite(value):
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (value - self.mean)
+        bisect.insort(self._sorted, value)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    def mean_interval(self, confidence=0.95):
+        """Normal-theory confidence interval of the mean."""
+        half_width = stats.norm.ppf(0.5 + confidence / 2) * np.sqrt(self.variance / self.n)
+        return self.mean - half_width, self.mean + half_width
+
+    def quantile(self, p):
+        return float(np.quantile(self._sorted, p)) if self.n else np.nan
+
+    def quantile_interval(self, p, confidence=0.95):
+        """Order statistics bracketing the ``p`` quantile with ``confidence``."""
+        if self.n < 2:
+            return -np.inf, np.inf
+        z = stats.norm.ppf(0.5 + confidence / 2)
+        spread = z * np.sqrt(self.n * p * (1 - p))
+        low = int(np.floor(self.n * p - spread))
+        high = int(np.ceil(self.n * p + spread))
+        if low < 0 or high >= self.n:
+            return -np.inf, np.inf
+        return self._sorted[low], self._sorted[high]
+
+    def interval(self, statistic, confidence=0.95):
+        """Confidence interval of ``"mean"`` or of a quantile such as ``"p95"``."""
+        if statistic == "mean":
+            return self.mean_interval(confidence)
+        return self.quantile_interval(float(statistic[1:]) / 100, confidence)
+
+    def estimate(self, statistic):
+        return self.mean if statistic == "mean" else self.quantile(float(statistic[1:]) / 100)
+
+
+def run_sequential(config, config_sensor, dispersion, output_path, targets, max_runs=10000,
+                   min_runs=30, confidence=0.95, seed=0, workers=None, sampling="random"):
+    """Runs a campaign until every confidence interval in ``targets`` is narrow enough.
+
+    Parameters
+    ----------
+    config, config_sensor, dispersion : dict
+        See ``run_monte_carlo``.
+    output_path : str
+        Summary file, see ``run_monte_carlo``.
+    targets : dict
+        Maps ``(column, statistic)`` to the widest acceptable confidence
+        interval, e.g. ``{("Apogee (m)", "mean"): 5, ("Impact Y (m)", "p95"): 50}``.
+    max_runs : int, optional
+        Budget of flights if the targets are never met.
+    min_runs : int, optional
+        Flights completed before the stopping rule is checked, at most
+        ``max_runs``. Default is 30.
+    confidence : float, optional
+        Confidence level of the intervals. Default is 0.95.
+    seed, workers : int, optional
+        See ``run_monte_carlo``.
+    sampling : str, optional
+        ``"random"`` or ``"sobol"``. Latin hypercubes are only stratified
+        once complete, so they cannot be stopped early.
+
+    Returns
+    -------
+    statistics : dict
+        Maps each summary column to its ``StreamingStatistics``.
+    widths : dict
+        Achieved confidence interval width of every target.
+    converged : bool
+        Whether every target was met after at least ``min_runs`` flights,
+        early or with the last run of the budget.
+    """
+    if sampling == "lhs":
+        raise ValueError("Latin hypercube campaigns cannot be stopped early, use 'sobol'.")
+    if max_runs < min_runs:
+        raise ValueError(f"A budget of {max_runs} runs never reaches min_runs={min_runs}.")
+
+    distributions = dispersion_distributions(dispersion, config)
+    columns = ["run", "seed", *distributions, *SUMMARY_COLUMNS]
+    jobs = iter(campaign_runs(config, dispersion, max_runs, seed, sampling))
+    statistics = {column: StreamingStatistics() for column in SUMMARY_COLUMNS}
+    workers = workers or os.cpu_count()
+
+    def widths():
+        achieved = {}
+        for column, statistic in targets:
+            low, high = statistics[column].interval(statistic, confidence)
+            achieved[(column, statistic)] = float(high - low)
+        return achieved
+
+    converged = False
+    with SummaryWriter(output_path, columns) as writer, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(config, config_sensor),
+    ) as executor:
+        # Keep the pool busy without queueing more runs than can be cancelled cheaply
+        pending = {
+            executor.submit(run_dispersed, *job) for job in itertools.islice(jobs, 2 * workers)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                row = future.result()
+                writer.write(row)
+                for column in SUMMARY_COLUMNS:
+                    statistics[column].add(row[column])
+
+            n = statistics["Apogee (m)"].n
+            current = widths()
+            sys.stdout.write(
+                f"\r{n} runs, "
+                + ", ".join(f"{c} {s}: ±{w / 2:.2f}" for (c, s), w in current.items())
+            )
+            sys.stdout.flush()
+
+            if converged:
+                continue
+            if n >= min_runs and all(current[key] <= width for key, width in targets.items()):
+                # Drop queued runs, the ones already flying are still recorded
+                converged = True
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+            else:
+                pending |= {
+                    executor.submit(run_dispersed, *job)
+                    for job in itertools.islice(jobs, len(done))
+                }
+    print()
+
+    # The targets may only be met by the last runs of the budget
+    achieved = widths()
+    converged = converged or (
+        statistics["Apogee (m)"].n >= min_runs
+        and all(achieved[key] <= width for key, width in targets.items())
+    )
+    return statistics, achieved, converged
+
+
+def parse_precision_argument(argument):
+    """Parses ``column:statistic=width``, e.g. ``"Apogee (m):mean=5"``.
+
+    ``statistic`` is ``mean`` or a percentile ``pNN`` strictly between 0
+    and 100, e.g. ``p95`` or ``p99.5``; ``width`` must be positive.
+    """
+    target, _, width = argument.rpartition("=")
+    column, _, statistic = target.rpartition(":")
+    try:
+        width = float(width)
+        percentile = None if statistic == "mean" else float(statistic[1:])
+    except ValueError:
+        percentile = width = float("nan")
+    valid = (
+        column in SUMMARY_COLUMNS
+        and width > 0
+        and (statistic == "mean" or (statistic[:1] == "p" and 0 < percentile < 100))
+    )
+    if not valid:
+        raise argparse.ArgumentTypeError(
+            f"Expected 'column:mean=width' or 'column:pNN=width' with 0 < NN < 100 "
+            f"and a positive width, got '{argument}'."
+        )
+    return (column, statistic), width
+
+
+def parse_compare_argument(argument):
+    """Parses ``path=v1,v2,...`` into one design per value."""
+    path, _, values = argument.partition("=")
+    return {f"{path}={v}": {path: json.loads(v)} for v in values.split(",")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--dispersion", default="dispersion.json")
+    parser.add_argument("-n", "--runs", type=int, default=100)
+    parser.add_argument("-o", "--output", default="dispersion_results.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--sampling", choices=SAMPLING_METHODS, default="random")
+    # Sequential stopping watches a single design
+    stopping = parser.add_mutually_exclusive_group()
+    stopping.add_argument(
+        "--compare",
+        type=parse_compare_argument,
+        default=None,
+        help="Compare designs with common random numbers, as path=v1,v2,...",
+    )
+    stopping.add_argument(
+        "--precision",
+        type=parse_precision_argument,
+        action="append",
+        default=None,
+        help="Stop once the confidence interval of column:statistic is narrower "
+        "than width, e.g. 'Apogee (m):mean=5' or 'Impact Y (m):p95=50' (repeatable). "
+        "-n becomes the run budget.",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=30,
+        help="Runs completed before --precision may stop the campaign.",
+    )
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument(
+        "--apogee-only",
+        action="store_true",
+        help="Stop integrating flights at apogee, impact columns are left empty.",
+    )
+    args = parser.parse_args(argv)
+    if args.precision and args.runs < args.min_runs:
+        parser.error(f"--runs ({args.runs}) must be at least --min-runs ({args.min_runs}).")
+
+    if args.sampling == "sobol" and sobol_size(args.runs) != args.runs:
+        args.runs = sobol_size(args.runs)
+        print(f"Sobol' points are balanced in powers of two, running {args.runs} runs.")
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    with open(args.sensors, "r") as f:
+        config_sensor = json.load(f)
+    with open(args.dispersion, "r") as f:
+        dispersion = json.load(f)
+    if args.apogee_only:
+        config["flight"]["terminate_on_apogee"] = True
+
+    if args.precision:
+        statistics, widths, converged = run_sequential(
+            config, config_sensor, dispersion, args.output, dict(args.precision), args.runs,
+            args.min_runs, confidence=args.confidence, seed=args.seed, workers=args.workers,
+            sampling=args.sampling,
+        )
+        print(f"Saved dispersion results to '{args.output}'.")
+        print("Converged." if converged else "Run budget exhausted before reaching the targets.")
+        for (column, statistic), width in widths.items():
+            estimate = statistics[column].estimate(statistic)
+            print(
+                f"{column} {statistic}: {estimate:.2f}, {args.confidence:.0%} interval "
+                f"width {width:.2f} (target {dict(args.precision)[(column, statistic)]:.2f}, "
+                f"{statistics[column].n} runs)"
+            )
+        return
+
+    results = run_monte_carlo(
+        config, config_sensor, dispersion, args.runs, args.output, args.seed, args.workers,
+        args.sampling, args.compare,
+    )
+    print(f"Saved dispersion results to '{args.output}'.")
+
+    if args.compare:
+        reference = next(iter(args.compare))
+        for name, (mean, error) in paired_differences(results).items():
+            print(f"Apogee {name} - {reference}: {mean:.2f} ± {error:.2f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,107 @@
+import multiprocessing
 import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
+from collections.abc import Mapping
 from functools import cached_property
 import pandas as pd
 
+from load_flight_from_json import load_flight_from_json
+
+
+class _TradeoffMetrics(Mapping):
+    """Motor tradeoff table of a flight, computed on first access.
+
+    Behaves like the dictionary ``_MyFlightPlots.motor_tradeoff_json`` used
+    to be, but nothing is evaluated until a key is read. Metrics are computed
+    in groups: the kinematic ones (position, speed, Mach) in one vectorised
+    pass over ``flight.solution``, the aerodynamic ones from rocketpy's single
+    pass over the flight's forces and moments. Reading only the apogee, as a
+    sweep does, therefore never touches the aerodynamics.
+    """
+
+    _motor_keys = {
+        "Max Thrust (N)": "max_thrust",
+        "Average Thrust (N)": "average_thrust",
+        "Burn Time (s)": "burn_duration",
+        "Total Impulse (Ns)": "total_impulse",
+    }
+    _kinematic_keys = [
+        "Max Z (m) - Altitude",
+        "Max Y (m)",
+        "Max X (m)",
+        "Max Velocity Magnitude (m/s)",
+        "Max Mach Number",
+    ]
+    _aerodynamic_keys = {
+        "Max AeroDrag Force (N)": "aerodynamic_drag",
+        "Max AeroLift Resultant Force (N)": "aerodynamic_lift",
+        "Max AeroBending Resultant Moment (N m)": "aerodynamic_bending_moment",
+        "Max AeroSpin Moment (N m)": "aerodynamic_spin_moment",
+    }
+
+    def __init__(self, flight, motor):
+        self.flight = flight
+        self.motor = motor
+        self._values = {}
+
+    def __iter__(self):
+        yield from self._motor_keys
+        yield from self._kinematic_keys
+        yield from self._aerodynamic_keys
+
+    def __len__(self):
+        return len(self._motor_keys) + len(self._kinematic_keys) + len(self._aerodynamic_keys)
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key in self._motor_keys:
+                self._values[key] = getattr(self.motor, self._motor_keys[key])
+            elif key in self._kinematic_keys:
+                self._kinematic_pass()
+            elif key in self._aerodynamic_keys:
+                self._aerodynamic_pass()
+            else:
+                raise KeyError(key)
+        return self._values[key]
+
+    def _kinematic_pass(self):
+        """Position, speed and Mach maxima from one pass over the solution array."""
+        env = self.flight.env
+        solution = np.asarray(self.flight.solution)
+        x, y, z, vx, vy, vz = solution[:, 1:7].T
+
+        wind_x = env.wind_velocity_x.get_value(z)
+        wind_y = env.wind_velocity_y.get_value(z)
+        free_stream_speed = np.sqrt((wind_x - vx) ** 2 + (wind_y - vy) ** 2 + vz**2)
+        mach_number = free_stream_speed / env.speed_of_sound.get_value(z)
+
+        self._values.update(
+            zip(
+                self._kinematic_keys,
+                (
+                    float(np.max(z) - env.elevation),
+                    float(np.max(y)),
+                    float(np.max(x)),
+                    float(np.max(np.sqrt(vx**2 + vy**2 + vz**2))),
+                    float(np.max(mach_number)),
+                ),
+            )
+        )
+
+    def _aerodynamic_pass(self):
+        """Force and moment maxima, sharing rocketpy's single pass over the flight."""
+        for key, attribute in self._aerodynamic_keys.items():
+            self._values[key] = float(np.max(getattr(self.flight, attribute)[:, 1]))
+
+    def to_dict(self):
+        """Every metric as a plain dictionary, e.g. for ``json.dump``."""
+        return dict(self.items())
+
+
 class _MyFlightPlots:
     """Class that holds plot methods for Flight class.
 
@@ -17,16 +115,57 @@ class _MyFlightPlots:
 
     _FlightPlots.first_event_time_index : int
         Time index of first event.
+
+    _FlightPlots.apogee_only : bool
+        True if the flight was stopped at apogee, in which case every plot
+        and metric only covers the ascent.
+
+    _FlightPlots.motor_tradeoff_json : _TradeoffMetrics
+        Motor and ascent metrics of the flight, evaluated lazily.
+
+    _FlightPlots.headless : bool
+        If True, figures are only saved to ``output_dir`` and closed, never
+        shown. Set by ``all(headless=True)``.
+
+    _FlightPlots.saved_files : list
+        Paths of every figure saved so far.
+
+    _FlightPlots.source : tuple or None
+        ``(config_path, sensor_path, seed)`` the flight was loaded from with
+        ``load_flight_from_json``, ``seed`` being the ``np.random.seed`` set
+        just before loading it (parachute trigger noise is drawn from the
+        global generator). Used by headless rendering where processes cannot
+        be forked.
     """
     output_dir = "Simulation\\images"
 
-    def __init__(self, flight, motor):
+    # Sections of the full report, in the order all() renders them
+    report = [
+        ("Trajectory 3d Plot", ["trajectory_3d"]),
+        ("Trajectory Kinematic Plots", ["linear_kinematics_data"]),
+        ("Angular Position Plots", ["flight_path_angle_data"]),
+        ("Path, Attitude and Lateral Attitude Angle plots", ["attitude_data"]),
+        ("Trajectory Angular Velocity and Acceleration Plots", ["angular_kinematics_data"]),
+        ("Aerodynamic Forces Plots", ["aerodynamic_forces"]),
+        ("Rail Buttons Forces Plots", ["rail_buttons_forces"]),
+        ("Trajectory Energy Plots", ["energy_data"]),
+        ("Trajectory Fluid Mechanics Plots", ["fluid_mechanics_data"]),
+        ("Trajectory Stability and Control Plots", ["stability_and_control_data"]),
+        ("Rocket and Parachute Pressure Plots", ["pressure_rocket_altitude", "pressure_signals"]),
+    ]
+
+    def __init__(self, flight, motor, source=None):
         """Initializes _FlightPlots class.
 
         Parameters
         ----------
         flight : Flight
             Instance of the Flight class
+        motor : Motor
+            Motor of the flight
+        source : tuple, optional
+            ``(config_path, sensor_path, seed)`` the flight was loaded from,
+            see ``_FlightPlots.source``.
 
         Returns
         -------
@@ -34,24 +173,12 @@ class _MyFlightPlots:
         """
         self.flight = flight
         self.motor = motor
-        self.motor_tradeoff_json = {
-        # --- Motor information (first, as requested) ---
-        "Max Thrust (N)": self.motor.max_thrust,
-        "Average Thrust (N)": self.motor.average_thrust,
-        "Burn Time (s)": self.motor.burn_duration,
-        "Total Impulse (Ns)": self.motor.total_impulse,
-        
-        # --- Flight performance metrics (after motor info) ---
-        "Max Z (m) - Altitude": float(np.max(self.flight.altitude[:, 1])),
-        "Max Y (m)": float(np.max(self.flight.y[:, 1])),
-        "Max X (m)": float(np.max(self.flight.x[:, 1])),
-        "Max Velocity Magnitude (m/s)": float(np.max(self.flight.speed[:, 1])),
-        "Max Mach Number": float(np.max(self.flight.mach_number[:, 1])),
-        "Max AeroDrag Force (N)": float(np.max(self.flight.aerodynamic_drag[:, 1])),
-        "Max AeroLift Resultant Force (N)": float(np.max(self.flight.aerodynamic_lift[:, 1])),
-        "Max AeroBending Resultant Moment (N m)": float(np.max(self.flight.aerodynamic_bending_moment[:, 1])),
-        "Max AeroSpin Moment (N m)": float(np.max(self.flight.aerodynamic_spin_moment[:, 1])),
-    }
+        # Flights built with flight.terminate_on_apogee have no descent
+        self.apogee_only = flight.terminate_on_apogee
+        self.motor_tradeoff_json = _TradeoffMetrics(flight, motor)
+        self.headless = False
+        self.saved_files = []
+        self.source = source
 
         return None
 
@@ -92,10 +219,28 @@ class _MyFlightPlots:
         filepath = os.path.join(self.output_dir, filename)
         try:
             fig.savefig(filepath)
+            self.saved_files.append(filepath)
             print(f"Plot saved to {filepath}")
         except Exception as e:
             print(f"Error saving plot to {filepath}: {e}")
 
+    def show_plot(self, fig):
+        """Shows the figure, or closes it when rendering headless.
+
+        Parameters
+        ----------
+        fig : matplotlib.figure.Figure
+            The figure object to show.
+
+        Returns
+        -------
+        None
+        """
+        if self.headless:
+            plt.close(fig)
+        else:
+            plt.show()
+
 
     def trajectory_3d(self):
         """Plot a 3D graph of the trajectory
@@ -160,7 +305,7 @@ class _MyFlightPlots:
         ax1.set_box_aspect(None, zoom=0.95)  # 95% for label adjustment
         
         self.save_plot(fig, "trajectory_3d_plot.png")
-        plt.show()
+        self.show_plot(fig)
 
     def linear_kinematics_data(self):
         """Prints out all Kinematics graphs available about the Flight
@@ -234,7 +379,7 @@ class _MyFlightPlots:
         ax4up.tick_params("y", colors="#1f77b4")
     
         self.save_plot(fig, "linear_kinematics_data.png")
-        plt.show()
+        self.show_plot(fig)
         return None
 
     def attitude_data(self):
@@ -287,7 +432,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "attitude_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -336,7 +481,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "flight_path_angle_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -408,7 +553,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "angular_kinematics_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -495,7 +640,7 @@ class _MyFlightPlots:
             plt.subplots_adjust(hspace=0.5)
 
             self.save_plot(fig, "rail_buttons_forces.png")
-            plt.show()
+            self.show_plot(fig)
         return None
 
     def aerodynamic_forces(self):
@@ -580,7 +725,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "aerodynamic_forces.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -591,9 +736,9 @@ class _MyFlightPlots:
 
         t = self.flight.time  # Array of simulation times
 
-        # Sample thrust power function over time
-        thrust_power_values = np.array([self.flight.thrust_power(ti) for ti in t])
-        drag_power_values   = np.array([self.flight.drag_power(ti) for ti in t])
+        # Sample the power functions over the whole time vector at once
+        thrust_power_values = self.flight.thrust_power.get_value(t)
+        drag_power_values   = self.flight.drag_power.get_value(t)
 
         ax1 = plt.subplot(411)
         ax1.plot(self.flight.kinetic_energy[:, 0], self.flight.kinetic_energy[:, 1], label="Kinetic Energy")
@@ -642,7 +787,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=1)
 
         self.save_plot(fig, "energy_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -711,7 +856,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "fluid_mechanics_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -794,7 +939,7 @@ class _MyFlightPlots:
         plt.subplots_adjust(hspace=0.5)
 
         self.save_plot(fig, "stability_and_control_data.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -818,7 +963,7 @@ class _MyFlightPlots:
         ax1.grid()
         
         self.save_plot(fig, "pressure_rocket_altitude.png")
-        plt.show()
+        self.show_plot(fig)
 
         return None
 
@@ -838,59 +983,164 @@ class _MyFlightPlots:
         None
         """
 
-        if len(self.flight.parachute_events) > 0:
+        if self.apogee_only:
+            print("\nFlight stopped at apogee. No parachute plots available")
+        elif len(self.flight.parachute_events) > 0:
             for parachute in self.flight.rocket.parachutes:
                 print("\nParachute: ", parachute.name)
-                parachute.noise_signal_function()
-                parachute.noisy_pressure_signal_function()
-                parachute.clean_pressure_signal_function()
+                signals = {
+                    "noise_signal": parachute.noise_signal_function,
+                    "noisy_pressure_signal": parachute.noisy_pressure_signal_function,
+                    "clean_pressure_signal": parachute.clean_pressure_signal_function,
+                }
+                for name, signal in signals.items():
+                    if self.headless:
+                        filepath = os.path.join(
+                            self.output_dir, f"{parachute.name}_{name}.png"
+                        )
+                        signal(filename=filepath)
+                        plt.close("all")
+                        self.saved_files.append(filepath)
+                    else:
+                        signal()
         else:
             print("\nRocket has no parachutes. No parachute plots available")
         return None
 
-    def all(self):
+    def all(self, headless=False, workers=None):
         """Prints out all plots available about the Flight.
 
+        Parameters
+        ----------
+        headless : bool, optional
+            If True, nothing is shown: every figure is rendered with the Agg
+            backend, spread over a pool of ``workers`` processes, and saved
+            to ``output_dir``. Needs no display, so it also runs on batch
+            nodes.
+        workers : int, optional
+            Number of rendering processes in headless mode. Defaults to the
+            number of CPUs. Workers are forked where possible. Where they
+            cannot be (Windows, macOS' default), they are spawned and load
+            the flight again from ``source``, reseeding the parachute noise
+            so they fly the very same flight. A worker whose flight still
+            differs from ``flight`` renders nothing; the report is then
+            rendered in this process, with a warning, as it is without a
+            ``source``.
+
         Returns
         -------
-        None
+        list or None
+            Paths of the saved figures, in report order, if headless.
         """
+        if headless:
+            return self._render_headless(workers)
 
-        print("\n\nTrajectory 3d Plot\n")
-        self.trajectory_3d()
+        for title, methods in self.report:
+            print(f"\n\n{title}\n")
+            for method in methods:
+                getattr(self, method)()
 
-        print("\n\nTrajectory Kinematic Plots\n")
-        self.linear_kinematics_data()
+        return None
 
-        print("\n\nAngular Position Plots\n")
-        self.flight_path_angle_data()
+    def _render_headless(self, workers=None):
+        """Renders every report section in parallel and returns the saved paths."""
+        methods = [method for _, sections in self.report for method in sections]
+        os.makedirs(self.output_dir, exist_ok=True)
 
-        print("\n\nPath, Attitude and Lateral Attitude Angle plots\n")
-        self.attitude_data()
+        # Flights hold unpicklable closures, so workers inherit this object by
+        # forking, or load the flight again from its source when spawned
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            initializer, initargs = _init_render_worker, (self,)
+        elif self.source is not None:
+            context = multiprocessing.get_context("spawn")
+            initializer = _init_render_worker_from_source
+            initargs = (self.source, self.output_dir, _flight_fingerprint(self.flight))
+        else:
+            warnings.warn(
+                "Processes cannot be forked on this platform and the plots have no "
+                "source to load the flight from, so the report is rendered serially. "
+                "Pass source=(config_path, sensor_path, seed) to render it in parallel.",
+                RuntimeWarning,
+            )
+            return self._render_serially(methods)
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=initializer,
+                initargs=initargs,
+            ) as executor:
+                rendered = executor.map(_render_section, methods)
+                files = [path for paths in rendered for path in paths]
+        except _FlightMismatch as error:
+            warnings.warn(f"{error} Rendering the report serially.", RuntimeWarning)
+            return self._render_serially(methods)
+
+        self.saved_files.extend(files)
+        return files
+
+    def _render_serially(self, methods):
+        """Renders the report sections in this process and returns the saved paths."""
+        backend = plt.get_backend()
+        _init_render_worker(self)
+        try:
+            return [path for method in methods for path in _render_section(method)]
+        finally:
+            self.headless = False
+            plt.switch_backend(backend)
 
-        print("\n\nTrajectory Angular Velocity and Acceleration Plots\n")
-        self.angular_kinematics_data()
 
-        print("\n\nAerodynamic Forces Plots\n")
-        self.aerodynamic_forces()
+class _FlightMismatch(RuntimeError):
+    """Raised by spawned render workers whose reloaded flight is not the caller's."""
 
-        print("\n\nRail Buttons Forces Plots\n")
-        self.rail_buttons_forces()
 
-        print("\n\nTrajectory Energy Plots\n")
-        self.energy_data()
+def _flight_fingerprint(flight):
+    """Final time and state of ``flight``, equal only for identical flights."""
+    return tuple(float(value) for value in flight.solution[-1])
 
-        print("\n\nTrajectory Fluid Mechanics Plots\n")
-        self.fluid_mechanics_data()
 
-        print("\n\nTrajectory Stability and Control Plots\n")
-        self.stability_and_control_data()
+# Report being rendered by this process, set by _init_render_worker
+_render_plots = None
 
-        print("\n\nRocket and Parachute Pressure Plots\n")
-        self.pressure_rocket_altitude()
-        self.pressure_signals()
 
-        return None
+def _init_render_worker(plots):
+    global _render_plots
+    plt.switch_backend("Agg")
+    warnings.filterwarnings("ignore", category=UserWarning)
+    plots.headless = True
+    _render_plots = plots
+
+
+def _init_render_worker_from_source(source, output_dir, fingerprint):
+    """Spawned worker: loads the flight again, as the parent process did."""
+    global _render_plots
+    warnings.filterwarnings("ignore", category=UserWarning)
+    config_path, sensor_path, *seed = source
+    if seed and seed[0] is not None:
+        np.random.seed(seed[0])
+    _, motor, _, flight, _, _, _ = load_flight_from_json(config_path, sensor_path)
+    if _flight_fingerprint(flight) != fingerprint:
+        # Rendering it would mix figures of two different flights
+        _render_plots = None
+        return
+    plots = _MyFlightPlots(flight, motor, source)
+    plots.output_dir = output_dir
+    _init_render_worker(plots)
+
+
+def _render_section(method):
+    """Renders one report section and returns the paths it saved."""
+    if _render_plots is None:
+        raise _FlightMismatch(
+            "The flight loaded again from the plots' source differs from the one "
+            "being plotted; pass the seed it was loaded with in source."
+        )
+    start = len(_render_plots.saved_files)
+    getattr(_render_plots, method)()
+    return _render_plots.saved_files[start:]
+
 
 def plot_mass_vs_apogee(csv_file, target=3000):
     """
@@ -908,7 +1158,10 @@ def plot_mass_vs_apogee(csv_file, target=3000):
     # Ensure expected columns exist
     if 'Mass (kg)' not in data.columns or 'Apogee (m)' not in data.columns:
         raise ValueError("CSV must contain 'Mass (kg)' and 'Apogee (m)' columns.")
-    
+
+    # Sweeps write rows as flights finish, not in mass order
+    data = data.sort_values('Mass (kg)')
+
     masses = data['Mass (kg)'].tolist()
     apogees = data['Apogee (m)'].tolist()
     
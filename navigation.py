@@ -0,0 +1,720 @@
+"""Error-state Kalman filter fed directly from the simulated sensors.
+
+Python port of the navigation filter in ``KF/`` (``KFtest.m``,
+``KF_predict.m``, ``KF_update.m``). It takes the accelerometer, gyroscope,
+barometer and GNSS objects returned by ``load_flight_from_json`` in memory,
+so a filter run needs no export/import round trip, and returns the
+estimates next to the truth of the ``Flight``.
+
+The nominal state is position and velocity in the local east-north-up frame
+of the launch site, the body-to-ENU attitude quaternion (scalar first, as
+``e0..e3`` in rocketpy) and the accelerometer and gyroscope biases. The 15
+error states are ``[dp, dv, dtheta, dba, dbg]`` with ``dtheta`` a small
+rotation in the body frame. The IMU drives the prediction, and GNSS
+position and barometric height are fused whenever a sample shares a time
+stamp with the IMU.
+
+``BatchedErrorStateKalmanFilter`` advances many such filters in lockstep,
+with stacked ``(m, 15, 15)`` covariances, for tuning sweeps over parameter
+sets, flights or noise realisations.
+
+Usage
+-----
+    python navigation.py --config rocket.json --sensors sensors.json
+    python navigation.py --sweep gyro_noise=1e-3,1e-2,1e-1 --sweep accel_noise=0.1,0.5,2
+"""
+import argparse
+import math
+import warnings
+
+import numpy as np
+
+from load_flight_from_json import load_flight_from_json
+from resampling import Resampler
+from sweep import parameter_grid
+
+# Process noise follows the IMU of sensors.json with margin for quantization
+# and lever-arm effects. The much looser values of KF/KFtest.m (5.5 m/s^2,
+# 0.11 rad/s, 1 rad/s initial gyro bias) let the roll angle, which position
+# fixes barely observe, drift away. Measurement noise matches the simulated
+# GNSS and the 130 Pa resolution of the barometer.
+DEFAULT_PARAMETERS = {
+    "accel_noise": 0.5,  # m/s^2/sqrt(Hz)
+    "gyro_noise": 1e-2,  # rad/s/sqrt(Hz)
+    "accel_bias_walk": 1e-2,  # m/s^2*sqrt(Hz)
+    "gyro_bias_walk": 1e-4,  # rad/s*sqrt(Hz)
+    "gnss_position_std": 2.0,  # m
+    "baro_std": 5.0,  # m
+    "initial_position_std": 20.0,  # m
+    "initial_velocity_std": 0.5,  # m/s
+    "initial_attitude_std": math.radians(5),  # rad
+    "initial_accel_bias_std": 0.2,  # m/s^2
+    "initial_gyro_bias_std": 0.01,  # rad/s
+    "gravity": 9.81,  # m/s^2
+}
+
+
+def _initial_variances(p):
+    """Diagonal of the initial error-state covariance, ``(15,)``."""
+    return np.repeat(
+        [
+            p["initial_position_std"],
+            p["initial_velocity_std"],
+            p["initial_attitude_std"],
+            p["initial_accel_bias_std"],
+            p["initial_gyro_bias_std"],
+        ],
+        3,
+    ) ** 2
+
+
+def _process_noise(p):
+    """Continuous noise of [accel, gyro, accel bias walk, gyro bias walk],
+    injected into [dv, dtheta, dba, dbg] (the G matrix of KF_predict.m)."""
+    return np.repeat(
+        [p["accel_noise"], p["gyro_noise"], p["accel_bias_walk"], p["gyro_bias_walk"]], 3
+    ) ** 2
+
+
+def skew(w):
+    """Cross product matrix, ``skew(w) @ v == np.cross(w, v)``."""
+    return np.array([[0, -w[2], w[1]], [w[2], 0, -w[0]], [-w[1], w[0], 0]])
+
+
+def quaternion_to_matrix(q):
+    """Body-to-ENU rotation of scalar-first quaternions, ``KF/math/Ratt.m``.
+
+    ``q`` has shape ``(4,)`` or ``(n, 4)``, the result ``(3, 3)`` or
+    ``(n, 3, 3)``.
+    """
+    q = np.asarray(q, dtype=float)
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    matrix = np.array(
+        [
+            [w * w + x * x - y * y - z * z, 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), w * w - x * x + y * y - z * z, 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), w * w - x * x - y * y + z * z],
+        ]
+    )
+    return matrix if q.ndim == 1 else np.moveaxis(matrix, (0, 1), (-2, -1))
+
+
+def quaternion_multiply(p, q):
+    """Hamilton product ``p * q`` of scalar-first quaternions, ``KF/math/quatmulti.m``."""
+    pw, px, py, pz = p
+    qw, qx, qy, qz = q
+    return np.array(
+        [
+            pw * qw - px * qx - py * qy - pz * qz,
+            pw * qx + px * qw + py * qz - pz * qy,
+            pw * qy - px * qz + py * qw + pz * qx,
+            pw * qz + px * qy - py * qx + pz * qw,
+        ]
+    )
+
+
+def rotation_quaternion(rotation):
+    """Quaternion of a rotation vector (rad)."""
+    angle = math.sqrt(rotation @ rotation)
+    if angle < 1e-12:
+        return np.array([1.0, *(0.5 * rotation)])
+    return np.array([math.cos(angle / 2), *(math.sin(angle / 2) / angle * rotation)])
+
+
+def barometric_height(pressure, env, ceiling=10000):
+    """Height above ground (m) of pressures (Pa) in the atmosphere of ``env``.
+
+    Inverts the launch-site pressure profile, known before flight, rather
+    than the standard atmosphere of ``KF/physics/std_atmosphere_model.m``,
+    which is off by up to ~170 m against the reanalysis atmospheres the
+    flights are simulated in. Layers where the profile is not strictly
+    decreasing are skipped, so such a layer maps to its lowest height.
+    """
+    heights = np.linspace(0, ceiling, int(ceiling) + 1)
+    profile = env.pressure.get_value(heights + env.elevation)
+    decreasing = profile < np.minimum.accumulate(np.append(np.inf, profile[:-1]))
+    return np.interp(pressure, profile[decreasing][::-1], heights[decreasing][::-1])
+
+
+def gnss_to_local(latitude, longitude, altitude, env):
+    """GNSS fixes as east, north, up (m) from the launch site of ``env``.
+
+    Inverts the spherical-earth haversine model rocketpy's ``GnssReceiver``
+    uses, so simulated fixes map back onto the flight's x, y and z above
+    ground level.
+    """
+    lat0, lon0 = math.radians(env.latitude), math.radians(env.longitude)
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    d_lat, d_lon = lat - lat0, lon - lon0
+
+    a = np.sin(d_lat / 2) ** 2 + math.cos(lat0) * np.cos(lat) * np.sin(d_lon / 2) ** 2
+    distance = 2 * env.earth_radius * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    bearing = np.arctan2(
+        np.sin(d_lon) * np.cos(lat),
+        math.cos(lat0) * np.sin(lat) - math.sin(lat0) * np.cos(lat) * np.cos(d_lon),
+    )
+    return np.column_stack(
+        [distance * np.sin(bearing), distance * np.cos(bearing), altitude - env.elevation]
+    )
+
+
+class ErrorStateKalmanFilter:
+    """15-state error-state Kalman filter of an IMU aided by position fixes.
+
+    Attributes
+    ----------
+    ErrorStateKalmanFilter.position, ErrorStateKalmanFilter.velocity : numpy.ndarray
+        Nominal position (m) and velocity (m/s) in ENU.
+    ErrorStateKalmanFilter.attitude : numpy.ndarray
+        Body-to-ENU quaternion, scalar first.
+    ErrorStateKalmanFilter.accel_bias, ErrorStateKalmanFilter.gyro_bias : numpy.ndarray
+        Estimated sensor biases, in the body frame.
+    ErrorStateKalmanFilter.covariance : numpy.ndarray
+        ``(15, 15)`` covariance of the error state.
+    """
+
+    def __init__(self, position, velocity, attitude, parameters=None, gravity_in_accel=False):
+        p = {**DEFAULT_PARAMETERS, **(parameters or {})}
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.array(velocity, dtype=float)
+        self.attitude = np.array(attitude, dtype=float) / np.linalg.norm(attitude)
+        self.accel_bias = np.zeros(3)
+        self.gyro_bias = np.zeros(3)
+        self.covariance = np.diag(_initial_variances(p))
+        self._noise = _process_noise(p)
+        # rocketpy accelerometers measure kinematic acceleration unless they
+        # consider gravity, in which case gravity has to be added back
+        self._gravity = np.array([0, 0, p["gravity"]]) if gravity_in_accel else np.zeros(3)
+        self._transition = np.eye(15)
+        self._diagonal = np.arange(15)
+
+    def predict(self, accel, gyro, dt):
+        """Propagates the state with one IMU sample (body frame) over ``dt``."""
+        a = accel - self.accel_bias
+        w = gyro - self.gyro_bias
+        rotation = quaternion_to_matrix(self.attitude)
+        acceleration = rotation @ a + self._gravity
+
+        self.position += self.velocity * dt + acceleration * dt**2 / 2
+        self.velocity += acceleration * dt
+        attitude = quaternion_multiply(self.attitude, rotation_quaternion(w * dt))
+        self.attitude = attitude / math.sqrt(attitude @ attitude)
+
+        # First-order transition I + F dt, filled in place; the identity
+        # blocks only need their diagonals
+        phi = self._transition
+        i = self._diagonal[:3]
+        phi[i, i + 3] = dt
+        phi[3:6, 6:9] = -rotation @ skew(a) * dt
+        phi[3:6, 9:12] = -rotation * dt
+        phi[6:9, 6:9] = -skew(w) * dt
+        phi[i + 6, i + 6] = 1
+        phi[i + 6, i + 12] = -dt
+
+        covariance = phi @ self.covariance @ phi.T
+        covariance[self._diagonal[3:], self._diagonal[3:]] += self._noise * dt
+        self.covariance = covariance
+
+    def update(self, residual, observation, noise):
+        """Fuses a measurement, residual ``z - h(x)``, with Joseph-form covariance.
+
+        Parameters
+        ----------
+        residual : numpy.ndarray
+            Measurement minus its prediction, shape ``(m,)``.
+        observation : numpy.ndarray
+            ``(m, 15)`` Jacobian of the measurement w.r.t. the error state.
+        noise : numpy.ndarray
+            ``(m,)`` measurement variances.
+
+        Returns
+        -------
+        numpy.ndarray
+            The injected error state ``(15,)``.
+        """
+        P, H = self.covariance, observation
+        PHt = P @ H.T
+        innovation = H @ PHt
+        innovation[np.diag_indices_from(innovation)] += noise
+        gain = np.linalg.solve(innovation, PHt.T).T
+        error = gain @ residual
+
+        self.position += error[0:3]
+        self.velocity += error[3:6]
+        attitude = quaternion_multiply(self.attitude, rotation_quaternion(error[6:9]))
+        self.attitude = attitude / math.sqrt(attitude @ attitude)
+        self.accel_bias += error[9:12]
+        self.gyro_bias += error[12:15]
+
+        joseph = -gain @ H
+        joseph[self._diagonal, self._diagonal] += 1
+        self.covariance = joseph @ P @ joseph.T + (gain * noise) @ gain.T
+        return error
+
+
+def _stacked_parameters(parameters, count):
+    """One full parameter dict per filter from None, a dict shared by all
+    filters or a sequence of ``count`` dicts."""
+    if parameters is None or isinstance(parameters, dict):
+        parameters = [parameters] * count
+    if len(parameters) != count:
+        raise ValueError(f"Expected {count} parameter sets, got {len(parameters)}.")
+    return [{**DEFAULT_PARAMETERS, **(p or {})} for p in parameters]
+
+
+def _skews(w):
+    """Cross product matrices of ``(m, 3)`` vectors, ``(m, 3, 3)``."""
+    s = np.zeros(w.shape[:-1] + (3, 3))
+    s[..., 0, 1], s[..., 0, 2] = -w[..., 2], w[..., 1]
+    s[..., 1, 0], s[..., 1, 2] = w[..., 2], -w[..., 0]
+    s[..., 2, 0], s[..., 2, 1] = -w[..., 1], w[..., 0]
+    return s
+
+
+def _rotation_quaternions(rotation):
+    """Quaternions of ``(m, 3)`` rotation vectors, ``(m, 4)``."""
+    angle = np.sqrt(np.einsum("ij,ij->i", rotation, rotation))
+    # sin(angle / 2) / angle, without dividing by zero for null rotations
+    scale = 0.5 * np.sinc(angle / (2 * np.pi))
+    return np.column_stack([np.cos(angle / 2), scale[:, None] * rotation])
+
+
+class BatchedErrorStateKalmanFilter:
+    """``m`` independent ``ErrorStateKalmanFilter`` advanced in lockstep.
+
+    Every state is stacked along a leading axis of length ``m`` and the
+    covariances into one ``(m, 15, 15)`` array, so a step of all filters is
+    a handful of array operations whatever ``m`` is. Each filter may have
+    its own parameters, time step and measurements.
+
+    Attributes
+    ----------
+    BatchedErrorStateKalmanFilter.position, BatchedErrorStateKalmanFilter.velocity : numpy.ndarray
+        ``(m, 3)`` nominal positions (m) and velocities (m/s) in ENU.
+    BatchedErrorStateKalmanFilter.attitude : numpy.ndarray
+        ``(m, 4)`` body-to-ENU quaternions, scalar first.
+    BatchedErrorStateKalmanFilter.accel_bias, BatchedErrorStateKalmanFilter.gyro_bias : numpy.ndarray
+        ``(m, 3)`` estimated sensor biases, in the body frame.
+    BatchedErrorStateKalmanFilter.covariance : numpy.ndarray
+        ``(m, 15, 15)`` covariances of the error states.
+    """
+
+    def __init__(self, position, velocity, attitude, parameters=None, gravity_in_accel=False):
+        attitude = np.array(attitude, dtype=float)
+        count = len(attitude)
+        stacked = _stacked_parameters(parameters, count)
+        self.position = np.array(np.broadcast_to(position, (count, 3)), dtype=float)
+        self.velocity = np.array(np.broadcast_to(velocity, (count, 3)), dtype=float)
+        self.attitude = attitude / np.linalg.norm(attitude, axis=1, keepdims=True)
+        self.accel_bias = np.zeros((count, 3))
+        self.gyro_bias = np.zeros((count, 3))
+
+        self._diagonal = np.arange(15)
+        self.covariance = np.zeros((count, 15, 15))
+        self.covariance[:, self._diagonal, self._diagonal] = [
+            _initial_variances(p) for p in stacked
+        ]
+        self._noise = np.array([_process_noise(p) for p in stacked])
+        self._gravity = np.zeros((count, 3))
+        self._gravity[:, 2] = np.where(
+            np.broadcast_to(gravity_in_accel, count), [p["gravity"] for p in stacked], 0.0
+        )
+        self._transition = np.tile(np.eye(15), (count, 1, 1))
+
+    def predict(self, accel, gyro, dt):
+        """Propagates every filter with one IMU sample each.
+
+        ``accel`` and ``gyro`` are ``(m, 3)`` in the body frame and ``dt`` is
+        ``(m,)``; a filter given ``dt == 0`` is left unchanged.
+        """
+        a = accel - self.accel_bias
+        w = gyro - self.gyro_bias
+        rotation = quaternion_to_matrix(self.attitude)
+        acceleration = np.einsum("mij,mj->mi", rotation, a) + self._gravity
+
+        step = dt[:, None]
+        self.position += self.velocity * step + acceleration * step**2 / 2
+        self.velocity += acceleration * step
+        attitude = quaternion_multiply(self.attitude.T, _rotation_quaternions(w * step).T).T
+        self.attitude = attitude / np.linalg.norm(attitude, axis=1, keepdims=True)
+
+        phi = self._transition
+        block = dt[:, None, None]
+        i = self._diagonal[:3]
+        phi[:, i, i + 3] = step
+        phi[:, 3:6, 6:9] = -(rotation @ _skews(a)) * block
+        phi[:, 3:6, 9:12] = -rotation * block
+        phi[:, 6:9, 6:9] = -_skews(w) * block
+        phi[:, i + 6, i + 6] = 1
+        phi[:, i + 6, i + 12] = -step
+
+        covariance = phi @ self.covariance @ phi.transpose(0, 2, 1)
+        covariance[:, self._diagonal[3:], self._diagonal[3:]] += self._noise * step
+        self.covariance = covariance
+
+    def update(self, residual, observation, noise, active=None):
+        """Fuses one measurement into each of the ``active`` filters.
+
+        Parameters
+        ----------
+        residual : numpy.ndarray
+            ``(k, m)`` measurement minus prediction, one row per active filter.
+        observation : numpy.ndarray
+            ``(m, 15)`` Jacobian shared by the filters.
+        noise : numpy.ndarray
+            ``(k, m)`` measurement variances.
+        active : numpy.ndarray, optional
+            Indices of the ``k`` filters being updated, all by default.
+
+        Returns
+        -------
+        numpy.ndarray
+            The injected error states ``(k, 15)``.
+        """
+        rows = slice(None) if active is None else active
+        P, H = self.covariance[rows], observation
+        PHt = P @ H.T
+        innovation = H @ PHt
+        d = np.arange(len(H))
+        innovation[:, d, d] += noise
+        gain = np.linalg.solve(innovation, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)
+        error = np.einsum("kij,kj->ki", gain, residual)
+
+        self.position[rows] += error[:, 0:3]
+        self.velocity[rows] += error[:, 3:6]
+        attitude = quaternion_multiply(
+            self.attitude[rows].T, _rotation_quaternions(error[:, 6:9]).T
+        ).T
+        self.attitude[rows] = attitude / np.linalg.norm(attitude, axis=1, keepdims=True)
+        self.accel_bias[rows] += error[:, 9:12]
+        self.gyro_bias[rows] += error[:, 12:15]
+
+        joseph = -gain @ H
+        joseph[:, self._diagonal, self._diagonal] += 1
+        self.covariance[rows] = (
+            joseph @ P @ joseph.transpose(0, 2, 1)
+            + (gain * noise[:, None, :]) @ gain.transpose(0, 2, 1)
+        )
+        return error
+
+
+def _matching_indices(times, reference):
+    """Index into ``times`` of the sample at each ``reference`` time, or -1."""
+    index = np.clip(np.searchsorted(times, reference - 1e-9), 0, len(times) - 1)
+    return np.where(np.abs(times[index] - reference) < 1e-9, index, -1)
+
+
+def _sensor_inputs(flight, accelerometer, gyroscope, barometer, gnss):
+    """Filter inputs of one flight: IMU in the body frame, fixes in ENU and
+    the index of the fix at each IMU sample (-1 where there is none)."""
+    env = flight.env
+    accel = np.asarray(accelerometer.measured_data, dtype=float)
+    gyro = np.asarray(gyroscope.measured_data, dtype=float)
+    if not np.array_equal(accel[:, 0], gyro[:, 0]):
+        raise ValueError("The accelerometer and gyroscope must be sampled at the same times.")
+    t = accel[:, 0]
+
+    baro = np.asarray(barometer.measured_data, dtype=float)
+    fixes = np.asarray(gnss.measured_data, dtype=float)
+    return {
+        "t": t,
+        # Sensor frame to body frame, all samples at once
+        "accel": accel[:, 1:] @ np.asarray(accelerometer.rotation_sensor_to_body, dtype=float),
+        "gyro": gyro[:, 1:] @ np.asarray(gyroscope.rotation_sensor_to_body, dtype=float),
+        "baro_height": barometric_height(baro[:, 1], env),
+        "baro_index": _matching_indices(baro[:, 0], t),
+        "gnss_position": gnss_to_local(fixes[:, 1], fixes[:, 2], fixes[:, 3], env),
+        "gnss_index": _matching_indices(fixes[:, 0], t),
+        # Launch rail attitude and pad position are known before lift-off
+        "attitude": np.asarray(flight.solution[0][7:11], dtype=float),
+        "gravity_in_accel": accelerometer.consider_gravity,
+    }
+
+
+def _truth(flight, t):
+    """Position above ground, velocity and attitude of ``flight`` at ``t``."""
+    solution = np.asarray(flight.solution)
+    truth = Resampler(solution[:, 0], t)(solution[:, 1:11])
+    truth[:, 2] -= flight.env.elevation
+    attitude = truth[:, 6:10] / np.linalg.norm(truth[:, 6:10], axis=1, keepdims=True)
+    return {"position": truth[:, 0:3], "velocity": truth[:, 3:6], "attitude": attitude}
+
+
+def _measurement_models(p):
+    """Observation matrices and variances of GNSS, baro and both at once."""
+    H_gnss = np.hstack([np.eye(3), np.zeros((3, 12))])
+    H_baro = np.zeros((1, 15))
+    H_baro[0, 2] = 1
+    R_gnss = np.full(3, p["gnss_position_std"] ** 2)
+    R_baro = np.array([p["baro_std"] ** 2])
+    return {
+        "gnss": (H_gnss, R_gnss),
+        "baro": (H_baro, R_baro),
+        "both": (np.vstack([H_gnss, H_baro]), np.concatenate([R_gnss, R_baro])),
+    }
+
+
+def run_navigation(flight, accelerometer, gyroscope, barometer, gnss, parameters=None):
+    """Runs the filter over the sensor records of a simulated flight.
+
+    Parameters
+    ----------
+    flight : Flight
+        Flight the sensors were attached to. Only its launch attitude and
+        site are given to the filter; the rest is used as truth.
+    accelerometer, gyroscope, barometer, gnss : Sensor
+        rocketpy sensors holding ``measured_data``.
+    parameters : dict, optional
+        Overrides of ``DEFAULT_PARAMETERS``.
+
+    Returns
+    -------
+    dict
+        ``t`` and the estimated ``position``, ``velocity``, ``attitude``,
+        ``accel_bias``, ``gyro_bias`` and ``std`` (error-state standard
+        deviations, ``(n, 15)``) arrays, plus ``truth``, a dict of the
+        flight's ``position``, ``velocity`` and ``attitude`` at ``t``.
+    """
+    p = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    inputs = _sensor_inputs(flight, accelerometer, gyroscope, barometer, gnss)
+    t, accel_body, gyro_body = inputs["t"], inputs["accel"], inputs["gyro"]
+    gnss_position, gnss_index = inputs["gnss_position"], inputs["gnss_index"]
+    baro_height, baro_index = inputs["baro_height"], inputs["baro_index"]
+
+    kf = ErrorStateKalmanFilter(
+        [0, 0, 0], [0, 0, 0], inputs["attitude"], p, gravity_in_accel=inputs["gravity_in_accel"]
+    )
+    models = _measurement_models(p)
+    H_gnss, R_gnss = models["gnss"]
+    H_baro, R_baro = models["baro"]
+    H_both, R_both = models["both"]
+
+    n = len(t)
+    estimate = {
+        "position": np.empty((n, 3)),
+        "velocity": np.empty((n, 3)),
+        "attitude": np.empty((n, 4)),
+        "accel_bias": np.empty((n, 3)),
+        "gyro_bias": np.empty((n, 3)),
+        "std": np.empty((n, 15)),
+    }
+
+    for k in range(n):
+        if k > 0:
+            kf.predict(accel_body[k - 1], gyro_body[k - 1], t[k] - t[k - 1])
+
+        g, b = gnss_index[k], baro_index[k]
+        if g >= 0 and b >= 0:
+            residual = np.append(gnss_position[g] - kf.position, baro_height[b] - kf.position[2])
+            kf.update(residual, H_both, R_both)
+        elif g >= 0:
+            kf.update(gnss_position[g] - kf.position, H_gnss, R_gnss)
+        elif b >= 0:
+            kf.update(np.array([baro_height[b] - kf.position[2]]), H_baro, R_baro)
+
+        estimate["position"][k] = kf.position
+        estimate["velocity"][k] = kf.velocity
+        estimate["attitude"][k] = kf.attitude
+        estimate["accel_bias"][k] = kf.accel_bias
+        estimate["gyro_bias"][k] = kf.gyro_bias
+        estimate["std"][k] = np.sqrt(np.diag(kf.covariance))
+
+    return {"t": t, **estimate, "truth": _truth(flight, t)}
+
+
+def _padded(arrays, fill):
+    """Stacks arrays of different lengths, padding their ends with ``fill``
+    or, for ``fill=None``, with their last value."""
+    length = max(len(x) for x in arrays)
+    out = np.empty((len(arrays), length) + arrays[0].shape[1:], dtype=arrays[0].dtype)
+    for row, x in zip(out, arrays):
+        row[: len(x)] = x
+        row[len(x) :] = x[-1] if fill is None else fill
+    return out
+
+
+def run_navigation_batch(runs, parameters=None):
+    """Runs many filters over many flights in lockstep.
+
+    Parameters
+    ----------
+    runs : list of tuple
+        ``(flight, accelerometer, gyroscope, barometer, gnss)`` of each
+        filter, as given to ``run_navigation``. A single run is shared by
+        every parameter set, e.g. to sweep the tuning on one flight.
+    parameters : dict or list of dict, optional
+        Overrides of ``DEFAULT_PARAMETERS``, one dict shared by all runs or
+        one per run.
+
+    Returns
+    -------
+    dict
+        The arrays of ``run_navigation`` stacked along a leading axis of
+        one row per filter, including ``truth``. Runs shorter than the
+        longest hold their last sample, ``samples`` gives their lengths.
+    """
+    if parameters is not None and not isinstance(parameters, dict) and len(runs) == 1:
+        runs = list(runs) * len(parameters)
+    stacked = _stacked_parameters(parameters, len(runs))
+
+    # Inputs and truth are computed once per distinct run
+    prepared = {}
+    for run in runs:
+        if id(run) not in prepared:
+            inputs = _sensor_inputs(*run)
+            prepared[id(run)] = (inputs, _truth(run[0], inputs["t"]))
+    inputs = [prepared[id(run)][0] for run in runs]
+    truths = [prepared[id(run)][1] for run in runs]
+
+    samples = np.array([len(x["t"]) for x in inputs])
+    t = _padded([x["t"] for x in inputs], None)
+    accel_body = _padded([x["accel"] for x in inputs], 0.0)
+    gyro_body = _padded([x["gyro"] for x in inputs], 0.0)
+    gnss_position = _padded([x["gnss_position"] for x in inputs], 0.0)
+    gnss_index = _padded([x["gnss_index"] for x in inputs], -1)
+    baro_height = _padded([x["baro_height"] for x in inputs], 0.0)
+    baro_index = _padded([x["baro_index"] for x in inputs], -1)
+
+    kf = BatchedErrorStateKalmanFilter(
+        np.zeros(3),
+        np.zeros(3),
+        [x["attitude"] for x in inputs],
+        stacked,
+        gravity_in_accel=[x["gravity_in_accel"] for x in inputs],
+    )
+    models = [_measurement_models(p) for p in stacked]
+    H_gnss, H_baro, H_both = (models[0][key][0] for key in ("gnss", "baro", "both"))
+    R_gnss, R_baro, R_both = (
+        np.array([m[key][1] for m in models]) for key in ("gnss", "baro", "both")
+    )
+
+    count, n = t.shape
+    estimate = {
+        "position": np.empty((count, n, 3)),
+        "velocity": np.empty((count, n, 3)),
+        "attitude": np.empty((count, n, 4)),
+        "accel_bias": np.empty((count, n, 3)),
+        "gyro_bias": np.empty((count, n, 3)),
+        "std": np.empty((count, n, 15)),
+    }
+
+    for k in range(n):
+        if k > 0:
+            kf.predict(accel_body[:, k - 1], gyro_body[:, k - 1], t[:, k] - t[:, k - 1])
+
+        g, b = gnss_index[:, k], baro_index[:, k]
+        has_gnss, has_baro = g >= 0, b >= 0
+        if has_gnss.any() or has_baro.any():
+            both = np.flatnonzero(has_gnss & has_baro)
+            gnss_only = np.flatnonzero(has_gnss & ~has_baro)
+            baro_only = np.flatnonzero(has_baro & ~has_gnss)
+            if len(both):
+                residual = np.column_stack(
+                    [
+                        gnss_position[both, g[both]] - kf.position[both],
+                        baro_height[both, b[both]] - kf.position[both, 2],
+                    ]
+                )
+                kf.update(residual, H_both, R_both[both], both)
+            if len(gnss_only):
+                residual = gnss_position[gnss_only, g[gnss_only]] - kf.position[gnss_only]
+                kf.update(residual, H_gnss, R_gnss[gnss_only], gnss_only)
+            if len(baro_only):
+                residual = baro_height[baro_only, b[baro_only]] - kf.position[baro_only, 2]
+                kf.update(residual[:, None], H_baro, R_baro[baro_only], baro_only)
+
+        estimate["position"][:, k] = kf.position
+        estimate["velocity"][:, k] = kf.velocity
+        estimate["attitude"][:, k] = kf.attitude
+        estimate["accel_bias"][:, k] = kf.accel_bias
+        estimate["gyro_bias"][:, k] = kf.gyro_bias
+        estimate["std"][:, k] = np.sqrt(np.diagonal(kf.covariance, axis1=1, axis2=2))
+
+    truth = {key: _padded([x[key] for x in truths], None) for key in truths[0]}
+    return {"t": t, **estimate, "truth": truth, "samples": samples}
+
+
+def attitude_error(estimate, truth):
+    """Angle (rad) between estimated and true attitude quaternions."""
+    dot = np.abs(np.sum(estimate * truth, axis=1))
+    return 2 * np.arccos(np.clip(dot, 0, 1))
+
+
+def navigation_errors(result, ascent_end=np.inf):
+    """RMS and maximum errors of one filter run against its truth.
+
+    Attitude is only compared up to ``ascent_end``: rocketpy freezes the
+    attitude of the solution once a parachute opens while the gyroscope
+    keeps measuring, so attitude truth ends there.
+
+    Returns
+    -------
+    dict
+        Maps ``"position"`` (m), ``"velocity"`` (m/s) and ``"attitude"``
+        (deg) to ``(rms, max)``.
+    """
+    truth = result["truth"]
+    ascent = result["t"] <= ascent_end
+    errors = {
+        "position": np.linalg.norm(result["position"] - truth["position"], axis=1),
+        "velocity": np.linalg.norm(result["velocity"] - truth["velocity"], axis=1),
+        "attitude": np.degrees(
+            attitude_error(result["attitude"][ascent], truth["attitude"][ascent])
+        ),
+    }
+    return {name: (np.sqrt(np.mean(e**2)), np.max(e)) for name, e in errors.items()}
+
+
+def _parse_sweep(argument):
+    name, values = argument.split("=", 1)
+    if name not in DEFAULT_PARAMETERS:
+        raise argparse.ArgumentTypeError(f"Unknown filter parameter '{name}'.")
+    return name, [float(v) for v in values.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument(
+        "--sweep",
+        type=_parse_sweep,
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2,...",
+        help="Filter parameter values to run in one batch, repeat for a grid.",
+    )
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+    _, _, _, flight, three_axis_sensors, baro, gps = load_flight_from_json(args.config, args.sensors)
+    # Same sensors KF/KFtest.m uses: the IMU accelerometer and gyroscope
+    _, imu_accel, imu_gyro = three_axis_sensors
+    run = (flight, imu_accel, imu_gyro, baro, gps)
+    ascent_end = flight.parachute_events[0][0] if flight.parachute_events else flight.t_final
+
+    if not args.sweep:
+        result = run_navigation(*run)
+        print(f"Samples: {len(result['t'])}")
+        units = {"position": "m", "velocity": "m/s", "attitude": "deg"}
+        for name, (rms, peak) in navigation_errors(result, ascent_end).items():
+            label = f"{name.capitalize()}{' (ascent)' if name == 'attitude' else ''}"
+            print(f"{label} error: RMS {rms:.2f} {units[name]}, max {peak:.2f} {units[name]}")
+        return
+
+    grid = parameter_grid(dict(args.sweep))
+    batch = run_navigation_batch([run], grid)
+    print(", ".join(list(grid[0]) + ["position RMS", "velocity RMS", "attitude RMS"]))
+    for i, point in enumerate(grid):
+        result = {key: value[i] for key, value in batch.items() if key != "truth"}
+        result["truth"] = {key: value[i] for key, value in batch["truth"].items()}
+        errors = navigation_errors(result, ascent_end)
+        print(
+            ", ".join(f"{v:g}" for v in point.values())
+            + f", {errors['position'][0]:.2f}, {errors['velocity'][0]:.2f}, "
+            f"{errors['attitude'][0]:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
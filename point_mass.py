@@ -0,0 +1,566 @@
+"""Vectorised 3-DOF point-mass flights for screening designs.
+
+A full rocketpy ``Flight`` integrates six degrees of freedom, one trajectory
+at a time, and takes seconds per flight. Screening thousands of designs for
+apogee or drift only needs the trajectory of the centre of mass.
+``PointMassModel`` samples what that needs from the same rocketpy objects
+``load_flight_from_config`` builds (thrust and mass curves, power-on and
+power-off drag curves, the Environment's density, speed of sound, wind and
+gravity profiles, rail and parachutes) onto regular grids, then advances
+every trajectory at once as rows of NumPy arrays with a fixed-step RK4.
+
+The model follows the phases of ``Flight``:
+
+- rail: thrust, drag and gravity projected on the rail, until the upper rail
+  button leaves it (``Flight.effective_1rl``);
+- free flight: zero angle of attack, so thrust is along the airspeed and drag
+  against it, power-on drag until burnout;
+- parachutes: ``Flight.u_dot_parachute`` with the added mass of the canopy,
+  each parachute deploying ``lag`` seconds after its trigger (``"apogee"``
+  or a height above ground while descending). Trigger noise and sampling
+  are not modelled.
+
+Neither the attitude dynamics nor the weathercocking transient after the rail
+are modelled, so the apogee and drift differ from ``Flight``. ``main``
+reports by how much for the reference flight, and optionally for a
+dispersion set, before the model is trusted with a screening.
+
+Usage
+-----
+    model = PointMassModel.from_configs([apply_overrides(config, o) for o in designs], config_sensor)
+    summary = model.simulate(terminate_on_apogee=True)   # SUMMARY_COLUMNS -> arrays
+
+    python point_mass.py --dt 0.02,0.01,0.05 --runs 16
+"""
+import argparse
+import json
+import math
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from load_flight_from_json import apply_overrides, load_flight_from_config
+from monte_carlo import SUMMARY_COLUMNS, campaign_runs, run_dispersed
+from resampling import bracket, brackets, uniform_step
+from sampling import SAMPLING_METHODS
+from worker_pool import init_worker
+
+# Grids the model samples its inputs on: heights above ground level (m),
+# Mach numbers and the time step of the thrust and mass curves (s)
+MODEL_HEIGHTS = np.arange(0, 10001, 10.0)
+MODEL_MACHS = np.arange(0, 3.001, 0.01)
+MOTOR_TIME_STEP = 0.01
+
+# rocketpy Environment profiles sampled by PointMassModel.atmosphere
+ATMOSPHERE_CHANNELS = ("density", "speed_of_sound", "wind_velocity_x", "wind_velocity_y", "gravity")
+
+# Trajectory phases
+RAIL, FREE_FLIGHT, PARACHUTE, DONE = range(4)
+
+
+class _Table:
+    """Curves on a shared axis, one row per trajectory or one for all.
+
+    ``values`` has shape ``(rows, len(axis), channels)``: curves sharing an
+    axis are stacked as channels and bracketed once per lookup. Evenly
+    spaced axes, the usual case, are bracketed inline.
+    """
+
+    def __init__(self, axis, values):
+        self.axis = np.asarray(axis, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self._axis = self.axis.tolist()
+        self._uniform = uniform_step(self.axis)
+        self._rows = np.arange(len(self.values))
+        self._last = len(self.axis) - 1
+
+    def __call__(self, x):
+        """``(len(x), channels)`` values of every row at its own ``x``."""
+        if self._uniform is None:
+            i, w = brackets(self.axis, None, x)
+            return self._interpolate(i, w[:, None])
+        start, scale = self._uniform
+        position = (x - start) * scale
+        np.maximum(position, 0, out=position)
+        np.minimum(position, self._last, out=position)
+        i = np.minimum(position.astype(np.intp), self._last - 1)
+        return self._interpolate(i, (position - i)[:, None])
+
+    def _interpolate(self, i, w):
+        """Values of every row in its cell ``i`` at upper-node weight ``w``."""
+        if len(self.values) == 1:
+            lower, upper = self.values[0, i], self.values[0, i + 1]
+        else:
+            lower, upper = self.values[self._rows, i], self.values[self._rows, i + 1]
+        return lower + w * (upper - lower)
+
+    def at(self, x):
+        """``(rows, channels)`` values of every row at the same float ``x``."""
+        i, w = bracket(self._axis, self._uniform, x)
+        lower = self.values[:, i]
+        return lower + w * (self.values[:, i + 1] - lower)
+
+
+def effective_rail_length(rocket, rail_length):
+    """``Flight.effective_1rl``: rail left once the upper button is on it."""
+    nozzle = rocket.nozzle_position
+    if rocket.rail_buttons:
+        buttons = rocket.rail_buttons[0]
+        upper = buttons.component.buttons_distance * rocket._csys + buttons.position.z
+    else:
+        upper = nozzle
+    return rail_length - abs(nozzle - upper)
+
+
+def rail_direction(inclination, heading):
+    """Unit vector of the rail, east-north-up, angles in degrees."""
+    inclination, heading = math.radians(inclination), math.radians(heading)
+    return (
+        math.cos(inclination) * math.sin(heading),
+        math.cos(inclination) * math.cos(heading),
+        math.sin(inclination),
+    )
+
+
+class PointMassModel:
+    """Inputs of a batch of point-mass trajectories, sampled on regular grids.
+
+    Attributes
+    ----------
+    PointMassModel.size : int
+        Number of trajectories.
+    PointMassModel.elevation : numpy.ndarray
+        Launch site elevation of each trajectory (m).
+    PointMassModel.atmosphere : _Table
+        Density, speed of sound, wind velocities and gravity
+        (``ATMOSPHERE_CHANNELS``) above ground level.
+    PointMassModel.motor : _Table
+        Thrust and total mass against time.
+    PointMassModel.drag : _Table
+        Power-on and power-off drag coefficients against Mach number.
+    PointMassModel.burn_out_time : numpy.ndarray
+        Motor burnout time of each trajectory (s).
+    PointMassModel.area : numpy.ndarray
+        Reference area of the drag curves (m^2).
+    PointMassModel.dry_mass : numpy.ndarray
+        Mass under parachutes, ``Rocket.dry_mass`` (kg).
+    PointMassModel.rail_length : numpy.ndarray
+        Effective rail length (m).
+    PointMassModel.rail_direction : numpy.ndarray
+        ``(size, 3)`` unit vectors of the rails.
+    PointMassModel.parachutes : dict
+        ``(size, k)`` arrays ``cd_s``, ``lag``, ``trigger`` (height AGL,
+        ``inf`` at apogee, ``-inf`` for padding) and ``added_mass`` (canopy
+        volume times added mass coefficient, m^3), in ``Rocket.parachutes``
+        order.
+    """
+
+    def __init__(self, envs, rockets, flights, heights=MODEL_HEIGHTS, machs=MODEL_MACHS):
+        """
+        Parameters
+        ----------
+        envs, rockets : list
+            rocketpy Environment and Rocket (with its motor) of every
+            trajectory. Trajectories sharing one Environment object share
+            its profiles.
+        flights : list
+            ``flight`` section of ``rocket.json`` of every trajectory:
+            ``rail_length``, ``inclination`` and ``heading``.
+        """
+        self.size = len(rockets)
+        self.elevation = np.array([env.elevation for env in envs], dtype=float)
+
+        # Profiles above ground level, shared when every trajectory has the same site
+        unique_envs = list({id(env): env for env in envs}.values())
+        profile_envs = unique_envs if len(unique_envs) == 1 else envs
+        heights = np.asarray(heights, dtype=float)
+
+        # Channels: density, speed of sound, wind x, wind y, gravity
+        self.atmosphere = _Table(
+            heights,
+            [
+                np.column_stack(
+                    [
+                        getattr(env, name).get_value(heights + env.elevation)
+                        for name in ATMOSPHERE_CHANNELS
+                    ]
+                )
+                for env in profile_envs
+            ],
+        )
+        self.earth_rotation = np.array(
+            [np.asarray(env.earth_rotation_vector, dtype=float) for env in profile_envs]
+        )
+
+        # Channels: thrust, total mass; no thrust and constant mass after burnout
+        motors = [rocket.motor for rocket in rockets]
+        self.burn_out_time = np.array([motor.burn_out_time for motor in motors], dtype=float)
+        times = np.arange(0, self.burn_out_time.max() + 2 * MOTOR_TIME_STEP, MOTOR_TIME_STEP)
+        self.motor = _Table(
+            times,
+            [
+                np.column_stack(
+                    [
+                        np.where(
+                            times <= rocket.motor.burn_out_time,
+                            np.maximum(rocket.motor.thrust.get_value(times), 0),
+                            0,
+                        ),
+                        rocket.total_mass.get_value(np.minimum(times, rocket.motor.burn_out_time)),
+                    ]
+                )
+                for rocket in rockets
+            ],
+        )
+
+        # Channels: power-on and power-off drag coefficients
+        self.drag = _Table(
+            machs,
+            [
+                np.column_stack(
+                    [rocket.power_on_drag.get_value(machs), rocket.power_off_drag.get_value(machs)]
+                )
+                for rocket in rockets
+            ],
+        )
+        self.area = np.array([rocket.area for rocket in rockets], dtype=float)
+        self.dry_mass = np.array([rocket.dry_mass for rocket in rockets], dtype=float)
+
+        self.rail_length = np.array(
+            [effective_rail_length(r, f["rail_length"]) for r, f in zip(rockets, flights)]
+        )
+        self.rail_direction = np.array(
+            [rail_direction(f["inclination"], f["heading"]) for f in flights]
+        )
+
+        count = max([len(rocket.parachutes) for rocket in rockets] + [0])
+        self.parachutes = {
+            "cd_s": np.zeros((self.size, count)),
+            "lag": np.zeros((self.size, count)),
+            "trigger": np.full((self.size, count), -np.inf),
+            "added_mass": np.zeros((self.size, count)),
+        }
+        for i, rocket in enumerate(rockets):
+            for k, parachute in enumerate(rocket.parachutes):
+                if parachute.trigger == "apogee":
+                    trigger = np.inf
+                elif isinstance(parachute.trigger, (int, float)):
+                    trigger = float(parachute.trigger)
+                else:
+                    raise ValueError(
+                        f"Parachute '{parachute.name}' has a trigger function, only "
+                        "'apogee' and heights are supported by the point-mass model."
+                    )
+                self.parachutes["cd_s"][i, k] = parachute.cd_s
+                self.parachutes["lag"][i, k] = parachute.lag
+                self.parachutes["trigger"][i, k] = trigger
+                self.parachutes["added_mass"][i, k] = (
+                    parachute.added_mass_coefficient
+                    * (2 / 3)
+                    * np.pi
+                    * parachute.radius**2
+                    * parachute.height
+                )
+
+    @classmethod
+    def from_configs(cls, configs, config_sensor, **kwargs):
+        """Model of one trajectory per parsed ``rocket.json``, without simulating them."""
+        envs, rockets = [], []
+        for config in configs:
+            env, _, rocket, *_ = load_flight_from_config(config, config_sensor, simulate=False)
+            envs.append(env)
+            rockets.append(rocket)
+        return cls(envs, rockets, [config["flight"] for config in configs], **kwargs)
+
+    def _derivative(self, t, position, velocity, phase, cd_s, added_mass):
+        """Accelerations of every trajectory and their Mach numbers."""
+        atmosphere = self.atmosphere(position[:, 2] - self.elevation)
+        rho, speed_of_sound, wind_x, wind_y, gravity = atmosphere.T
+        air = velocity.copy()
+        air[:, 0] -= wind_x
+        air[:, 1] -= wind_y
+        speed = np.sqrt(np.einsum("ij,ij->i", air, air))
+        mach = speed / speed_of_sound
+
+        thrust, mass = self.motor.at(t).T
+        power_on, power_off = self.drag(mach).T
+        cd = np.where(t < self.burn_out_time, power_on, power_off)
+        drag = 0.5 * rho * self.area * cd * speed
+
+        # Free flight: thrust along the airspeed, drag against it
+        push = thrust / np.maximum(speed, 1e-9)
+        acceleration = air * ((push - drag) / mass)[:, None]
+        acceleration[:, 2] -= gravity
+
+        # Coriolis, as in Flight
+        _, w_y, w_z = self.earth_rotation.T
+        vx, vy, vz = velocity.T
+        coriolis = np.empty_like(velocity)
+        coriolis[:, 0] = vz * w_y - vy * w_z
+        coriolis[:, 1] = vx * w_z
+        coriolis[:, 2] = -vx * w_y
+        coriolis *= 2
+
+        on_rail = phase == RAIL
+        if on_rail.any():
+            along = (thrust - drag * speed) / mass - gravity * self.rail_direction[:, 2]
+            rail = self.rail_direction * np.maximum(along, 0)[:, None]
+            acceleration = np.where(on_rail[:, None], rail, acceleration - coriolis)
+        else:
+            acceleration -= coriolis
+
+        under_canopy = phase == PARACHUTE
+        if under_canopy.any():
+            total = self.dry_mass + rho * added_mass
+            canopy = air * (-0.5 * rho * cd_s * speed / total)[:, None]
+            canopy[:, 2] -= self.dry_mass * gravity / total
+            acceleration = np.where(under_canopy[:, None], canopy - coriolis, acceleration)
+        return acceleration, mach
+
+    def simulate(
+        self, ascent_dt=0.02, terminate_on_apogee=False, max_time=600.0, descent_dt=0.1
+    ):
+        """Flies every trajectory at once with a fixed-step RK4.
+
+        Apogee, rail exit and impact are interpolated within the step they
+        happen in; parachutes deploy at the end of the step their lag ends.
+
+        Parameters
+        ----------
+        ascent_dt : float, optional
+            Time step (s) while any trajectory is on the rail or flying
+            without parachutes.
+        terminate_on_apogee : bool, optional
+            Stop every trajectory at apogee, as ``Flight``; impact columns
+            are then NaN.
+        max_time : float, optional
+            Trajectories still flying by then are left without impact.
+        descent_dt : float, optional
+            Time step (s) once every trajectory is under parachutes or done.
+
+        Returns
+        -------
+        dict
+            ``monte_carlo.SUMMARY_COLUMNS`` to arrays of one value per
+            trajectory, like ``monte_carlo.flight_summary``.
+        """
+        n = self.size
+        position = np.zeros((n, 3))
+        position[:, 2] = self.elevation
+        velocity = np.zeros((n, 3))
+        phase = np.full(n, RAIL)
+        cd_s, added_mass = np.zeros(n), np.zeros(n)
+        deploy_time = np.full(self.parachutes["cd_s"].shape, np.inf)
+        deployed = np.zeros(deploy_time.shape, dtype=bool)
+
+        nan = np.full(n, np.nan)
+        summary = {column: nan.copy() for column in SUMMARY_COLUMNS}
+        max_mach = np.zeros(n)
+
+        t = 0.0
+        while t < max_time and (phase != DONE).any():
+            ascending = (phase == RAIL) | (phase == FREE_FLIGHT)
+            dt = ascent_dt if ascending.any() else descent_dt
+            # Classic RK4; trajectories keep their phase over the step
+            a1, mach = self._derivative(t, position, velocity, phase, cd_s, added_mass)
+            v2 = velocity + a1 * (dt / 2)
+            a2, _ = self._derivative(
+                t + dt / 2, position + velocity * (dt / 2), v2, phase, cd_s, added_mass
+            )
+            v3 = velocity + a2 * (dt / 2)
+            a3, _ = self._derivative(t + dt / 2, position + v2 * (dt / 2), v3, phase, cd_s, added_mass)
+            v4 = velocity + a3 * dt
+            a4, _ = self._derivative(t + dt, position + v3 * dt, v4, phase, cd_s, added_mass)
+
+            flying = phase != DONE
+            np.maximum(max_mach, np.where(flying, mach, 0), out=max_mach)
+            next_position = position + (velocity + 2 * v2 + 2 * v3 + v4) * (dt / 6)
+            next_velocity = velocity + (a1 + 2 * a2 + 2 * a3 + a4) * (dt / 6)
+            next_position[~flying] = position[~flying]
+            next_velocity[~flying] = velocity[~flying]
+            t_next = t + dt
+
+            # Rail exit
+            on_rail = phase == RAIL
+            travel = np.einsum("ij,ij->i", position, self.rail_direction)
+            next_travel = np.einsum("ij,ij->i", next_position, self.rail_direction)
+            start = self.elevation * self.rail_direction[:, 2]
+            left = on_rail & (next_travel - start >= self.rail_length)
+            if left.any():
+                w = (self.rail_length[left] - (travel[left] - start[left])) / (
+                    next_travel[left] - travel[left]
+                )
+                speed = np.linalg.norm(velocity[left], axis=1)
+                next_speed = np.linalg.norm(next_velocity[left], axis=1)
+                summary["Out of Rail Velocity (m/s)"][left] = speed + w * (next_speed - speed)
+                phase[left] = FREE_FLIGHT
+
+            # Apogee: constant deceleration over the step
+            vz, next_vz = velocity[:, 2], next_velocity[:, 2]
+            apogee = flying & ~on_rail & (vz > 0) & (next_vz <= 0)
+            if apogee.any():
+                w = vz[apogee] / (vz[apogee] - next_vz[apogee])
+                summary["Apogee Time (s)"][apogee] = t + w * dt
+                summary["Apogee (m)"][apogee] = (
+                    position[apogee, 2] + vz[apogee] * w * dt / 2 - self.elevation[apogee]
+                )
+                if terminate_on_apogee:
+                    phase[apogee] = DONE
+
+            # Parachute triggers and deployments
+            descending = (phase == FREE_FLIGHT) | (phase == PARACHUTE)
+            descending &= next_vz < 0
+            height = next_position[:, 2] - self.elevation
+            triggered = (
+                descending[:, None]
+                & np.isinf(deploy_time)
+                & (height[:, None] < self.parachutes["trigger"])
+            )
+            deploy_time[triggered] = t_next + self.parachutes["lag"][triggered]
+            for k in range(deploy_time.shape[1]):
+                deploy = (deploy_time[:, k] <= t_next) & ~deployed[:, k] & (phase != DONE)
+                if deploy.any():
+                    deployed[deploy, k] = True
+                    phase[deploy] = PARACHUTE
+                    cd_s[deploy] = self.parachutes["cd_s"][deploy, k]
+                    added_mass[deploy] = self.parachutes["added_mass"][deploy, k]
+
+            # Impact
+            impact = (phase != DONE) & ~on_rail & (height <= 0) & (next_vz < 0)
+            if impact.any():
+                z = position[impact, 2] - self.elevation[impact]
+                w = z / (z - height[impact])
+                xy = position[impact, :2] + w[:, None] * (
+                    next_position[impact, :2] - position[impact, :2]
+                )
+                summary["Impact X (m)"][impact] = xy[:, 0]
+                summary["Impact Y (m)"][impact] = xy[:, 1]
+                summary["Impact Velocity (m/s)"][impact] = vz[impact] + w * (
+                    next_vz[impact] - vz[impact]
+                )
+                summary["Flight Time (s)"][impact] = t + w * dt
+                phase[impact] = DONE
+
+            position, velocity, t = next_position, next_velocity, t_next
+
+        if terminate_on_apogee:
+            summary["Flight Time (s)"] = summary["Apogee Time (s)"].copy()
+        summary["Max Mach Number"] = max_mach
+        return summary
+
+
+def _errors(reference, estimate):
+    """Error of ``estimate`` against ``reference`` for every summary column."""
+    return {
+        column: np.asarray(estimate[column], dtype=float)
+        - np.asarray(reference[column], dtype=float)
+        for column in SUMMARY_COLUMNS
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--dispersion", default="dispersion.json")
+    parser.add_argument(
+        "--dt",
+        type=lambda text: [float(v) for v in text.split(",")],
+        default=[0.02, 0.01, 0.05],
+        help="Ascent time steps of the point-mass model to compare, the first one is "
+        "used for the batch and the dispersed runs.",
+    )
+    parser.add_argument("--descent-dt", type=float, default=0.1)
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=0,
+        help="Also compare over this many dispersed runs, flown with rocketpy in parallel.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sampling", choices=SAMPLING_METHODS, default="sobol")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=1000, help="Trajectories of the timing batch.")
+    parser.add_argument("--apogee-only", action="store_true")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    with open(args.config) as f:
+        config = json.load(f)
+    with open(args.sensors) as f:
+        config_sensor = json.load(f)
+    if args.apogee_only:
+        config["flight"]["terminate_on_apogee"] = True
+    apogee_only = config["flight"]["terminate_on_apogee"]
+
+    start = time.perf_counter()
+    env, _, rocket, flight, *_ = load_flight_from_config(config, config_sensor)
+    six_dof_time = time.perf_counter() - start
+    reference = {
+        "Apogee (m)": flight.apogee - env.elevation,
+        "Apogee Time (s)": flight.apogee_time,
+        "Max Mach Number": flight.max_mach_number,
+        "Out of Rail Velocity (m/s)": flight.out_of_rail_velocity,
+        "Impact X (m)": np.nan if apogee_only else flight.x_impact,
+        "Impact Y (m)": np.nan if apogee_only else flight.y_impact,
+        "Impact Velocity (m/s)": np.nan if apogee_only else flight.impact_velocity,
+        "Flight Time (s)": flight.t_final,
+    }
+    model = PointMassModel([env], [rocket], [config["flight"]])
+
+    print(f"Reference flight, 6-DOF in {six_dof_time:.1f} s against 3-DOF:")
+    print(f"{'':>28} {'6-DOF':>10}" + "".join(f" {f'dt={dt:g}':>16}" for dt in args.dt))
+    estimates = []
+    for dt in args.dt:
+        start = time.perf_counter()
+        estimate = model.simulate(dt, apogee_only, descent_dt=args.descent_dt)
+        estimates.append((estimate, time.perf_counter() - start))
+    for column in SUMMARY_COLUMNS:
+        cells = "".join(
+            f" {e[column][0]:9.2f} ({e[column][0] - reference[column]:+6.1f})" for e, _ in estimates
+        )
+        print(f"{column:>28} {reference[column]:10.2f}{cells}")
+    print(f"{'Run time (s)':>28} {six_dof_time:10.2f}" + "".join(f" {s:16.3f}" for _, s in estimates))
+
+    dt = args.dt[0]
+    batch = PointMassModel([env] * args.batch, [rocket] * args.batch, [config["flight"]] * args.batch)
+    start = time.perf_counter()
+    batch.simulate(dt, apogee_only, descent_dt=args.descent_dt)
+    elapsed = time.perf_counter() - start
+    print(
+        f"\nBatch of {args.batch} trajectories at dt={dt:g}: {elapsed:.2f} s, "
+        f"{1e3 * elapsed / args.batch:.2f} ms per trajectory "
+        f"({six_dof_time * args.batch / elapsed:.0f}x the 6-DOF rate)"
+    )
+
+    if args.runs:
+        with open(args.dispersion) as f:
+            dispersion = json.load(f)
+        jobs = campaign_runs(config, dispersion, args.runs, args.seed, args.sampling)
+        with ProcessPoolExecutor(
+            max_workers=args.workers or os.cpu_count(),
+            initializer=init_worker,
+            initargs=(config, config_sensor),
+        ) as executor:
+            rows = list(executor.map(run_dispersed, *zip(*jobs)))
+        six_dof = {column: [row[column] for row in rows] for column in SUMMARY_COLUMNS}
+
+        configs = [apply_overrides(config, overrides) for _, _, overrides, _ in jobs]
+        dispersed = PointMassModel.from_configs(configs, config_sensor)
+        errors = _errors(six_dof, dispersed.simulate(dt, apogee_only, descent_dt=args.descent_dt))
+        print(f"\n3-DOF error over {args.runs} dispersed runs at dt={dt:g}:")
+        print(f"{'':>28} {'mean':>9} {'std':>9} {'max |e|':>9}")
+        for column, error in errors.items():
+            if np.isnan(error).all():
+                continue
+            print(
+                f"{column:>28} {np.nanmean(error):9.2f} {np.nanstd(error):9.2f} "
+                f"{np.nanmax(np.abs(error)):9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
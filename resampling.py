@@ -0,0 +1,143 @@
+"""Linear resampling of stacked time series onto a common grid.
+
+``np.interp`` searches the source times again for every channel it is
+called on. A ``Resampler`` does that search once per source time base and
+keeps the bracketing indices and weights, after which any number of
+channels sampled at those times, stacked as columns of one matrix, are
+resampled in a single vectorised operation. Results are the same as
+``np.interp`` column by column, including holding the end values outside
+the source range.
+
+``bracket`` and ``brackets`` locate points in the cells of a regular grid
+axis, for the lookup tables built on top of them (``air_brakes_drag``,
+``apogee_predictor``).
+
+Usage
+-----
+    t = uniform_grid(0, flight.t_final, 0.01)
+    truth = Resampler(flight.time, t)
+    w = truth(np.column_stack([flight.w1[:, 1], flight.w2[:, 1], flight.w3[:, 1]]))
+"""
+import bisect
+
+import numpy as np
+
+
+def uniform_grid(start, stop, dt):
+    """Samples ``start, start + dt, ...`` up to ``stop`` included, without drift."""
+    return start + np.arange(int(np.floor((stop - start) / dt + 1e-9)) + 1) * dt
+
+
+def uniform_step(axis):
+    """``(start, 1 / step)`` of an evenly spaced axis, None otherwise."""
+    steps = np.diff(axis)
+    if len(steps) and np.allclose(steps, steps[0], rtol=1e-9, atol=0):
+        return float(axis[0]), float(1 / steps[0])
+    return None
+
+
+def bracket(axis, uniform, x):
+    """Cell of a grid axis holding the float ``x`` and the weight of its upper node.
+
+    ``axis`` is a list of increasing nodes and ``uniform`` its
+    ``uniform_step``, which skips the search. Values outside the axis clamp
+    to its first or last node.
+    """
+    last = len(axis) - 2
+    if uniform is not None:
+        x = (x - uniform[0]) * uniform[1]
+        if x <= 0:
+            return 0, 0.0
+        if x >= last + 1:
+            return last, 1.0
+        i = int(x)
+        return i, x - i
+    if x <= axis[0]:
+        return 0, 0.0
+    if x >= axis[-1]:
+        return last, 1.0
+    i = bisect.bisect_right(axis, x) - 1
+    return i, (x - axis[i]) / (axis[i + 1] - axis[i])
+
+
+def brackets(axis, uniform, x):
+    """Vectorised ``bracket``: cell indices and upper-node weights of ``x``."""
+    if uniform is not None:
+        position = np.clip((x - uniform[0]) * uniform[1], 0, len(axis) - 1)
+    else:
+        position = np.interp(x, axis, np.arange(len(axis), dtype=float))
+    index = np.minimum(position.astype(np.intp), len(axis) - 2)
+    return index, position - index
+
+
+class Resampler:
+    """Interpolation from one source time base onto a target grid.
+
+    Attributes
+    ----------
+    Resampler.source, Resampler.target : numpy.ndarray
+        Source sample times (non-decreasing) and target times.
+    Resampler.index : numpy.ndarray
+        Index of the source sample at or before each target time.
+    Resampler.weight : numpy.ndarray
+        Weight of the following source sample, in [0, 1].
+    """
+
+    def __init__(self, source, target):
+        source = np.asarray(source, dtype=float)
+        target = np.asarray(target, dtype=float)
+        if len(source) == 0:
+            raise ValueError("Cannot resample from an empty time base.")
+        self.source = source
+        self.target = target
+
+        if len(source) == 1:
+            self.index = np.zeros(len(target), dtype=np.intp)
+            self.weight = np.zeros(len(target))
+            return
+
+        index = np.clip(np.searchsorted(source, target, side="right") - 1, 0, len(source) - 2)
+        start, end = source[index], source[index + 1]
+        width = end - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(width > 0, (target - start) / width, 1.0)
+        self.index = index
+        self._next = index + 1
+        self.weight = np.clip(weight, 0.0, 1.0)
+
+    def __call__(self, values):
+        """Resamples ``values``, sampled at ``source``, onto ``target``.
+
+        Parameters
+        ----------
+        values : array_like
+            Shape ``(len(source),)`` or ``(len(source), channels)``.
+
+        Returns
+        -------
+        numpy.ndarray
+            Shape ``(len(target),)`` or ``(len(target), channels)``.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) != len(self.source):
+            raise ValueError(
+                f"Expected {len(self.source)} samples to resample, got {len(values)}."
+            )
+        if len(self.source) == 1:
+            return np.repeat(values[:1], len(self.target), axis=0)
+
+        weight = self.weight if values.ndim == 1 else self.weight[:, None]
+        before = np.take(values, self.index, axis=0)
+        result = np.take(values, self._next, axis=0)
+        result -= before
+        result *= weight
+        result += before
+        return result
+
+    def functions(self, *functions):
+        """Resamples rocketpy Functions sampled at ``source`` as stacked columns.
+
+        ``resampler.functions(flight.vx, flight.vy, flight.vz)`` returns the
+        three velocities as a ``(len(target), 3)`` matrix.
+        """
+        return self(np.column_stack([function[:, 1] for function in functions]))
@@ -0,0 +1,120 @@
+"""Time-ordered event stream of every sensor of a flight.
+
+Each rocketpy sensor keeps its own ``measured_data`` list, sampled at its own
+rate. ``sensor_events`` heap-merges them into one stream of typed records in
+time order, so an estimator or a replay tool handles multi-rate data in a
+single pass. Only one pending sample per sensor is held at a time; nothing
+is stacked or copied up front. ``log_events`` does the same for a sensor log
+written by ``sensor_log``, reading rows from the memory map as it goes.
+
+Each sensor type has its own record, a named tuple of the sample time, the
+channel name and the columns of ``sensor_export.SENSOR_COLUMNS``::
+
+    AccelerometerEvent(t, channel, ax, ay, az)
+    GyroscopeEvent(t, channel, wx, wy, wz)
+    BarometerEvent(t, channel, pressure)
+    GnssReceiverEvent(t, channel, latitude, longitude, altitude)
+
+Samples taken at the same time come out in channel order: the three-axis
+sensors first, then the barometer and the GNSS receiver.
+
+Usage
+-----
+    for event in sensor_events(three_axis_sensors, baro, gps):
+        if isinstance(event, GyroscopeEvent):
+            ...
+
+    python sensor_events.py --log sensors_data/sensors.slog --head 20
+"""
+import argparse
+import heapq
+import warnings
+from collections import Counter, namedtuple
+from operator import attrgetter
+
+from load_flight_from_json import load_flight_from_json
+from sensor_export import SENSOR_COLUMNS, named_sensors
+from sensor_log import SensorLog
+
+EVENT_TYPES = {
+    kind: namedtuple(f"{kind}Event", ["t", "channel"] + columns)
+    for kind, (columns, _) in SENSOR_COLUMNS.items()
+}
+AccelerometerEvent = EVENT_TYPES["Accelerometer"]
+GyroscopeEvent = EVENT_TYPES["Gyroscope"]
+BarometerEvent = EVENT_TYPES["Barometer"]
+GnssReceiverEvent = EVENT_TYPES["GnssReceiver"]
+
+
+def _events(channel, kind, rows):
+    event = EVENT_TYPES[kind]
+    for t, *values in rows:
+        yield event(t, channel, *values)
+
+
+def merge_events(*streams):
+    """Merges time-ordered event iterables into one, ties in argument order."""
+    return heapq.merge(*streams, key=attrgetter("t"))
+
+
+def sensor_events(three_axis_sensors, baro, gps):
+    """Every measurement of the sensors of ``load_flight_from_json`` in time order.
+
+    Returns
+    -------
+    iterator
+        Event records, channels named like those of ``sensor_export``.
+    """
+    return merge_events(
+        *(
+            _events(name, type(sensor).__name__, sensor.measured_data)
+            for name, sensor in named_sensors(three_axis_sensors, baro, gps)
+        )
+    )
+
+
+def log_events(log):
+    """Every row of a ``SensorLog`` (or the path of one) in time order."""
+    if not isinstance(log, SensorLog):
+        log = SensorLog(log)
+    # Channels are named after their sensor type, e.g. "Gyroscope_2"
+    return merge_events(
+        *(
+            _events(name, name.partition("_")[0], (row.tolist() for row in log[name]))
+            for name in log
+        )
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--log", help="Sensor log to replay instead of simulating a flight.")
+    source.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("--head", type=int, default=10, help="Number of events to print.")
+    args = parser.parse_args(argv)
+
+    if args.log:
+        events = log_events(args.log)
+    else:
+        warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+        _, _, _, _, three_axis_sensors, baro, gps = load_flight_from_json(
+            args.config, args.sensors
+        )
+        events = sensor_events(three_axis_sensors, baro, gps)
+
+    counts = Counter()
+    event = None
+    for i, event in enumerate(events):
+        if i < args.head:
+            print(event)
+        counts[event.channel] += 1
+
+    print(f"{sum(counts.values())} events up to t = {event.t:.3f} s" if event else "No events")
+    for channel, count in counts.items():
+        print(f"{channel:>16}: {count}")
+
+
+if __name__ == "__main__":
+    main()
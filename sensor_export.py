@@ -0,0 +1,209 @@
+"""Single-file export of the simulated sensor dataset for the Kalman filter.
+
+Every channel the KF needs (raw sensor measurements, true-minus-measured
+biases, GNSS, barometer and reference velocity) is resampled once to a
+shared time base and written to one netCDF-4/HDF5 file, one group per
+channel with its units and sensor metadata. The file is written once and
+hard-linked (or copied, across file systems) into the KF folder, instead of
+nine CSV files written twice each.
+
+Layout of ``sensors.nc``::
+
+    /time                                 shared time base (s)
+    /Accelerometer_0/ax, ay, az           one group per CSV it replaces
+    /acc_bias_0/bax, bay, baz
+    /gyro_bias/bgx, bgy, bgz
+    /GnssReceiver/latitude, longitude, altitude
+    ...
+
+MATLAB reads a channel with ``ncread("sensors.nc", "/gyro_bias/bgx")``.
+"""
+import os
+import shutil
+
+import netCDF4
+import numpy as np
+
+from filters import FilterBank
+from resampling import Resampler, uniform_grid
+
+EXPORT_FILE = "sensors.nc"
+
+# Columns and units of each sensor type, in the order of measured_data
+SENSOR_COLUMNS = {
+    "Accelerometer": (["ax", "ay", "az"], "m/s^2"),
+    "Gyroscope": (["wx", "wy", "wz"], "rad/s"),
+    "Barometer": (["pressure"], "Pa"),
+    "GnssReceiver": (["latitude", "longitude", "altitude"], "deg, deg, m"),
+}
+
+
+def named_sensors(three_axis_sensors, baro, gps):
+    """``(channel name, sensor)`` pairs of the raw sensor channels.
+
+    Accelerometers and gyroscopes are numbered by their position in
+    ``three_axis_sensors``, e.g. ``Accelerometer_0``; the barometer and GNSS
+    receiver are named after their type.
+    """
+    named = [(f"{type(s).__name__}_{i}", s) for i, s in enumerate(three_axis_sensors)]
+    return named + [(type(s).__name__, s) for s in (baro, gps)]
+
+
+def _channel(columns, data, units, **attributes):
+    return {
+        "columns": dict(zip(columns, np.asarray(data).T)),
+        "attributes": {"units": units, **attributes},
+    }
+
+
+def sensor_dataset(flight, three_axis_sensors, baro, gps, dt=0.01, bias_cutoff=0.1):
+    """Every exported channel on one shared time base.
+
+    Parameters
+    ----------
+    flight : Flight
+        Simulated flight, source of the true rates, accelerations and
+        velocities the biases are computed against.
+    three_axis_sensors : list
+        Accelerometers and gyroscopes, as returned by
+        ``load_flight_from_json``. Channels are named by ``named_sensors``,
+        e.g. ``Accelerometer_0``.
+    baro, gps : Sensor
+        Barometer and GNSS receiver.
+    dt : float, optional
+        Sampling period of the shared time base (s).
+    bias_cutoff : float, optional
+        Cutoff (Hz) of the low-pass applied to the gyroscope bias.
+
+    Returns
+    -------
+    t : numpy.ndarray
+        Shared time base, from 0 to the last time every sensor has a
+        sample of.
+    channels : dict
+        Maps channel names to ``{"columns": {name: array}, "attributes":
+        {...}}``.
+    """
+    named = named_sensors(three_axis_sensors, baro, gps)
+    records = {name: np.asarray(sensor.measured_data, dtype=float) for name, sensor in named}
+
+    t_end = min(record[-1, 0] for record in records.values())
+    t = uniform_grid(0, t_end, dt)
+
+    # One resampler per source time base: the flight solution, and each
+    # distinct set of sensor sample times (usually all sensors share one)
+    truth = Resampler(flight.time, t).functions
+    resamplers = {}
+
+    def measured_on_grid(record):
+        key = record[:, 0].tobytes()
+        if key not in resamplers:
+            resamplers[key] = Resampler(record[:, 0], t)
+        return resamplers[key](record[:, 1:])
+
+    channels = {}
+    for name, sensor in named:
+        kind = type(sensor).__name__
+        columns, units = SENSOR_COLUMNS[kind]
+        measured = measured_on_grid(records[name])
+        channels[name] = _channel(
+            columns, measured, units, sensor=sensor.name, sampling_rate=sensor.sampling_rate
+        )
+
+        if kind == "Gyroscope":
+            bias = truth(flight.w1, flight.w2, flight.w3) - measured
+            bias = FilterBank.first_order_lowpass(bias_cutoff, dt, channels=3).apply(bias)
+            channels["gyro_bias"] = _channel(
+                ["bgx", "bgy", "bgz"], bias, units, sensor=sensor.name, lowpass_cutoff=bias_cutoff
+            )
+        elif kind == "Accelerometer":
+            # acc_bias_<i> matches Accelerometer_<i>
+            bias = truth(flight.ax, flight.ay, flight.az) - measured
+            channels[f"acc_bias_{name.rpartition('_')[2]}"] = _channel(
+                ["bax", "bay", "baz"], bias, units, sensor=sensor.name
+            )
+
+    channels["velocity"] = _channel(
+        ["Vx", "Vy", "Vz"], truth(flight.vx, flight.vy, flight.vz), "m/s", sensor="truth"
+    )
+    return t, channels
+
+
+def write_sensor_dataset(path, t, channels, **attributes):
+    """Writes the dataset of ``sensor_dataset`` to one netCDF-4 file.
+
+    Extra keyword arguments are stored as global attributes.
+
+    Returns
+    -------
+    str
+        ``path``.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with netCDF4.Dataset(path, "w", format="NETCDF4") as dataset:
+        dataset.setncatts({"dt": float(t[1] - t[0]) if len(t) > 1 else 0.0, **attributes})
+        dataset.createDimension("time", len(t))
+        time = dataset.createVariable("time", "f8", ("time",))
+        time.units = "s"
+        time[:] = t
+
+        for name, channel in channels.items():
+            group = dataset.createGroup(name)
+            group.setncatts(channel["attributes"])
+            for column, values in channel["columns"].items():
+                variable = group.createVariable(column, "f8", ("time",), zlib=True, complevel=1)
+                variable[:] = values
+    return path
+
+
+def read_sensor_dataset(path):
+    """Reads a file written by ``write_sensor_dataset``.
+
+    Returns
+    -------
+    t, channels
+        Same structure as ``sensor_dataset``.
+    """
+    with netCDF4.Dataset(path) as dataset:
+        t = dataset["time"][:].filled(np.nan)
+        channels = {
+            name: {
+                "columns": {
+                    column: variable[:].filled(np.nan)
+                    for column, variable in group.variables.items()
+                },
+                "attributes": {a: group.getncattr(a) for a in group.ncattrs()},
+            }
+            for name, group in dataset.groups.items()
+        }
+    return t, channels
+
+
+def publish(path, directory, link=True):
+    """Makes ``path`` available in ``directory`` without writing it again.
+
+    The file is hard-linked when ``link`` is True and the file system allows
+    it, copied otherwise. An existing file of the same name is replaced.
+
+    Returns
+    -------
+    str
+        Path of the published file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    destination = os.path.join(directory, os.path.basename(path))
+    if os.path.abspath(destination) == os.path.abspath(path):
+        return destination
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if link:
+        try:
+            os.link(path, destination)
+            return destination
+        except OSError:
+            pass
+    shutil.copy2(path, destination)
+    return destination
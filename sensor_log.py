@@ -0,0 +1,192 @@
+"""Fixed-layout binary sensor log, memory-mapped on read.
+
+Text exports have to be parsed in full before a filter can look at the first
+sample, which gets slow as Monte Carlo sensor campaigns grow. A sensor log
+stores each sensor's ``measured_data`` as one contiguous little-endian
+float64 block, so ``SensorLog`` maps the file and hands out NumPy views into
+it without reading or copying anything. Opening a log costs the same however
+large it is.
+
+Layout::
+
+    b"RPYSLOG1"                magic
+    uint64 (little-endian)     length of the JSON header in bytes
+    JSON header                channels, columns, attributes and offsets
+                               relative to the first channel block
+    padding                    up to the next 64-byte boundary
+    channel blocks             float64 arrays of shape (rows, columns),
+                               row-major, each starting on a 64-byte boundary
+
+Column 0 of every block is the sample time, as in ``measured_data``. The
+Kalman filter reads a channel with ``KF/read_sensor_log.m``.
+
+Usage
+-----
+    python sensor_log.py --config rocket.json -o sensors_data/sensors.slog
+
+    log = SensorLog("sensors_data/sensors.slog")
+    gyro = log["Gyroscope_2"]   # (rows, 4) view: t, wx, wy, wz
+"""
+import argparse
+import json
+import struct
+import warnings
+
+import numpy as np
+
+from load_flight_from_json import load_flight_from_json
+from sensor_export import SENSOR_COLUMNS, named_sensors
+
+MAGIC = b"RPYSLOG1"
+ALIGNMENT = 64
+DTYPE = np.dtype("<f8")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def sensor_records(three_axis_sensors, baro, gps):
+    """Measured data of every sensor, named like the channels of ``sensor_export``.
+
+    Returns
+    -------
+    dict
+        Maps channel names to ``{"data": array, "columns": [...],
+        "attributes": {...}}``, ``data`` holding time in column 0.
+    """
+    records = {}
+    for name, sensor in named_sensors(three_axis_sensors, baro, gps):
+        columns, units = SENSOR_COLUMNS[type(sensor).__name__]
+        records[name] = {
+            "data": np.asarray(sensor.measured_data, dtype=float),
+            "columns": ["t"] + columns,
+            "attributes": {
+                "units": units,
+                "sensor": sensor.name,
+                "sampling_rate": sensor.sampling_rate,
+            },
+        }
+    return records
+
+
+def write_sensor_log(path, records, **attributes):
+    """Writes ``records`` (see ``sensor_records``) as a sensor log.
+
+    Extra keyword arguments are stored in the header as global attributes
+    and must be JSON serializable. A record with no data (a sensor that
+    never sampled) is written as a channel of zero rows.
+
+    Returns
+    -------
+    str
+        ``path``.
+    """
+    channels, blocks = [], []
+    for name, record in records.items():
+        data = np.asarray(record["data"], dtype=DTYPE)
+        if data.size == 0:
+            # A sensor that never sampled is written as a zero-length channel
+            data = data.reshape(0, len(record["columns"]))
+        if data.ndim != 2 or data.shape[1] != len(record["columns"]):
+            raise ValueError(
+                f"Channel '{name}' has shape {data.shape} but {len(record['columns'])} columns."
+            )
+        channels.append(
+            {
+                "name": name,
+                "columns": list(record["columns"]),
+                "rows": int(data.shape[0]),
+                "attributes": record.get("attributes", {}),
+            }
+        )
+        blocks.append(data)
+
+    # Offsets are relative to the first block, which follows the header
+    offset = 0
+    for channel in channels:
+        channel["offset"] = offset
+        offset = _aligned(offset + channel["rows"] * len(channel["columns"]) * DTYPE.itemsize)
+    header = json.dumps(
+        {"version": 1, "dtype": DTYPE.str, "attributes": attributes, "channels": channels},
+        default=float,
+    ).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for channel, data in zip(channels, blocks):
+            f.write(b"\0" * (data_start + channel["offset"] - f.tell()))
+            np.ascontiguousarray(data).tofile(f)
+    return path
+
+
+class SensorLog:
+    """Read-only, memory-mapped view of a sensor log.
+
+    ``log[name]`` returns a ``(rows, columns)`` array backed by the file
+    itself; nothing is read from disk until its values are used.
+
+    Attributes
+    ----------
+    SensorLog.path : str
+        Path of the log.
+    SensorLog.attributes : dict
+        Global attributes stored by the writer.
+    SensorLog.channels : dict
+        Header entry of each channel (columns, rows, offset, attributes).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._map[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a sensor log.")
+        (length,) = struct.unpack("<Q", bytes(self._map[len(MAGIC) : len(MAGIC) + 8]))
+        header = json.loads(bytes(self._map[len(MAGIC) + 8 : len(MAGIC) + 8 + length]))
+        self._data_start = _aligned(len(MAGIC) + 8 + length)
+        self.attributes = header["attributes"]
+        self.channels = {channel["name"]: channel for channel in header["channels"]}
+        self._dtype = np.dtype(header["dtype"])
+
+    def __getitem__(self, name):
+        channel = self.channels[name]
+        return np.ndarray(
+            (channel["rows"], len(channel["columns"])),
+            dtype=self._dtype,
+            buffer=self._map,
+            offset=self._data_start + channel["offset"],
+        )
+
+    def __contains__(self, name):
+        return name in self.channels
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def column(self, name, column):
+        """One column of a channel, e.g. ``log.column("Barometer", "pressure")``."""
+        return self[name][:, self.channels[name]["columns"].index(column)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument("-o", "--output", default="sensors_data/sensors.slog")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+    _, _, _, _, three_axis_sensors, baro, gps = load_flight_from_json(args.config, args.sensors)
+    records = sensor_records(three_axis_sensors, baro, gps)
+    write_sensor_log(args.output, records, config=args.config, sensors=args.sensors)
+
+    log = SensorLog(args.output)
+    for name, channel in log.channels.items():
+        print(f"{name:>16}: {channel['rows']} rows, columns {', '.join(channel['columns'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Parallel static stability sweeps over fin geometries, without flights.
+
+``_MyFlightPlots.stability_and_control_data`` shows the stability margin of
+an integrated ``Flight``. Fin geometry trades only need the airframe: this
+module builds the ``Rocket`` of every candidate straight from ``rocket.json``
+(``load_flight_from_json.build_rocket``), without an Environment, sensors or
+a Flight, and evaluates its centre of pressure, normal force coefficient
+derivative (Cn-alpha) and stability margin over a grid of Mach numbers.
+
+Margins are in calibers, ``(center_of_mass - cp_position) / (2 * radius)``
+in the rocket's coordinate system, like ``Rocket.stability_margin``, at
+ignition (loaded motor) and at burnout. Candidates are spread over worker
+processes in chunks; the motor of each worker is built once and shared by
+every candidate with the same ``motor`` section.
+
+Usage
+-----
+    python static_stability.py --grid rocket.fins.span=0.06:0.13:0.005 \\
+        --grid rocket.fins.root_chord=0.15:0.26:0.01 -o stability.csv
+    python static_stability.py --grid rocket.fins.position=0.1,0.2,0.3 --curves curves.npz
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from load_flight_from_json import apply_overrides, build_motor, build_rocket
+from sweep import parameter_grid, parameter_label, parse_grid_argument
+
+# Mach numbers the curves are evaluated at unless given
+MACHS = np.round(np.arange(0, 1.21, 0.05), 2)
+
+STABILITY_COLUMNS = [
+    "Static Margin (c)",
+    "Burnout Static Margin (c)",
+    "Min Stability Margin (c)",
+    "CP Position (m)",
+    "CP Travel (m)",
+    "Cn-alpha (1/rad)",
+]
+
+# Base configuration of each worker process, set once by _init_worker
+_worker_config = None
+_worker_machs = None
+_worker_motors = {}
+
+
+def static_stability(rocket, machs=MACHS):
+    """Aerodynamic curves of ``rocket`` over ``machs``.
+
+    Parameters
+    ----------
+    rocket : rocketpy.Rocket
+        Rocket with its motor and aerodynamic surfaces added.
+    machs : array_like, optional
+        Mach numbers to evaluate the curves at.
+
+    Returns
+    -------
+    dict
+        Arrays over ``machs``: ``cp`` (centre of pressure position, m),
+        ``cn_alpha`` (1/rad), ``margin_ignition`` and ``margin_burnout``
+        (stability margins, calibers).
+    """
+    machs = np.asarray(machs, dtype=float)
+    cp = rocket.cp_position.get_value(machs)
+    caliber = 2 * rocket.radius * rocket._csys
+    return {
+        "cp": cp,
+        "cn_alpha": rocket.total_lift_coeff_der.get_value(machs),
+        "margin_ignition": (rocket.center_of_mass.get_value(0) - cp) / caliber,
+        "margin_burnout": (
+            rocket.center_of_mass.get_value(rocket.motor.burn_out_time) - cp
+        ) / caliber,
+    }
+
+
+def stability_summary(curves, machs=MACHS):
+    """One-row summary of ``static_stability`` curves, keyed by ``STABILITY_COLUMNS``.
+
+    Static margins, centre of pressure and Cn-alpha are taken at the lowest
+    Mach number of the grid; the minimum margin and the CP travel over all
+    of it.
+    """
+    lowest = int(np.argmin(machs))
+    return {
+        "Static Margin (c)": curves["margin_ignition"][lowest],
+        "Burnout Static Margin (c)": curves["margin_burnout"][lowest],
+        "Min Stability Margin (c)": min(
+            curves["margin_ignition"].min(), curves["margin_burnout"].min()
+        ),
+        "CP Position (m)": curves["cp"][lowest],
+        "CP Travel (m)": np.ptp(curves["cp"]),
+        "Cn-alpha (1/rad)": curves["cn_alpha"][lowest],
+    }
+
+
+def _init_worker(config, machs):
+    global _worker_config, _worker_machs
+    _worker_config = config
+    _worker_machs = machs
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+
+
+def _motor(config):
+    """Motor of ``config``, built once per worker for each ``motor`` section."""
+    key = json.dumps(config["motor"], sort_keys=True)
+    if key not in _worker_motors:
+        _worker_motors[key] = build_motor(config)
+    return _worker_motors[key]
+
+
+def _evaluate_point(point):
+    """Evaluates one candidate in a worker and returns its row and curves."""
+    config = apply_overrides(_worker_config, point)
+    rocket = build_rocket(config, _motor(config))
+    curves = static_stability(rocket, _worker_machs)
+    row = {parameter_label(path): value for path, value in point.items()}
+    row.update(stability_summary(curves, _worker_machs))
+    return row, curves
+
+
+def run_stability_sweep(config, grid, output_path=None, workers=None, machs=MACHS,
+                        chunksize=None):
+    """Evaluates the static stability of every point of ``grid`` in parallel.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``.
+    grid : dict
+        Maps dotted configuration paths (e.g. ``"rocket.fins.span"``) to the
+        values to sweep, see ``sweep.parameter_grid``.
+    output_path : str, optional
+        CSV file the rows are streamed to, in grid order. Nothing is written
+        if None.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    machs : array_like, optional
+        Mach numbers to evaluate the curves at.
+    chunksize : int, optional
+        Candidates sent to a worker at a time. By default the grid is split
+        into about four chunks per worker, at most 64 candidates each.
+
+    Returns
+    -------
+    rows : list of dict
+        One row per grid point, in grid order.
+    curves : dict
+        ``static_stability`` arrays stacked to ``(len(rows), len(machs))``.
+    """
+    points = parameter_grid(grid)
+    columns = [parameter_label(path) for path in grid] + STABILITY_COLUMNS
+    workers = workers or os.cpu_count()
+    if chunksize is None:
+        chunksize = min(64, max(1, len(points) // (4 * workers)))
+    machs = np.asarray(machs, dtype=float)
+    rows, curves = [], []
+
+    output_file = None
+    if output_path is not None:
+        output_file = open(output_path, "w", newline="", encoding="utf-8")
+        writer = csv.DictWriter(output_file, fieldnames=columns)
+        writer.writeheader()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(config, machs)
+        ) as executor:
+            results = executor.map(_evaluate_point, points, chunksize=chunksize)
+            for done, (row, curve) in enumerate(results, start=1):
+                rows.append(row)
+                curves.append(curve)
+                if output_file is not None:
+                    writer.writerow(row)
+                if done % chunksize == 0 or done == len(points):
+                    sys.stdout.write(
+                        f"\r{done}/{len(points)} ({done / len(points) * 100:.2f}%) "
+                        f"static margin: {row['Static Margin (c)']:.2f} c"
+                    )
+                    sys.stdout.flush()
+    finally:
+        if output_file is not None:
+            output_file.close()
+    print()
+
+    stacked = {name: np.array([curve[name] for curve in curves]) for name in curves[0]}
+    return rows, stacked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        type=parse_grid_argument,
+        required=True,
+        help="Parameter to sweep as path=start:stop:step or path=v1,v2,... "
+        "(repeat for a cartesian product).",
+    )
+    parser.add_argument(
+        "--machs",
+        type=lambda text: [float(v) for v in text.split(",")],
+        default=MACHS,
+        help="Comma separated Mach numbers of the curves.",
+    )
+    parser.add_argument("-o", "--output", default="stability.csv")
+    parser.add_argument("--curves", default=None, help="NPZ file for the curves over Mach.")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    grid = dict(args.grid)
+    start = time.perf_counter()
+    rows, curves = run_stability_sweep(config, grid, args.output, args.workers, args.machs)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Saved {len(rows)} candidates to '{args.output}' in {elapsed:.1f} s "
+        f"({len(rows) / elapsed * 60:.0f} per minute)."
+    )
+
+    if args.curves:
+        np.savez(
+            args.curves,
+            machs=np.asarray(args.machs, dtype=float),
+            **{path: [row[parameter_label(path)] for row in rows] for path in grid},
+            **curves,
+        )
+        print(f"Saved curves over Mach to '{args.curves}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Response-surface surrogate of apogee trained from sweep results.
+
+Sweep outputs such as ``mass_apogee_data.csv`` already answer most "what
+apogee at mass X / inclination Y" questions. ``ApogeeSurrogate`` fits a
+polynomial response surface to any number of sweep parameters and answers
+queries with an error estimate in microseconds. Queries outside the box
+spanned by the training data are flagged, since there a real ``Flight``
+should be run instead of trusting the polynomial.
+
+Usage
+-----
+    python surrogate.py mass_apogee_data.csv --inputs "Mass (kg)" --query 19.2
+"""
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+class ApogeeSurrogate:
+    """Least-squares polynomial response surface with prediction errors.
+
+    Inputs are scaled to [-1, 1] over the training box before building the
+    monomials, so the fit stays well conditioned. The error estimate is the
+    standard error of a new prediction, using the leave-one-out (PRESS)
+    residual variance so that model bias is included and not only noise.
+
+    Attributes
+    ----------
+    ApogeeSurrogate.inputs : list of str
+        Names of the input columns.
+    ApogeeSurrogate.output : str
+        Name of the output column.
+    ApogeeSurrogate.degree : int
+        Total degree of the polynomial.
+    ApogeeSurrogate.lower, ApogeeSurrogate.upper : numpy.ndarray
+        Bounds of the training data for each input.
+    ApogeeSurrogate.loo_rmse : float
+        Leave-one-out root mean square error of the fit.
+    """
+
+    def __init__(self, inputs, output="Apogee (m)", degree=3):
+        self.inputs = list(inputs)
+        self.output = output
+        self.degree = degree
+        # One row of exponents per monomial, e.g. [[0, 0], [1, 0], [0, 1], ...]
+        self.exponents = np.array(
+            [
+                np.bincount(np.array(combination, dtype=int), minlength=len(self.inputs))
+                for order in range(degree + 1)
+                for combination in itertools.combinations_with_replacement(
+                    range(len(self.inputs)), order
+                )
+            ]
+        ).reshape(-1, len(self.inputs))
+        self.coefficients = None
+
+    def _scale(self, points):
+        return 2 * (points - self.lower) / (self.upper - self.lower) - 1
+
+    def _design_matrix(self, points):
+        return np.prod(self._scale(points)[:, None, :] ** self.exponents, axis=2)
+
+    def fit(self, data):
+        """Fits the surface to a DataFrame holding the input and output columns.
+
+        Every input must vary over ``data``: a constant input has no span
+        to scale over and raises a ValueError.
+
+        Returns
+        -------
+        ApogeeSurrogate
+            self, to allow ``ApogeeSurrogate(...).fit(data)``.
+        """
+        points = data[self.inputs].to_numpy(dtype=float)
+        values = data[self.output].to_numpy(dtype=float)
+        if len(values) <= len(self.exponents):
+            raise ValueError(
+                f"{len(values)} samples cannot fit a degree {self.degree} surface "
+                f"with {len(self.exponents)} coefficients."
+            )
+
+        self.lower = points.min(axis=0)
+        self.upper = points.max(axis=0)
+        constant = [name for name, span in zip(self.inputs, self.upper - self.lower) if span == 0]
+        if constant:
+            raise ValueError(
+                f"Inputs {constant} are constant over the training data and cannot be "
+                "fitted; leave them out of the inputs."
+            )
+        design = self._design_matrix(points)
+
+        self.coefficients, *_ = np.linalg.lstsq(design, values, rcond=None)
+        self._covariance = np.linalg.pinv(design.T @ design)
+
+        residuals = values - design @ self.coefficients
+        leverage = np.einsum("ij,jk,ik->i", design, self._covariance, design)
+        loo_residuals = residuals / (1 - np.minimum(leverage, 1 - 1e-12))
+        self.loo_rmse = float(np.sqrt(np.mean(loo_residuals**2)))
+        self.samples = len(values)
+        return self
+
+    @classmethod
+    def from_csv(cls, csv_files, inputs, output="Apogee (m)", degree=3):
+        """Fits a surrogate to one or more sweep CSV files."""
+        if isinstance(csv_files, str):
+            csv_files = [csv_files]
+        data = pd.concat([pd.read_csv(f) for f in csv_files], ignore_index=True)
+        return cls(inputs, output, degree).fit(data)
+
+    def in_domain(self, points):
+        """True for each point inside the box spanned by the training data."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        return np.all((points >= self.lower) & (points <= self.upper), axis=1)
+
+    def predict(self, points):
+        """Predicted output, its standard error and a trained-region flag.
+
+        Parameters
+        ----------
+        points : array_like
+            Shape ``(n, len(inputs))``, or a single point of shape
+            ``(len(inputs),)``.
+
+        Returns
+        -------
+        mean, std : numpy.ndarray
+            Prediction and its standard error, shape ``(n,)``.
+        trusted : numpy.ndarray
+            False where a point is outside the training data, in which case
+            a real Flight should be simulated instead.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        design = self._design_matrix(points)
+        mean = design @ self.coefficients
+        variance = np.einsum("ij,jk,ik->i", design, self._covariance, design)
+        std = self.loo_rmse * np.sqrt(1 + variance)
+        return mean, std, self.in_domain(points)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_files", nargs="+")
+    parser.add_argument("--inputs", nargs="+", default=["Mass (kg)"])
+    parser.add_argument("--output", default="Apogee (m)")
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument(
+        "--query", type=float, nargs="+", action="append", default=[],
+        help="Input values to predict, in the order of --inputs (repeatable).",
+    )
+    args = parser.parse_args(argv)
+
+    surrogate = ApogeeSurrogate.from_csv(args.csv_files, args.inputs, args.output, args.degree)
+    print(
+        f"Fitted degree {args.degree} surface on {surrogate.samples} samples, "
+        f"leave-one-out RMSE {surrogate.loo_rmse:.3f}"
+    )
+    for query in args.query:
+        mean, std, trusted = surrogate.predict(query)
+        note = "" if trusted[0] else "  (outside training data, run a Flight)"
+        print(f"{query}: {args.output} = {mean[0]:.2f} ± {std[0]:.2f}{note}")
+
+
+if __name__ == "__main__":
+    main()
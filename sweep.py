@@ -0,0 +1,188 @@
+"""Parallel parameter sweeps over the rocket configuration.
+
+Replaces the old serial loop that rewrote ``rocket.json`` for every mass. The
+base configuration is parsed once, every grid point is applied to it as a set
+of overrides inside a worker process and the results are streamed to a CSV that
+``plot_mass_vs_apogee`` can read directly.
+
+Usage
+-----
+    python sweep.py --grid rocket.mass=18.33:22.5:0.01 -o mass_apogee_data.csv
+    python sweep.py --grid rocket.mass=18.5,19,19.5 --grid flight.inclination=84,86
+
+``--apogee-only`` stops every flight at apogee (``flight.terminate_on_apogee``),
+which is all the sweep columns need and roughly a fifth of a full flight.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from load_flight_from_json import load_flight_from_config
+from worker_pool import init_worker, worker_config
+
+# Column names used in the output file for the most common sweep parameters,
+# anything else is written with its dotted path.
+PARAMETER_LABELS = {
+    "rocket.mass": "Mass (kg)",
+    "flight.inclination": "Inclination (deg)",
+    "flight.heading": "Heading (deg)",
+    "flight.rail_length": "Rail Length (m)",
+    "motor.dry_mass": "Motor Dry Mass (kg)",
+    "motor.burn_time": "Burn Time (s)",
+}
+
+RESULT_COLUMNS = ["Apogee (m)", "Apogee Time (s)", "Max Mach Number"]
+
+def parameter_label(path):
+    """Column name used in the output for the dotted parameter ``path``."""
+    return PARAMETER_LABELS.get(path, path)
+
+
+def parameter_grid(grid):
+    """Expands a ``{dotted_path: values}`` mapping into its cartesian product.
+
+    Parameters
+    ----------
+    grid : dict
+        Maps dotted configuration paths (e.g. ``"rocket.mass"``) to an
+        iterable of values.
+
+    Returns
+    -------
+    list of dict
+        One ``{dotted_path: value}`` dictionary per grid point.
+    """
+    paths = list(grid)
+    values = [list(grid[p]) for p in paths]
+    return [dict(zip(paths, point)) for point in itertools.product(*values)]
+
+
+def _run_point(point):
+    """Simulates one grid point in a worker and returns its output row."""
+    config, config_sensor = worker_config()
+    env, _, _, flight, _, _, _ = load_flight_from_config(config, config_sensor, overrides=point)
+
+    row = {parameter_label(path): value for path, value in point.items()}
+    row["Apogee (m)"] = flight.apogee - env.elevation
+    row["Apogee Time (s)"] = flight.apogee_time
+    row["Max Mach Number"] = flight.max_mach_number
+    return row
+
+
+def run_sweep(config, config_sensor, grid, output_path=None, workers=None):
+    """Simulates every point of ``grid`` in parallel.
+
+    Rows are appended to ``output_path`` as soon as their flight finishes,
+    so the file is in completion order rather than grid order. Neither the
+    configuration dictionaries nor the files they came from are modified.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed contents of ``rocket.json``.
+    config_sensor : dict
+        Parsed contents of ``sensors.json``.
+    grid : dict
+        Maps dotted configuration paths to the values to sweep, see
+        ``parameter_grid``.
+    output_path : str, optional
+        CSV file the rows are streamed to. Nothing is written if None.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    list of dict
+        One row per grid point, in completion order.
+    """
+    points = parameter_grid(grid)
+    columns = [parameter_label(path) for path in grid] + RESULT_COLUMNS
+    rows = []
+
+    output_file = None
+    if output_path is not None:
+        output_file = open(output_path, "w", newline="", encoding="utf-8")
+        writer = csv.DictWriter(output_file, fieldnames=columns)
+        writer.writeheader()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=init_worker,
+            initargs=(config, config_sensor),
+        ) as executor:
+            futures = [executor.submit(_run_point, point) for point in points]
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                rows.append(row)
+                if output_file is not None:
+                    writer.writerow(row)
+                    output_file.flush()
+                sys.stdout.write(
+                    f"\r{done}/{len(points)} ({done / len(points) * 100:.2f}%) "
+                    f"apogee: {row['Apogee (m)']:.2f} m"
+                )
+                sys.stdout.flush()
+    finally:
+        if output_file is not None:
+            output_file.close()
+    print()
+
+    return rows
+
+
+def parse_grid_argument(argument):
+    """Parses ``path=start:stop:step`` or ``path=v1,v2,...`` into a grid entry.
+
+    Ranges exclude ``stop`` like ``np.arange`` and are rounded to remove the
+    floating point noise ``np.arange`` adds (18.360000000000003 -> 18.36).
+    """
+    path, _, spec = argument.partition("=")
+    if not spec:
+        raise argparse.ArgumentTypeError(f"Expected 'path=values', got '{argument}'.")
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        values = np.round(np.arange(start, stop, step), 10).tolist()
+    else:
+        values = [json.loads(v) for v in spec.split(",")]
+    return path, values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--sensors", default="sensors.json")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        type=parse_grid_argument,
+        required=True,
+        help="Parameter to sweep as path=start:stop:step or path=v1,v2,... "
+        "(repeat for a cartesian product).",
+    )
+    parser.add_argument("-o", "--output", default="mass_apogee_data.csv")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument(
+        "--apogee-only", action="store_true", help="Stop integrating flights at apogee."
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    with open(args.sensors, "r") as f:
+        config_sensor = json.load(f)
+    if args.apogee_only:
+        config["flight"]["terminate_on_apogee"] = True
+
+    run_sweep(config, config_sensor, dict(args.grid), args.output, args.workers)
+    print(f"Saved sweep results to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
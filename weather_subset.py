@@ -0,0 +1,174 @@
+"""Site-subset extraction of reanalysis weather files.
+
+The reanalysis files in ``specifications/Weather`` cover a whole region and
+every pressure level, while a simulation only ever interpolates the few grid
+cells around the launch site at the launch date. ``extract_site_subset``
+copies just those cells and time steps, and only the variables the configured
+dictionary reads, into a small classic-format netCDF file. The classic format
+is uncompressed with a fixed, contiguous layout, so it can be memory mapped
+(``scipy.io.netcdf_file(path, mmap=True)``) and rocketpy still reads it
+through ``netCDF4`` like the original.
+
+``environment_cache.build_environment`` picks the subset up automatically
+when one exists for the configured site and its source file is unchanged.
+
+Usage
+-----
+    python weather_subset.py --config rocket.json
+"""
+import argparse
+import datetime
+import json
+import os
+
+import netCDF4
+import numpy as np
+from rocketpy.environment.weather_model_mapping import WeatherModelMapping
+
+from hashing import file_hash
+
+SUBSET_DIRECTORY = "site_cache"
+
+def subset_path(env_data):
+    """Path of the site subset of the weather file configured in ``env_data``.
+
+    The subset lives in a ``site_cache`` folder next to the source file and
+    its name encodes the site and date, e.g.
+    ``site_cache/EuroC_..._2023.nc.39.3900_-8.2895_2023101414.nc``.
+    """
+    source = env_data["atmospheric_model"]["file_location"]
+    d = env_data["date"]
+    name = (
+        f"{os.path.basename(source)}."
+        f"{env_data['latitude']:.4f}_{env_data['longitude']:.4f}_"
+        f"{d['year']:04d}{d['month']:02d}{d['day']:02d}{d['hour']:02d}.nc"
+    )
+    return os.path.join(os.path.dirname(source), SUBSET_DIRECTORY, name)
+
+
+def find_site_subset(env_data):
+    """Returns the path of an up to date site subset for ``env_data``, or None.
+
+    A subset is only used if it was extracted from the current contents of
+    the source file, which is checked through the ``source_sha1`` attribute
+    written by ``extract_site_subset``.
+    """
+    model = env_data["atmospheric_model"]
+    if model["type"].lower() not in ("reanalysis", "forecast") or not model.get("file_location"):
+        return None
+    path = subset_path(env_data)
+    if not os.path.exists(path):
+        return None
+    with netCDF4.Dataset(path) as subset:
+        source_sha1 = getattr(subset, "source_sha1", None)
+    if source_sha1 != file_hash(model["file_location"]):
+        return None
+    return path
+
+
+def _nearest_window(values, target, margin):
+    """Slice of the ``2 * margin`` (at least) entries of ``values`` around ``target``."""
+    order = np.argsort(values)
+    position = np.searchsorted(values[order], target)
+    low = max(position - margin, 0)
+    high = min(position + margin, len(values))
+    indices = np.sort(order[low:high])
+    return slice(int(indices[0]), int(indices[-1]) + 1)
+
+
+def extract_site_subset(env_data, cell_margin=2, time_margin=1, output_path=None):
+    """Extracts the grid cells and time steps around the launch site.
+
+    Parameters
+    ----------
+    env_data : dict
+        ``environment`` section of ``rocket.json``.
+    cell_margin : int, optional
+        Grid cells kept on each side of the site in latitude and longitude.
+        rocketpy interpolates between the two nearest cells, so anything
+        above 1 only adds safety margin. Default is 2.
+    time_margin : int, optional
+        Time steps kept on each side of the launch date. Default is 1.
+    output_path : str, optional
+        Where to write the subset. Defaults to ``subset_path(env_data)``,
+        where the loader looks for it.
+
+    Returns
+    -------
+    str
+        Path of the written subset.
+    """
+    model = env_data["atmospheric_model"]
+    source_path = model["file_location"]
+    output_path = output_path or subset_path(env_data)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    dictionary = model.get("dictionary") or "ECMWF"
+    if isinstance(dictionary, str):
+        dictionary = WeatherModelMapping().get(dictionary)
+
+    d = env_data["date"]
+    launch = datetime.datetime(d["year"], d["month"], d["day"], d["hour"])
+
+    with netCDF4.Dataset(source_path) as source:
+        time = source.variables[dictionary["time"]]
+        time_values = netCDF4.date2num(launch, time.units, getattr(time, "calendar", "standard"))
+        longitudes = source.variables[dictionary["longitude"]][:]
+        # Reanalysis longitudes may be stored in [0, 360)
+        longitude = env_data["longitude"] % 360 if longitudes.max() > 180 else env_data["longitude"]
+
+        windows = {
+            time.dimensions[0]: _nearest_window(time[:], time_values, time_margin),
+            source.variables[dictionary["latitude"]].dimensions[0]: _nearest_window(
+                source.variables[dictionary["latitude"]][:], env_data["latitude"], cell_margin
+            ),
+            source.variables[dictionary["longitude"]].dimensions[0]: _nearest_window(
+                longitudes, longitude, cell_margin
+            ),
+        }
+        wanted = {name for name in dictionary.values() if name in source.variables}
+
+        with netCDF4.Dataset(output_path, "w", format="NETCDF3_64BIT_OFFSET") as subset:
+            subset.setncatts({key: source.getncattr(key) for key in source.ncattrs()})
+            subset.source_file = os.path.basename(source_path)
+            subset.source_sha1 = file_hash(source_path)
+
+            for name, dimension in source.dimensions.items():
+                window = windows.get(name)
+                size = len(range(*window.indices(len(dimension)))) if window else len(dimension)
+                subset.createDimension(name, size)
+
+            for name in wanted:
+                variable = source.variables[name]
+                # The classic format has no 64 bit integers, times become doubles
+                dtype = variable.dtype
+                if dtype == np.int64:
+                    dtype = np.float64 if variable.dimensions else np.int32
+                fill_value = getattr(variable, "_FillValue", None)
+                copy = subset.createVariable(name, dtype, variable.dimensions, fill_value=fill_value)
+                copy.setncatts(
+                    {key: variable.getncattr(key) for key in variable.ncattrs() if key != "_FillValue"}
+                )
+                index = tuple(windows.get(dim, slice(None)) for dim in variable.dimensions)
+                copy[...] = variable[index] if index else variable[...]
+
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="rocket.json")
+    parser.add_argument("--cell-margin", type=int, default=2)
+    parser.add_argument("--time-margin", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        env_data = json.load(f)["environment"]
+
+    path = extract_site_subset(env_data, args.cell_margin, args.time_margin)
+    source_size = os.path.getsize(env_data["atmospheric_model"]["file_location"])
+    print(f"Saved site subset to '{path}' ({os.path.getsize(path)} bytes, source {source_size} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Base configuration shared by the flight workers of a process pool.
+
+Sweeps, Monte Carlo campaigns and the air brakes optimizer fly variants of
+one parsed configuration in ``ProcessPoolExecutor`` workers. ``init_worker``
+is their pool initializer: it stores the configuration once per process and
+warms the Environment cache, and job functions read it back with
+``worker_config`` instead of receiving it with every job.
+
+Usage
+-----
+    with ProcessPoolExecutor(initializer=init_worker, initargs=(config, config_sensor)) as pool:
+        ...
+
+    def job(overrides):
+        config, config_sensor = worker_config()
+"""
+import warnings
+
+from environment_cache import get_environment
+
+# Base configuration of this worker process, set once by init_worker
+_config = None
+_config_sensor = None
+
+
+def init_worker(config, config_sensor):
+    """Process pool initializer storing the base configuration of the jobs."""
+    global _config, _config_sensor
+    _config = config
+    _config_sensor = config_sensor
+    warnings.filterwarnings("ignore", category=UserWarning, module="rocketpy")
+    # Load the atmosphere once per worker rather than once per flight
+    get_environment(config["environment"])
+
+
+def worker_config():
+    """``(config, config_sensor)`` stored by ``init_worker`` in this process."""
+    return _config, _config_sensor